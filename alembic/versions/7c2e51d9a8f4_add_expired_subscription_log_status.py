@@ -0,0 +1,32 @@
+"""add expired subscription log status
+
+Revision ID: 7c2e51d9a8f4
+Revises: 3eb8e3fa4537
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '7c2e51d9a8f4'
+down_revision = '3eb8e3fa4537'
+
+from alembic import op
+
+
+def upgrade():
+    # NOTE: a new enum value cannot be used in the transaction adding it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE status_types ADD VALUE IF NOT EXISTS 'expired'")
+
+
+def downgrade():
+    op.execute(
+        "UPDATE webhookd_subscription_log SET status = 'error' "
+        "WHERE status = 'expired'"
+    )
+    op.execute("ALTER TYPE status_types RENAME TO status_types_old")
+    op.execute("CREATE TYPE status_types AS ENUM ('success', 'failure', 'error')")
+    op.execute(
+        'ALTER TABLE webhookd_subscription_log ALTER COLUMN status TYPE status_types '
+        'USING status::text::status_types'
+    )
+    op.execute('DROP TYPE status_types_old')
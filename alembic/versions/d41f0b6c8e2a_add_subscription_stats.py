@@ -0,0 +1,82 @@
+"""add subscription stats
+
+Revision ID: d41f0b6c8e2a
+Revises: 7c2e51d9a8f4
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd41f0b6c8e2a'
+down_revision = '7c2e51d9a8f4'
+
+import sqlalchemy as sa
+
+from alembic import op
+
+DURATION_BUCKETS = (
+    ('duration_le_100ms', None, 0.1),
+    ('duration_le_250ms', 0.1, 0.25),
+    ('duration_le_500ms', 0.25, 0.5),
+    ('duration_le_1s', 0.5, 1.0),
+    ('duration_le_2500ms', 1.0, 2.5),
+    ('duration_le_5s', 2.5, 5.0),
+    ('duration_le_10s', 5.0, 10.0),
+    ('duration_le_30s', 10.0, 30.0),
+    ('duration_gt_30s', 30.0, None),
+)
+COUNTERS = ('attempts', 'success', 'failure', 'error', 'expired') + tuple(
+    name for name, _, _ in DURATION_BUCKETS
+)
+
+
+def upgrade():
+    op.create_table(
+        'webhookd_subscription_stats',
+        sa.Column(
+            'subscription_uuid',
+            sa.String(38),
+            sa.ForeignKey('webhookd_subscription.uuid', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('bucket', sa.DateTime(timezone=True), primary_key=True),
+        *(
+            sa.Column(name, sa.Integer(), nullable=False, server_default='0')
+            for name in COUNTERS
+        ),
+        sa.Column('duration_sum', sa.Float(), nullable=False, server_default='0'),
+    )
+
+    # NOTE: roll up the existing logs, the same way as the service does
+    duration = 'extract(epoch FROM ended_at - started_at)'
+    ran = "status <> 'expired'"
+    buckets = []
+    for name, lower, upper in DURATION_BUCKETS:
+        conditions = [ran]
+        if lower is not None:
+            conditions.append(f'{duration} > {lower}')
+        if upper is not None:
+            conditions.append(f'{duration} <= {upper}')
+        buckets.append(f"count(*) FILTER (WHERE {' AND '.join(conditions)})")
+    op.execute(
+        f"""
+        INSERT INTO webhookd_subscription_stats
+            (subscription_uuid, bucket, {', '.join(COUNTERS)}, duration_sum)
+        SELECT
+            subscription_uuid,
+            date_trunc('hour', started_at),
+            count(*),
+            count(*) FILTER (WHERE status = 'success'),
+            count(*) FILTER (WHERE status = 'failure'),
+            count(*) FILTER (WHERE status = 'error'),
+            count(*) FILTER (WHERE status = 'expired'),
+            {', '.join(buckets)},
+            coalesce(sum({duration}) FILTER (WHERE {ran}), 0)
+        FROM webhookd_subscription_log
+        WHERE started_at IS NOT NULL AND ended_at IS NOT NULL
+        GROUP BY subscription_uuid, date_trunc('hour', started_at)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('webhookd_subscription_stats')
@@ -0,0 +1,37 @@
+"""add subscription delivery
+
+Revision ID: e5a27c93f1b4
+Revises: d41f0b6c8e2a
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e5a27c93f1b4'
+down_revision = 'd41f0b6c8e2a'
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+def upgrade():
+    op.create_table(
+        'webhookd_subscription_delivery',
+        sa.Column('idempotency_key', sa.String(36), primary_key=True),
+        sa.Column(
+            'subscription_uuid',
+            sa.String(38),
+            sa.ForeignKey('webhookd_subscription.uuid', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        'webhookd_subscription_delivery__idx__delivered_at',
+        'webhookd_subscription_delivery',
+        ['delivered_at'],
+    )
+
+
+def downgrade():
+    op.drop_table('webhookd_subscription_delivery')
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark the hot paths of wazo-webhookd.
+
+Runs without RabbitMQ, PostgreSQL or internet access: the bus dispatch is
+called directly, HTTP webhooks are sent to a local stub server and the
+database benchmarks use a temporary SQLite file unless --db-uri is given.
+Results are printed as JSON, to be compared between releases.
+
+    python benchmarks/hot_paths.py > results.json
+    python benchmarks/hot_paths.py --only bus_dispatch --subscriptions 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.mock import Mock
+
+import subscription_list
+
+from wazo_webhookd.bus import BusConsumer
+from wazo_webhookd.database.models import Subscription
+from wazo_webhookd.database.registry import registry
+from wazo_webhookd.plugins.subscription.schema import subscription_schema
+from wazo_webhookd.plugins.subscription.service import SubscriptionService
+from wazo_webhookd.services.http.plugin import Service as HTTPService
+from wazo_webhookd.services.mobile.fcm_client import FCMNotification
+from wazo_webhookd.services.mobile.plugin import NotificationType, PushNotification
+
+Result = dict[str, Any]
+
+EVENT_DATA = {
+    'call_id': '1700000000.42',
+    'peer_caller_id_number': '1001',
+    'peer_caller_id_name': 'Alice',
+    'video': False,
+    'ring_timeout': 30,
+    'mobile_wakeup_timestamp': '2026-01-01T00:00:00+00:00',
+}
+
+MOBILE_CONFIG = {
+    'mobile_apns_call_topic': 'org.wazo-platform.voip',
+    'mobile_apns_default_topic': 'org.wazo-platform',
+    'mobile_fcm_max_rate': 0,
+}
+
+
+def measure(
+    name: str, fn: Callable[[], Any], iterations: int, repeat: int, **params: Any
+) -> Result:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - start) / iterations)
+
+    best = min(timings)
+    return {
+        'benchmark': name,
+        **params,
+        'iterations': iterations,
+        'repeat': repeat,
+        'best_us': round(best * 1e6, 3),
+        'median_us': round(statistics.median(timings) * 1e6, 3),
+        'ops_per_second': round(1 / best, 1) if best else None,
+    }
+
+
+def bench_bus_dispatch(args: argparse.Namespace) -> list[Result]:
+    results = []
+    for count in args.subscriptions:
+        consumer = BusConsumer(
+            name='benchmark', exchange_name='wazo-headers', exchange_type='headers'
+        )
+        delivered = []
+        users = [str(uuid.uuid4()) for _ in range(count)]
+        for user_uuid in users:
+            consumer.subscribe(
+                'call_push_notification',
+                delivered.append,
+                headers={f'user_uuid:{user_uuid}': True, 'x-internal': True},
+                headers_match_all=True,
+            )
+
+        dispatch = consumer._ConsumerMixin__dispatch  # type: ignore[attr-defined]
+        payload = {'name': 'call_push_notification', 'data': EVENT_DATA}
+        headers = {
+            'name': 'call_push_notification',
+            f'user_uuid:{users[0]}': True,
+            'x-internal': True,
+        }
+        results.append(
+            measure(
+                'bus_dispatch',
+                lambda: dispatch('call_push_notification', payload, headers),
+                args.iterations,
+                args.repeat,
+                subscriptions=count,
+                matched=1,
+            )
+        )
+    return results
+
+
+def _subscription(events: int) -> dict[str, Any]:
+    return {
+        'uuid': str(uuid.uuid4()),
+        'name': 'benchmark',
+        'service': 'http',
+        'events': [f'event_{n}' for n in range(events)],
+        'config': {
+            'url': 'https://example.com/{{ event_name }}',
+            'method': 'post',
+            'content_type': 'application/json',
+            'body': '{{ event|tojson }}',
+        },
+        'owner_tenant_uuid': str(uuid.uuid4()),
+        'owner_user_uuid': None,
+        'events_user_uuid': None,
+        'events_wazo_uuid': None,
+        'metadata_': {f'key_{n}': 'value' for n in range(5)},
+    }
+
+
+def bench_subscription_schema(args: argparse.Namespace) -> list[Result]:
+    subscription = _subscription(events=20)
+    body = subscription_schema.dump(subscription)
+    return [
+        measure(
+            'subscription_schema_dump',
+            lambda: subscription_schema.dump(subscription),
+            args.iterations,
+            args.repeat,
+        ),
+        measure(
+            'subscription_schema_load',
+            lambda: subscription_schema.load(body),
+            args.iterations,
+            args.repeat,
+        ),
+    ]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def bench_http_service(args: argparse.Namespace) -> list[Result]:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        subscription = _subscription(events=1)
+        subscription['config'] = {
+            'url': f'http://{host}:{port}/{{{{ event_name }}}}',
+            'method': 'post',
+        }
+        event = {
+            'name': 'call_push_notification',
+            'origin_uuid': str(uuid.uuid4()),
+            'data': EVENT_DATA,
+        }
+        task = Mock()
+        task.request.retries = 0
+        return [
+            measure(
+                'http_service_run',
+                lambda: HTTPService.run(task, {}, subscription, event),  # type: ignore[arg-type]
+                max(args.iterations // 10, 1),
+                args.repeat,
+            )
+        ]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_mobile_payloads(args: argparse.Namespace) -> list[Result]:
+    push = PushNotification(
+        Mock(),
+        MOBILE_CONFIG,  # type: ignore[arg-type]
+        {'token': 'token', 'apns_token': 'apns-token'},  # type: ignore[typeddict-item]
+        {},  # type: ignore[typeddict-item]
+        'jwt',
+    )
+    data = {
+        'notification_type': NotificationType.INCOMING_CALL,
+        'items': dict(EVENT_DATA, notification_timestamp='2026-01-01T00:00:00'),
+    }
+    fcm = FCMNotification(service_account_info={'project_id': 'benchmark'})
+    data_message = dict(data, items=json.dumps(data['items'], sort_keys=True))
+    return [
+        measure(
+            'apns_create_message',
+            lambda: push._create_apn_message(None, None, data, True),  # type: ignore[arg-type]
+            args.iterations,
+            args.repeat,
+        ),
+        measure(
+            'fcm_parse_payload',
+            lambda: fcm.parse_payload(
+                registration_token='token',
+                data_message=data_message,
+                time_to_live=0,
+                low_priority=False,
+            ),
+            args.iterations,
+            args.repeat,
+        ),
+    ]
+
+
+def bench_create_hook_log(args: argparse.Namespace) -> list[Result]:
+    with tempfile.NamedTemporaryFile(suffix='.sqlite') as db_file:
+        db_uri = args.db_uri or f'sqlite:///{db_file.name}'
+        config = {'db_uri': db_uri, 'rest_api': {'max_threads': 1}}
+        service = SubscriptionService(config, Mock())  # type: ignore[arg-type]
+        engine = registry.get_engine(config)  # type: ignore[arg-type]
+        subscription_list.create_schema(engine)
+        try:
+            subscription_uuid = str(uuid.uuid4())
+            with engine.begin() as connection:
+                connection.execute(
+                    Subscription.__table__.insert(),
+                    {
+                        'uuid': subscription_uuid,
+                        'name': 'benchmark',
+                        'service': 'http',
+                        'owner_tenant_uuid': str(uuid.uuid4()),
+                    },
+                )
+            event = {'name': 'call_push_notification', 'data': EVENT_DATA}
+            detail = {'request_method': 'POST', 'response_status_code': 200}
+            now = datetime.datetime.utcnow()
+
+            def create_hook_log() -> None:
+                service.create_hook_log(
+                    str(uuid.uuid4()),
+                    subscription_uuid,
+                    'success',
+                    1,
+                    10,
+                    now,
+                    now,
+                    event,
+                    detail,
+                )
+
+            return [
+                measure(
+                    'create_hook_log',
+                    create_hook_log,
+                    max(args.iterations // 10, 1),
+                    args.repeat,
+                    dialect=engine.dialect.name,
+                )
+            ]
+        finally:
+            subscription_list.Base.metadata.drop_all(engine)
+            registry.dispose()
+
+
+def bench_subscription_list(args: argparse.Namespace) -> list[Result]:
+    with tempfile.NamedTemporaryFile(suffix='.sqlite') as db_file:
+        db_uri = args.db_uri or f'sqlite:///{db_file.name}'
+        return [
+            subscription_list.run(count, db_uri, http_ratio=0.1, seed=0)
+            for count in args.list_count
+        ]
+
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], list[Result]]] = {
+    'bus_dispatch': bench_bus_dispatch,
+    'subscription_schema': bench_subscription_schema,
+    'http_service': bench_http_service,
+    'mobile_payloads': bench_mobile_payloads,
+    'create_hook_log': bench_create_hook_log,
+    'subscription_list': bench_subscription_list,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--only',
+        choices=sorted(BENCHMARKS),
+        action='append',
+        help='Benchmark to run (may be repeated, default: all)',
+    )
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--subscriptions',
+        type=int,
+        action='append',
+        help='Bus subscriptions to the dispatched event (default: 10, 1000 and 10000)',
+    )
+    parser.add_argument(
+        '--list-count',
+        type=int,
+        action='append',
+        help='Subscriptions listed by SubscriptionService.list (default: 10000)',
+    )
+    parser.add_argument(
+        '--db-uri',
+        help=(
+            'Database to benchmark against, tables are created and dropped '
+            '(default: a temporary SQLite file)'
+        ),
+    )
+    args = parser.parse_args(argv)
+    args.subscriptions = args.subscriptions or [10, 1_000, 10_000]
+    args.list_count = args.list_count or [10_000]
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        print(f'running {name}...', file=sys.stderr)
+        results.extend(BENCHMARKS[name](args))
+
+    json.dump(
+        {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'results': results,
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
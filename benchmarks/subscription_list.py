@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark SubscriptionService.list() eager loading strategies.
+
+Compares the number of rows returned by the database, the wall time and the
+peak Python memory of listing every subscription with the per-collection
+`selectin` loading used by the models against the previous cartesian
+`joined` loading.
+
+    python benchmarks/subscription_list.py --count 10000 --count 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from unittest.mock import Mock
+
+from sqlalchemy import MetaData, event, func, inspect, select
+from sqlalchemy.orm import Session, joinedload
+
+from wazo_webhookd.database.models import (
+    Base,
+    Subscription,
+    SubscriptionEvent,
+    SubscriptionMetadatum,
+    SubscriptionOption,
+)
+from wazo_webhookd.database.registry import registry
+from wazo_webhookd.plugins.subscription.service import SubscriptionService
+
+# (events, options, metadata) per subscription
+MOBILE_SHAPE = (6, 0, 1)
+HTTP_SHAPE = (20, 5, 5)
+
+
+def create_schema(engine) -> None:
+    existing = set(inspect(engine).get_table_names())
+    if existing & set(Base.metadata.tables):
+        raise RuntimeError('Refusing to benchmark on a database with webhookd tables')
+
+    # NOTE: server defaults like uuid_generate_v4() only exist in postgres
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        if engine.dialect.name != 'postgresql':
+            for column in copy.columns:
+                column.server_default = None
+    metadata.create_all(engine)
+
+
+def populate(engine, count: int, http_ratio: float, seed: int) -> None:
+    rng = random.Random(seed)
+    tenant_uuid = str(uuid.uuid4())
+    subscriptions, events, options, metadata = [], [], [], []
+    for i in range(count):
+        subscription_uuid = str(uuid.uuid4())
+        is_http = rng.random() < http_ratio
+        nb_events, nb_options, nb_metadata = HTTP_SHAPE if is_http else MOBILE_SHAPE
+        subscriptions.append(
+            {
+                'uuid': subscription_uuid,
+                'name': f'bench-{i}',
+                'service': 'http' if is_http else 'mobile',
+                'owner_tenant_uuid': tenant_uuid,
+                'owner_user_uuid': None if is_http else str(uuid.uuid4()),
+            }
+        )
+        events.extend(
+            {
+                'uuid': str(uuid.uuid4()),
+                'subscription_uuid': subscription_uuid,
+                'event_name': f'event_{n}',
+            }
+            for n in range(nb_events)
+        )
+        options.extend(
+            {
+                'uuid': str(uuid.uuid4()),
+                'subscription_uuid': subscription_uuid,
+                'name': f'option_{n}',
+                'value': 'value',
+            }
+            for n in range(nb_options)
+        )
+        metadata.extend(
+            {
+                'uuid': str(uuid.uuid4()),
+                'subscription_uuid': subscription_uuid,
+                'key': f'key_{n}',
+                'value': 'value',
+            }
+            for n in range(nb_metadata)
+        )
+
+    with engine.begin() as connection:
+        for model, rows in (
+            (Subscription, subscriptions),
+            (SubscriptionEvent, events),
+            (SubscriptionOption, options),
+            (SubscriptionMetadatum, metadata),
+        ):
+            if rows:
+                connection.execute(model.__table__.insert(), rows)
+
+
+def count_rows(engine) -> dict[str, int]:
+    joined = (
+        select(func.count())
+        .select_from(Subscription.__table__)
+        .outerjoin(SubscriptionEvent.__table__)
+        .outerjoin(SubscriptionOption.__table__)
+        .outerjoin(SubscriptionMetadatum.__table__)
+    )
+    with engine.connect() as connection:
+        per_collection = sum(
+            connection.execute(
+                select(func.count()).select_from(model.__table__)
+            ).scalar()
+            for model in (
+                Subscription,
+                SubscriptionEvent,
+                SubscriptionOption,
+                SubscriptionMetadatum,
+            )
+        )
+        return {
+            'joined': connection.execute(joined).scalar(),
+            'selectin': per_collection,
+        }
+
+
+def list_joined(engine) -> list[Subscription]:
+    with Session(bind=engine) as session:
+        query = session.query(Subscription).options(
+            joinedload(Subscription.events_rel),
+            joinedload(Subscription.options_rel),
+            joinedload(Subscription.metadata_rel),
+        )
+        return query.all()
+
+
+def measure(fn, engine) -> dict[str, float | int]:
+    statements = 0
+
+    def count_statement(*args, **kwargs):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'subscriptions': len(result),
+        'statements': statements,
+        'seconds': round(elapsed, 4),
+        'peak_memory_bytes': peak,
+    }
+
+
+def run(count: int, db_uri: str, http_ratio: float, seed: int) -> dict:
+    config = {'db_uri': db_uri, 'rest_api': {'max_threads': 1}}
+    service = SubscriptionService(config, Mock())  # type: ignore[arg-type]
+    engine = registry.get_engine(config)  # type: ignore[arg-type]
+    create_schema(engine)
+    try:
+        populate(engine, count, http_ratio, seed)
+        rows = count_rows(engine)
+        return {
+            'benchmark': 'subscription_list',
+            'count': count,
+            'http_ratio': http_ratio,
+            'dialect': engine.dialect.name,
+            'joined': {
+                'rows': rows['joined'],
+                **measure(lambda: list_joined(engine), engine),
+            },
+            'selectin': {'rows': rows['selectin'], **measure(service.list, engine)},
+        }
+    finally:
+        Base.metadata.drop_all(engine)
+        registry.dispose()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--count',
+        type=int,
+        action='append',
+        help='Number of subscriptions (may be repeated, default: 10000 and 100000)',
+    )
+    parser.add_argument(
+        '--db-uri',
+        help=(
+            'Database to benchmark against, tables are created and dropped '
+            '(default: a temporary SQLite file)'
+        ),
+    )
+    parser.add_argument(
+        '--http-ratio',
+        type=float,
+        default=0.1,
+        help='Proportion of HTTP subscriptions, the rest being mobile ones',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.NamedTemporaryFile(suffix='.sqlite') as db_file:
+        db_uri = args.db_uri or f'sqlite:///{db_file.name}'
+        results = [
+            run(count, db_uri, args.http_ratio, args.seed)
+            for count in args.count or [10_000, 100_000]
+        ]
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,4 @@
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import datetime
@@ -11,6 +11,7 @@ from unittest.mock import Mock
 from hamcrest import (
     assert_that,
     calling,
+    contains_inanyorder,
     equal_to,
     has_entries,
     is_,
@@ -150,6 +151,40 @@ class TestDatabase(AssetLaunchingTestCase):
         )
         assert_that(tracker, has_entries({'uuid': is_(not_none())}))
 
+    def test_delete_user_subscriptions(self):
+        notifier = Mock()
+        service = SubscriptionService(self._some_config(), notifier)
+        tenant_uuid, user_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+        def create(**kwargs):
+            return service.create(
+                {
+                    'name': 'test',
+                    'owner_tenant_uuid': tenant_uuid,
+                    'service': 'mobile',
+                    'config': {'key': 'value'},
+                    'events': ['event'],
+                    **kwargs,
+                }
+            ).uuid
+
+        owned_uuid = create(owner_user_uuid=user_uuid)
+        listening_uuid = create(events_user_uuid=user_uuid)
+        other_uuid = create(owner_user_uuid=str(uuid.uuid4()))
+
+        deleted = []
+        service.pubsub.subscribe('deleted_many', deleted.extend)
+        service.delete_user_subscriptions(user_uuid)
+
+        expected = contains_inanyorder(owned_uuid, listening_uuid)
+        assert_that([subscription.uuid for subscription in deleted], expected)
+        (subscriptions,), _ = notifier.deleted_many.call_args
+        assert_that([subscription.uuid for subscription in subscriptions], expected)
+        remaining = service.list(owner_tenant_uuids=[tenant_uuid])
+        assert_that(
+            [subscription.uuid for subscription in remaining], equal_to([other_uuid])
+        )
+
     def test_subscription_pubsub_two_services(self):
         service1 = SubscriptionService(self._some_config(), Mock())
         service2 = SubscriptionService(self._some_config(), Mock())
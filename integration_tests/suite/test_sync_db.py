@@ -1,4 +1,4 @@
-# Copyright 2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2025-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from .helpers.base import (
@@ -134,7 +134,7 @@ class TestSyncDB(BaseIntegrationTest):
         with auth.capture_requests() as capture:
             self.sync_db()
 
-        assert [{'recurse': 'True'}] == [
+        assert [{'recurse': 'True', 'limit': '1000', 'offset': '0'}] == [
             request['query']
             for request in capture.requests
             if request['path'] == '/0.1/users'
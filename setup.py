@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from setuptools import find_packages, setup
@@ -19,10 +19,12 @@ setup(
             f'{NAME}-init-db = wazo_webhookd.bin.init_db:main',
             f'{NAME}-init-amqp = wazo_webhookd.bin.init_amqp:main',
             f'{NAME}-sync-db = wazo_webhookd.bin.sync_db:main',
+            f'{NAME}-loadgen = wazo_webhookd.bin.loadgen:main',
         ],
         'wazo_webhookd.plugins': [
             'api = wazo_webhookd.plugins.api.plugin:Plugin',
             'config = wazo_webhookd.plugins.config.plugin:Plugin',
+            'metrics = wazo_webhookd.plugins.metrics.plugin:Plugin',
             'mobile = wazo_webhookd.plugins.mobile.plugin:Plugin',
             'status = wazo_webhookd.plugins.status.plugin:Plugin',
             'subscriptions = wazo_webhookd.plugins.subscription.plugin:Plugin',
@@ -37,7 +39,9 @@ setup(
             'mobile = wazo_webhookd.plugins.mobile.celery_tasks',
         ],
         'wazo_purge_db.purgers': [
-            'webhookd-logs = wazo_webhookd.database.purger:SubscriptionLogsPurger'
+            'webhookd-logs = wazo_webhookd.database.purger:SubscriptionLogsPurger',
+            'webhookd-deliveries = '
+            'wazo_webhookd.database.purger:SubscriptionDeliveriesPurger',
         ],
     },
 )
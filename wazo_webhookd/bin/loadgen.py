@@ -0,0 +1,478 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Replay synthetic Wazo traffic against a local wazo-webhookd.
+
+Creates HTTP subscriptions pointing to a local sink server, publishes a mix of
+call, chat and voicemail events to the bus with the routing headers of the
+real producers, and reports the throughput and the latency between the
+publication of an event and the delivery of each of its hooks.
+
+Mobile pushes are measured with --service mobile against existing users whose
+mobile subscriptions and wazo-auth mobile configuration point to the local
+FCM and APNs sinks; the webhookd configuration to use is logged at startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import itertools
+import json
+import logging
+import random
+import re
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+import uuid
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import h2.config
+import h2.connection
+import h2.events
+import kombu
+import requests
+from xivo import xivo_logging
+
+logger = logging.getLogger('wazo-webhookd-loadgen')
+
+SCENARIOS = {
+    'call': ('call_push_notification',),
+    'chat': ('chatd_user_room_message_created',),
+    'voicemail': ('global_voicemail_message_created',),
+}
+PERCENTILES = (50, 90, 99)
+
+
+def parse_cli_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-d', '--debug', action='store_true', help="Log debug messages")
+    parser.add_argument(
+        '--service',
+        choices=('http', 'mobile'),
+        default='http',
+        help="Service of the hooks to measure",
+    )
+    parser.add_argument(
+        '--subscriptions',
+        type=int,
+        default=100,
+        help="Number of HTTP subscriptions to create, one per synthetic user",
+    )
+    parser.add_argument(
+        '--user',
+        action='append',
+        default=[],
+        help="UUID of a user with a mobile subscription (--service mobile)",
+    )
+    parser.add_argument(
+        '--tenant',
+        help="Tenant of the subscriptions and events (default: the token tenant)",
+    )
+    parser.add_argument(
+        '--mix',
+        default='call=8,chat=2',
+        help=(
+            "Weighted mix of scenarios, among call (one user rings), chat "
+            "(a room message to --room-size users) and voicemail (a tenant-wide "
+            "voicemail to every user), e.g. call=5,chat=4,voicemail=1"
+        ),
+    )
+    parser.add_argument('--room-size', type=int, default=5)
+    parser.add_argument(
+        '--events', type=int, default=1000, help="Number of events to publish"
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=100,
+        help="Events published per second, 0 to publish as fast as possible",
+    )
+    parser.add_argument(
+        '--drain-timeout',
+        type=float,
+        default=60,
+        help="Seconds to wait for the remaining hooks after the last event",
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--token', help="wazo-auth token allowed to manage webhookd subscriptions"
+    )
+    parser.add_argument('--webhookd-url', default='http://127.0.0.1:9300/1.0')
+    parser.add_argument('--bus-host', default='localhost')
+    parser.add_argument('--bus-port', type=int, default=5672)
+    parser.add_argument('--bus-username', default='guest')
+    parser.add_argument('--bus-password', default='guest')
+    parser.add_argument('--exchange-name', default='wazo-headers')
+    parser.add_argument('--origin-uuid', default=str(uuid.uuid4()))
+    parser.add_argument(
+        '--sink-port', type=int, default=0, help="Port of the HTTP and FCM sink"
+    )
+    parser.add_argument(
+        '--apns-port', type=int, default=0, help="Port of the APNs sink"
+    )
+    parser.add_argument(
+        '--apns-certificate',
+        help="TLS certificate of the APNs sink, which is not started without it",
+    )
+    parser.add_argument('--apns-private-key')
+    parser.add_argument(
+        '--keep-subscriptions',
+        action='store_true',
+        help="Do not delete the created subscriptions at the end of the run",
+    )
+    args = parser.parse_args()
+
+    # NOTE: never replay synthetic traffic on a production stack
+    for host in (args.bus_host, urllib.parse.urlparse(args.webhookd_url).hostname):
+        if not _is_local(host):
+            parser.error(f'{host} is not a local host')
+    if args.service == 'http' and not args.token:
+        parser.error('--token is required to create HTTP subscriptions')
+    if args.service == 'mobile' and not args.user:
+        parser.error('--user is required with --service mobile')
+    if bool(args.apns_certificate) != bool(args.apns_private_key):
+        parser.error('--apns-certificate and --apns-private-key go together')
+    try:
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def _is_local(host: str | None) -> bool:
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host or '')).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f'unknown scenario {name!r}')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+class Deliveries:
+    """Publication time of each event and delivery time of each of its hooks"""
+
+    def __init__(self, run_id: str) -> None:
+        self._marker = re.compile(rf'loadgen-{run_id}-(\d+)'.encode())
+        self._lock = threading.Lock()
+        self.run_id = run_id
+        self.published: dict[int, float] = {}
+        self.expected = 0
+        self.latencies: list[float] = []
+        self.last_delivery = 0.0
+
+    def marker(self, seq: int) -> str:
+        return f'loadgen-{self.run_id}-{seq}'
+
+    def publish(self, seq: int, targets: int) -> None:
+        with self._lock:
+            self.published[seq] = time.time()
+            self.expected += targets
+
+    def deliver(self, body: bytes) -> None:
+        now = time.time()
+        if not (match := self._marker.search(body)):
+            logger.debug('Ignoring a request without a loadgen marker')
+            return
+        with self._lock:
+            if (published_at := self.published.get(int(match.group(1)))) is None:
+                return
+            self.latencies.append(now - published_at)
+            self.last_delivery = now
+
+    def delivered(self) -> int:
+        with self._lock:
+            return len(self.latencies)
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    index = min(int(len(values) * percentile / 100), len(values) - 1)
+    return values[index]
+
+
+def report(deliveries: Deliveries, started_at: float, published_at: float) -> dict:
+    latencies = sorted(deliveries.latencies)
+    elapsed = max(deliveries.last_delivery, published_at) - started_at or 1e-6
+    result: dict[str, Any] = {
+        'events': len(deliveries.published),
+        'hooks_expected': deliveries.expected,
+        'hooks_delivered': len(latencies),
+        'publish_seconds': round(published_at - started_at, 3),
+        'events_per_second': round(len(deliveries.published) / elapsed, 1),
+        'hooks_per_second': round(len(latencies) / elapsed, 1),
+    }
+    if latencies:
+        result['latency_seconds'] = {
+            **{f'p{p}': round(_percentile(latencies, p), 4) for p in PERCENTILES},
+            'max': round(latencies[-1], 4),
+        }
+    return result
+
+
+def start_sink(port: int, deliveries: Deliveries) -> ThreadingHTTPServer:
+    class SinkHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        counter = itertools.count()
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            deliveries.deliver(body)
+            # NOTE: valid for webhooks, FCM sends and OAuth2 token requests
+            response = json.dumps(
+                {
+                    'name': f'projects/loadgen/messages/{next(self.counter)}',
+                    'access_token': 'loadgen',
+                    'token_type': 'Bearer',
+                    'expires_in': 3600,
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        do_PUT = do_POST
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), SinkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_apns_sink(
+    port: int, certificate: str, private_key: str, deliveries: Deliveries
+) -> socket.socket:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certificate, private_key)
+    context.set_alpn_protocols(['h2'])
+    listener = socket.create_server(('127.0.0.1', port))
+
+    def serve() -> None:
+        while True:
+            client, _ = listener.accept()
+            threading.Thread(
+                target=_serve_apns_connection,
+                args=(context, client, deliveries),
+                daemon=True,
+            ).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener
+
+
+def _serve_apns_connection(
+    context: ssl.SSLContext, client: socket.socket, deliveries: Deliveries
+) -> None:
+    sock = context.wrap_socket(client, server_side=True)
+    connection = h2.connection.H2Connection(
+        config=h2.config.H2Configuration(client_side=False)
+    )
+    connection.initiate_connection()
+    sock.sendall(connection.data_to_send())
+    bodies: dict[int, bytes] = {}
+    with sock:
+        while data := sock.recv(65535):
+            for event in connection.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    bodies[event.stream_id] = b''
+                elif isinstance(event, h2.events.DataReceived):
+                    bodies[event.stream_id] += event.data
+                    connection.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    deliveries.deliver(bodies.pop(event.stream_id, b''))
+                    connection.send_headers(
+                        event.stream_id,
+                        [(':status', '200'), ('apns-id', str(uuid.uuid4()))],
+                        end_stream=True,
+                    )
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+            sock.sendall(connection.data_to_send())
+
+
+class Subscriptions:
+    def __init__(self, url: str, token: str, tenant: str | None) -> None:
+        self._url = url.rstrip('/')
+        self._session = requests.Session()
+        self._session.headers['X-Auth-Token'] = token
+        if tenant:
+            self._session.headers['Wazo-Tenant'] = tenant
+        self.created: list[dict[str, Any]] = []
+
+    def create(self, count: int, events: list[str], sink_url: str, run_id: str):
+        for i in range(count):
+            response = self._session.post(
+                f'{self._url}/subscriptions',
+                json={
+                    'name': f'loadgen-{run_id}-{i}',
+                    'service': 'http',
+                    'events': events,
+                    'events_user_uuid': str(uuid.uuid4()),
+                    'config': {
+                        'url': f'{sink_url}/http/{{{{ event_name }}}}',
+                        'method': 'post',
+                    },
+                    'metadata': {'loadgen': run_id},
+                },
+            )
+            response.raise_for_status()
+            self.created.append(response.json())
+        logger.info('Created %s subscriptions', len(self.created))
+
+    def delete(self) -> None:
+        for subscription in self.created:
+            self._session.delete(f'{self._url}/subscriptions/{subscription["uuid"]}')
+        logger.info('Deleted %s subscriptions', len(self.created))
+
+
+def generate_events(
+    args, users: list[str], tenant_uuid: str | None, deliveries: Deliveries
+) -> Iterator[tuple[int, dict[str, Any], dict[str, Any], int]]:
+    """Yield the sequence, payload, headers and number of targets of each event"""
+    rng = random.Random(args.seed)
+    scenarios, weights = zip(*args.mix.items())
+    for seq in range(args.events):
+        scenario = rng.choices(scenarios, weights)[0]
+        name = rng.choice(SCENARIOS[scenario])
+        marker = deliveries.marker(seq)
+        headers: dict[str, Any] = {'name': name, 'origin_uuid': args.origin_uuid}
+        if tenant_uuid:
+            headers['tenant_uuid'] = tenant_uuid
+
+        if scenario == 'call':
+            targets = [rng.choice(users)]
+            data = {
+                'call_id': marker,
+                'peer_caller_id_name': 'Load Generator',
+                'peer_caller_id_number': str(rng.randint(1000, 9999)),
+                'video': False,
+                'ring_timeout': 30,
+                'mobile_wakeup_timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            }
+        elif scenario == 'chat':
+            targets = rng.sample(users, min(args.room_size, len(users)))
+            data = {
+                'uuid': str(uuid.uuid4()),
+                'alias': 'Load Generator',
+                'content': marker,
+                'room': {'uuid': str(uuid.uuid4())},
+                'user_uuid': str(uuid.uuid4()),
+            }
+        else:
+            targets = users
+            data = {
+                'message_id': marker,
+                'message': {
+                    'id': marker,
+                    'caller_id_name': 'Load Generator',
+                    'caller_id_num': '1000',
+                },
+            }
+
+        if scenario == 'voicemail':
+            headers['user_uuid:*'] = True
+        else:
+            headers.update({f'user_uuid:{user}': True for user in targets})
+        payload = {'name': name, 'origin_uuid': args.origin_uuid, 'data': data}
+        yield seq, payload, headers, len(targets)
+
+
+def publish(args, events, deliveries: Deliveries) -> None:
+    bus_url = (
+        f'amqp://{args.bus_username}:{args.bus_password}'
+        f'@{args.bus_host}:{args.bus_port}//'
+    )
+    exchange = kombu.Exchange(args.exchange_name, type='headers', passive=True)
+    interval = 1 / args.rate if args.rate else 0
+    with kombu.Connection(bus_url) as connection:
+        producer = kombu.Producer(connection, exchange=exchange, auto_declare=False)
+        next_at = time.monotonic()
+        for seq, payload, headers, targets in events:
+            if (delay := next_at - time.monotonic()) > 0:
+                time.sleep(delay)
+            next_at += interval
+            deliveries.publish(seq, targets)
+            producer.publish(
+                json.dumps(payload),
+                headers=headers,
+                content_type='application/json',
+                retry=True,
+            )
+
+
+def main():
+    args = parse_cli_args()
+    xivo_logging.setup_logging(
+        '/dev/null', log_level=logging.DEBUG if args.debug else logging.INFO
+    )
+
+    run_id = uuid.uuid4().hex[:8]
+    deliveries = Deliveries(run_id)
+    sink = start_sink(args.sink_port, deliveries)
+    sink_url = f'http://127.0.0.1:{sink.server_address[1]}'
+    logger.info('HTTP sink listening on %s', sink_url)
+    logger.info(
+        'FCM sink: mobile_fcm_notification_end_point: %s/fcm/{project_id}, '
+        'with %s/token as token_uri of the service account',
+        sink_url,
+        sink_url,
+    )
+    if args.apns_certificate:
+        apns = start_apns_sink(
+            args.apns_port, args.apns_certificate, args.apns_private_key, deliveries
+        )
+        logger.info(
+            'APNs sink: mobile_apns_host: 127.0.0.1, mobile_apns_port: %s, '
+            'with SSL_CERT_FILE=%s in the environment of wazo-webhookd',
+            apns.getsockname()[1],
+            args.apns_certificate,
+        )
+
+    events = sorted({name for scenario in args.mix for name in SCENARIOS[scenario]})
+    subscriptions = None
+    if args.service == 'http':
+        subscriptions = Subscriptions(args.webhookd_url, args.token, args.tenant)
+        subscriptions.create(args.subscriptions, events, sink_url, run_id)
+        users = [s['events_user_uuid'] for s in subscriptions.created]
+        tenant_uuid = subscriptions.created[0]['owner_tenant_uuid']
+    else:
+        users, tenant_uuid = args.user, args.tenant
+
+    try:
+        started_at = time.time()
+        publish(args, generate_events(args, users, tenant_uuid, deliveries), deliveries)
+        published_at = time.time()
+        logger.info('Published %s events', args.events)
+
+        deadline = time.monotonic() + args.drain_timeout
+        while (
+            deliveries.delivered() < deliveries.expected and time.monotonic() < deadline
+        ):
+            time.sleep(0.1)
+        print(json.dumps(report(deliveries, started_at, published_at), indent=2))
+    finally:
+        sink.shutdown()
+        if subscriptions and not args.keep_subscriptions:
+            subscriptions.delete()
+
+
+if __name__ == '__main__':
+    main()
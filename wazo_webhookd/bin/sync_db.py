@@ -1,13 +1,14 @@
-# Copyright 2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2025-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import argparse
 import logging
-from collections.abc import Generator
+import time
+from collections.abc import Generator, Iterator
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, or_
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import or_, select, union
+from sqlalchemy.orm import scoped_session
 from wazo_auth_client import Client as AuthClient
 from xivo import xivo_logging
 from xivo.chain_map import ChainMap
@@ -15,9 +16,14 @@ from xivo.config_helper import read_config_file_hierarchy
 
 from wazo_webhookd.config import _DEFAULT_CONFIG, _load_key_file
 from wazo_webhookd.database.models import Subscription
+from wazo_webhookd.database.registry import registry
 
 logger = logging.getLogger('wazo-webhookd-sync-db')
 
+AUTH_PAGE_SIZE = 1000
+AUTH_UUID_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+
 
 def parse_cli_args():
     parser = argparse.ArgumentParser()
@@ -33,8 +39,14 @@ def parse_cli_args():
         action='store_true',
         help='Only print warnings and errors',
     )
+    parser.add_argument(
+        '-n',
+        '--dry-run',
+        action='store_true',
+        help='Report what would be removed, with timings, without removing anything',
+    )
     parsed_args = parser.parse_args()
-    result = {'log_level': logging.INFO}
+    result = {'log_level': logging.INFO, 'dry_run': parsed_args.dry_run}
     if parsed_args.quiet:
         result['log_level'] = logging.WARNING
     elif parsed_args.debug:
@@ -61,9 +73,20 @@ def rw_session(Session) -> Generator[scoped_session, None, None]:
         Session.remove()
 
 
+@contextmanager
+def timed(timings: dict[str, float], step: str) -> Generator[None, None, None]:
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[step] = time.monotonic() - start
+        logger.debug('%s took %.3fs', step, timings[step])
+
+
 def main():
     cli_args = parse_cli_args()
     config = load_config()
+    dry_run = cli_args['dry_run']
 
     xivo_logging.setup_logging('/dev/null', log_level=cli_args['log_level'])
     xivo_logging.silence_loggers(['stevedore.extension'], logging.WARNING)
@@ -72,73 +95,120 @@ def main():
 
     del config['auth']['username']
     del config['auth']['password']
-    tenants = AuthClient(token=token, **config['auth']).tenants.list()['items']
-    auth_tenants = {str(tenant['uuid']) for tenant in tenants}
+    auth_client = AuthClient(token=token, **config['auth'])
+    timings: dict[str, float] = {}
+
+    with timed(timings, 'list auth tenants'):
+        tenants = auth_client.tenants.list()['items']
+        auth_tenants = {str(tenant['uuid']) for tenant in tenants}
     logger.debug('Found %s wazo-auth tenants', len(auth_tenants))
 
-    users = AuthClient(token=token, **config['auth']).users.list(recurse=True)['items']
-    auth_users = {str(user['uuid']) for user in users}
+    with timed(timings, 'list auth users'):
+        auth_users = set(iter_auth_users(auth_client))
     logger.debug('Found %s wazo-auth users', len(auth_users))
 
-    engine = create_engine(
-        config['db_uri'],
-        pool_size=config['rest_api']['max_threads'],
-        pool_pre_ping=True,
-    )
-    Session = scoped_session(sessionmaker())
-    Session.configure(bind=engine)
-
+    Session = registry.get_session(config)
     with rw_session(Session) as session:
-        remove_tenants(session, auth_tenants)
-        remove_users(session, auth_users)
+        with timed(timings, 'list webhookd tenants'):
+            removed_tenants = find_webhookd_tenants(session) - auth_tenants
 
+        with timed(timings, 'list webhookd users'):
+            removed_users = find_webhookd_users(session) - auth_users
 
-def remove_tenants(session, auth_tenants):
-    webhookd_tenants = {
-        row.owner_tenant_uuid
-        for row in session.query(Subscription.owner_tenant_uuid)
-        .distinct()
-        .filter(Subscription.owner_tenant_uuid != None)  # noqa
-        .all()
-    }
-    logger.debug('Found %s webhookd tenants', len(webhookd_tenants))
+        if removed_users:
+            # NOTE: users deleted while paging shift the following pages, which
+            # may hide existing users: look up the missing users by uuid
+            with timed(timings, 'confirm removed users'):
+                removed_users -= set(find_auth_users(auth_client, removed_users))
 
-    removed_tenants = webhookd_tenants - auth_tenants
-    for tenant_uuid in removed_tenants:
-        remove_tenant(tenant_uuid, session)
+        if not dry_run:
+            with timed(timings, 'remove tenants'):
+                remove_tenants(session, removed_tenants)
+            with timed(timings, 'remove users'):
+                remove_users(session, removed_users)
 
+    report(removed_tenants, removed_users, timings, dry_run)
 
-def remove_tenant(tenant_uuid, session):
-    logger.debug('Removing tenant and its related data: %s', tenant_uuid)
 
-    session.query(Subscription).filter(
-        Subscription.owner_tenant_uuid == tenant_uuid
-    ).delete()
+def report(removed_tenants, removed_users, timings, dry_run):
+    action = 'Would remove' if dry_run else 'Removed'
+    logger.info(
+        '%s subscriptions of %s deleted tenants and %s deleted users',
+        action,
+        len(removed_tenants),
+        len(removed_users),
+    )
+    for tenant_uuid in sorted(removed_tenants):
+        logger.debug('%s tenant %s', action, tenant_uuid)
+    for user_uuid in sorted(removed_users):
+        logger.debug('%s user %s', action, user_uuid)
+    for step, seconds in timings.items():
+        logger.info('%s: %.3fs', step, seconds)
+    logger.info('total: %.3fs', sum(timings.values()))
+
+
+def iter_auth_users(auth_client) -> Iterator[str]:
+    offset = 0
+    while True:
+        users = auth_client.users.list(
+            recurse=True, limit=AUTH_PAGE_SIZE, offset=offset
+        )['items']
+        for user in users:
+            yield str(user['uuid'])
+        if len(users) < AUTH_PAGE_SIZE:
+            return
+        offset += len(users)
+
+
+def find_auth_users(auth_client, user_uuids: set[str]) -> Iterator[str]:
+    for batch in _batches(user_uuids, AUTH_UUID_BATCH_SIZE):
+        users = auth_client.users.list(
+            uuid=','.join(batch), recurse=True, limit=len(batch)
+        )['items']
+        for user in users:
+            yield str(user['uuid'])
+
+
+def find_webhookd_tenants(session) -> set[str]:
+    query = session.query(Subscription.owner_tenant_uuid).distinct()
+    return {tenant_uuid for tenant_uuid, in query}
+
+
+def find_webhookd_users(session) -> set[str]:
+    query = union(
+        select(Subscription.owner_user_uuid).where(
+            Subscription.owner_user_uuid.isnot(None)
+        ),
+        select(Subscription.events_user_uuid).where(
+            Subscription.events_user_uuid.isnot(None)
+        ),
+    )
+    return {user_uuid for user_uuid, in session.execute(query)}
 
 
-def remove_users(session, auth_users):
-    webhookd_users = {
-        user_uuid
-        for subscription in (session.query(Subscription).all())
-        for user_uuid in (subscription.owner_user_uuid, subscription.events_user_uuid)
-        if user_uuid
-    }
-    logger.debug('Found %s webhookd users', len(webhookd_users))
+def _batches(uuids: set[str], size: int = DELETE_BATCH_SIZE) -> Iterator[list[str]]:
+    uuids_list = sorted(uuids)
+    for i in range(0, len(uuids_list), size):
+        yield uuids_list[i : i + size]
 
-    removed_users = webhookd_users - auth_users
-    for user_uuid in removed_users:
-        remove_user(user_uuid, session)
 
+def remove_tenants(session, tenant_uuids):
+    for batch in _batches(tenant_uuids):
+        logger.debug('Removing subscriptions of %s tenants', len(batch))
+        session.query(Subscription).filter(
+            Subscription.owner_tenant_uuid.in_(batch)
+        ).delete(synchronize_session=False)
 
-def remove_user(user_uuid, session):
-    logger.debug('Removing user and its related data: %s', user_uuid)
 
-    session.query(Subscription).filter(
-        or_(
-            Subscription.owner_user_uuid == user_uuid,
-            Subscription.events_user_uuid == user_uuid,
-        )
-    ).delete()
+def remove_users(session, user_uuids):
+    for batch in _batches(user_uuids):
+        logger.debug('Removing subscriptions of %s users', len(batch))
+        session.query(Subscription).filter(
+            or_(
+                Subscription.owner_user_uuid.in_(batch),
+                Subscription.events_user_uuid.in_(batch),
+            )
+        ).delete(synchronize_session=False)
 
 
 if __name__ == '__main__':
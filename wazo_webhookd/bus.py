@@ -3,8 +3,16 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
 import logging
-from collections.abc import Callable, Sequence
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
 from inspect import signature
 from threading import Lock
 from typing import TYPE_CHECKING, Any
@@ -15,6 +23,9 @@ from wazo_bus.mixins import ConsumerMixin, ThreadableMixin
 from wazo_bus.publisher import BusPublisher as BasePublisher
 from xivo.status import Status
 
+from . import timeline
+from .metrics import metrics
+
 if TYPE_CHECKING:
     from amqp import Message
     from kombu.transport.base import StdChannel
@@ -26,6 +37,97 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_local = threading.local()
+
+SEEN_MESSAGES = 10000
+
+
+class MessageKeys:
+    """Keys of the bus messages, the same for each delivery of a message.
+
+    The key is the AMQP message id, when the publisher sets one. Otherwise,
+    each message delivered for the first time gets a new key, so identical
+    events have distinct keys, and a redelivered message gets the key of the
+    last message received with the same body and headers. The messages
+    redelivered to another process, e.g. after a restart, get a new key.
+    """
+
+    def __init__(self, size: int = SEEN_MESSAGES) -> None:
+        self._size = size
+        self._prefix = uuid.uuid4()
+        self._sequence = itertools.count()
+        self._keys: OrderedDict[str, str] = OrderedDict()
+        self._lock = Lock()
+
+    def key(self, message: kombu.Message) -> str:
+        if message_id := (message.properties or {}).get('message_id'):
+            return message_id
+        digest = _digest(message)
+        redelivered = bool((message.delivery_info or {}).get('redelivered'))
+        with self._lock:
+            if not redelivered or (key := self._keys.get(digest)) is None:
+                key = f'{self._prefix}:{next(self._sequence)}'
+            self._keys[digest] = key
+            self._keys.move_to_end(digest)
+            if len(self._keys) > self._size:
+                self._keys.popitem(last=False)
+        return key
+
+
+def _digest(message: kombu.Message) -> str:
+    body = message.body if isinstance(message.body, bytes) else message.body.encode()
+    headers = json.dumps(message.headers or {}, sort_keys=True, default=str)
+    return hashlib.sha256(body + headers.encode()).hexdigest()
+
+
+message_keys = MessageKeys()
+
+
+@contextmanager
+def _receiving(message: kombu.Message) -> Iterator[None]:
+    _local.message = message
+    _local.message_id = message_keys.key(message)
+    try:
+        yield
+    finally:
+        _local.message = None
+        _local.message_id = None
+
+
+def _track_messages(consumer: kombu.Consumer) -> kombu.Consumer:
+    """Make the AMQP message available to the handlers dispatching it"""
+    if on_message := consumer.on_message:
+
+        def tracked_on_message(message: kombu.Message) -> None:
+            with _receiving(message):
+                on_message(message)
+
+        consumer.on_message = tracked_on_message
+    else:
+        callbacks = list(consumer.callbacks or [])
+
+        def tracked_callback(body: Any, message: kombu.Message) -> None:
+            with _receiving(message):
+                for callback in callbacks:
+                    callback(body, message)
+
+        consumer.callbacks = [tracked_callback]
+    return consumer
+
+
+def current_message_id() -> str | None:
+    """Key of the bus message dispatched by the current thread, see
+    MessageKeys"""
+    return getattr(_local, 'message_id', None)
+
+
+def current_message_redelivered() -> bool:
+    """Whether RabbitMQ already delivered the bus message dispatched by the
+    current thread, e.g. before a reconnection"""
+    if (message := getattr(_local, 'message', None)) is None:
+        return False
+    return bool((message.delivery_info or {}).get('redelivered'))
+
 
 def _wants_headers(handler: Callable) -> bool:
     return len(signature(handler).parameters) == 2
@@ -55,6 +157,14 @@ class _ConsumerMixin(ConsumerMixin):
 
     def __dispatch(
         self, event_name: str, payload: Payload, headers: Headers | None = None
+    ) -> None:
+        timeline.start(received=time.time())
+        metrics.inc('webhookd_bus_events_received_total', {'event': event_name})
+        with metrics.time('webhookd_bus_dispatch_seconds'):
+            self.__dispatch_handlers(event_name, payload, headers)
+
+    def __dispatch_handlers(
+        self, event_name: str, payload: Payload, headers: Headers | None
     ) -> None:
         with self.__lock:
             subscriptions = self.__subscriptions[event_name].copy()
@@ -115,7 +225,8 @@ class BusConsumer(ThreadableMixin, _ConsumerMixin, Base):
         self, Consumer: kombu.Consumer, channel: StdChannel
     ) -> list[kombu.Consumer]:
         self._webhookd_exchange.declare(channel)
-        return super().get_consumers(Consumer, channel)
+        consumers = super().get_consumers(Consumer, channel)
+        return [_track_messages(consumer) for consumer in consumers]
 
     def on_connection_error(self, exc: Exception, interval: str) -> None:
         self._webhookd_exchange.on_connection_error()
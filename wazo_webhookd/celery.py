@@ -1,4 +1,4 @@
-# Copyright 2017-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -9,9 +9,13 @@ from functools import partial
 from typing import TYPE_CHECKING
 
 from celery import Celery
+from celery.signals import task_prerun, worker_process_init
 from stevedore.named import NamedExtensionManager
 from xivo.plugin_helpers import enabled_names, on_load_failure, on_missing_entrypoints
 
+from .database.registry import POOL_CELERY, registry
+from .profiling import profiler
+
 if TYPE_CHECKING:
     from wazo_webhookd.types import WebhookdConfigDict
 
@@ -34,6 +38,16 @@ def configure(config: WebhookdConfigDict) -> None:
     app.conf.worker_max_memory_per_child = 100_000
 
 
+@worker_process_init.connect
+def _use_celery_database_pool(**kwargs) -> None:
+    registry.pool_name = POOL_CELERY
+
+
+@task_prerun.connect
+def _follow_profiling(**kwargs) -> None:
+    profiler.follow()
+
+
 def start_celery(argv: tuple[str, ...]) -> int | None:
     """
     This method implements the `worker_main` and `start` from Celery < 5.0
@@ -54,8 +68,42 @@ def start_celery(argv: tuple[str, ...]) -> int | None:
     return None
 
 
-def spawn_workers(config: WebhookdConfigDict) -> multiprocessing.Process:
+def spawn_workers(config: WebhookdConfigDict) -> list[multiprocessing.Process]:
     logger.debug('Starting Celery workers...')
+    celery_config = config['celery']
+    processes = [
+        _spawn_worker(
+            config,
+            'webhookd@%h',
+            celery_config['queue_name'],
+            celery_config['worker_min'],
+            celery_config['worker_max'],
+            celery_config['worker_pid_file'],
+        )
+    ]
+    if priority_queue := celery_config['priority_queue_name']:
+        logger.debug('Starting Celery priority workers...')
+        processes.append(
+            _spawn_worker(
+                config,
+                'webhookd-priority@%h',
+                priority_queue,
+                celery_config['priority_worker_min'],
+                celery_config['priority_worker_max'],
+                celery_config['priority_worker_pid_file'],
+            )
+        )
+    return processes
+
+
+def _spawn_worker(
+    config: WebhookdConfigDict,
+    hostname: str,
+    queue: str,
+    worker_min: int,
+    worker_max: int,
+    pid_file: str,
+) -> multiprocessing.Process:
     argv = [
         'worker',
         # NOTE(sileht): setproctitle must be installed to have the celery
@@ -65,11 +113,13 @@ def spawn_workers(config: WebhookdConfigDict) -> multiprocessing.Process:
         '--loglevel',
         logging.getLevelName(config['log_level']).upper(),
         '--hostname',
-        'webhookd@%h',
+        hostname,
+        '--queues',
+        queue,
         '--autoscale',
-        f"{config['celery']['worker_max']},{config['celery']['worker_min']}",
+        f"{worker_max},{worker_min}",
         '--pidfile',
-        config['celery']['worker_pid_file'],
+        pid_file,
     ]
     process = multiprocessing.Process(target=start_celery, args=(argv,))
     process.start()
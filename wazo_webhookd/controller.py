@@ -20,6 +20,7 @@ from wazo_webhookd import celery
 
 from . import auth
 from .bus import BusConsumer, BusPublisher
+from .profiling import profiler
 from .rest_api import CoreRestApi, api
 
 if TYPE_CHECKING:
@@ -35,8 +36,9 @@ class Controller:
         # we don't fork the process after some database/rabbitmq connection
         # have been established
         celery.configure(config)
+        profiler.configure(config['profiling'])
         celery.load_celery_tasks(config)
-        self._celery_process = celery.spawn_workers(config)
+        self._celery_processes = celery.spawn_workers(config)
 
         self._service_discovery_args = [
             'wazo-webhookd',
@@ -96,9 +98,11 @@ class Controller:
                     self.rest_api.run()
         finally:
             logger.info('wazo-webhookd stopping...')
-            self._celery_process.terminate()
+            for process in self._celery_processes:
+                process.terminate()
             logger.debug('waiting for remaining threads/subprocesses...')
-            self._celery_process.join()
+            for process in self._celery_processes:
+                process.join()
             if self._stopping_thread:
                 self._stopping_thread.join()
             logger.debug('all threads and subprocesses stopped.')
@@ -1,4 +1,4 @@
-# Copyright 2017-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -10,6 +10,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
     Integer,
     String,
@@ -107,7 +108,7 @@ class SubscriptionLog(Base):  # type: ignore
         nullable=False,
     )
 
-    status = Column(Enum("success", "failure", "error", name='status_types'))
+    status = Column(Enum("success", "failure", "error", "expired", name='status_types'))
     started_at = Column(DateTime(timezone=True))
     ended_at = Column(DateTime(timezone=True))
     attempts = Column(Integer(), primary_key=True)
@@ -116,6 +117,66 @@ class SubscriptionLog(Base):  # type: ignore
     detail = Column(JSONType)
 
 
+class SubscriptionDelivery(Base):  # type: ignore
+    """Idempotency keys of the hooks delivered successfully"""
+
+    __tablename__ = 'webhookd_subscription_delivery'
+    __table_args__ = (
+        Index('webhookd_subscription_delivery__idx__delivered_at', 'delivered_at'),
+    )
+
+    idempotency_key = Column(String(36), primary_key=True)
+    subscription_uuid = Column(
+        String(38),
+        ForeignKey('webhookd_subscription.uuid', ondelete='CASCADE'),
+        nullable=False,
+    )
+    delivered_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# NOTE: upper bounds in seconds of the duration buckets of the stats, with the
+# column counting the attempts of each bucket; the last one has no bound
+STATS_DURATION_COLUMNS = (
+    (0.1, 'duration_le_100ms'),
+    (0.25, 'duration_le_250ms'),
+    (0.5, 'duration_le_500ms'),
+    (1.0, 'duration_le_1s'),
+    (2.5, 'duration_le_2500ms'),
+    (5.0, 'duration_le_5s'),
+    (10.0, 'duration_le_10s'),
+    (30.0, 'duration_le_30s'),
+    (float('inf'), 'duration_gt_30s'),
+)
+
+
+class SubscriptionStats(Base):  # type: ignore
+    """Hook logs of a subscription rolled up by hour"""
+
+    __tablename__ = 'webhookd_subscription_stats'
+
+    subscription_uuid = Column(
+        String(38),
+        ForeignKey('webhookd_subscription.uuid', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    attempts = Column(Integer(), nullable=False, server_default='0')
+    success = Column(Integer(), nullable=False, server_default='0')
+    failure = Column(Integer(), nullable=False, server_default='0')
+    error = Column(Integer(), nullable=False, server_default='0')
+    expired = Column(Integer(), nullable=False, server_default='0')
+    duration_sum = Column(Float(), nullable=False, server_default='0')
+    duration_le_100ms = Column(Integer(), nullable=False, server_default='0')
+    duration_le_250ms = Column(Integer(), nullable=False, server_default='0')
+    duration_le_500ms = Column(Integer(), nullable=False, server_default='0')
+    duration_le_1s = Column(Integer(), nullable=False, server_default='0')
+    duration_le_2500ms = Column(Integer(), nullable=False, server_default='0')
+    duration_le_5s = Column(Integer(), nullable=False, server_default='0')
+    duration_le_10s = Column(Integer(), nullable=False, server_default='0')
+    duration_le_30s = Column(Integer(), nullable=False, server_default='0')
+    duration_gt_30s = Column(Integer(), nullable=False, server_default='0')
+
+
 class Subscription(Base):  # type: ignore
     __tablename__ = 'webhookd_subscription'
 
@@ -129,14 +190,17 @@ class Subscription(Base):  # type: ignore
     owner_user_uuid = Column(String(36))
     owner_tenant_uuid = Column(String(36), nullable=False)
 
+    # NOTE: selectin loads each collection with its own `IN (...)` query
+    # instead of joining all of them, which returned events x options x
+    # metadata rows for every subscription.
     events_rel: RelationshipProperty[SubscriptionEvent] = relationship(
-        "SubscriptionEvent", lazy='joined', cascade='all, delete-orphan'
+        "SubscriptionEvent", lazy='selectin', cascade='all, delete-orphan'
     )
     options_rel: RelationshipProperty[SubscriptionOption] = relationship(
-        "SubscriptionOption", lazy='joined', cascade='all, delete-orphan'
+        "SubscriptionOption", lazy='selectin', cascade='all, delete-orphan'
     )
     metadata_rel: RelationshipProperty[SubscriptionMetadatum] = relationship(
-        "SubscriptionMetadatum", lazy='joined', cascade='all, delete-orphan'
+        "SubscriptionMetadatum", lazy='selectin', cascade='all, delete-orphan'
     )
 
     def make_transient(self) -> None:
@@ -1,11 +1,11 @@
-# Copyright 2019 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2019-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import datetime
 
 from sqlalchemy import func
 
-from .models import SubscriptionLog
+from .models import SubscriptionDelivery, SubscriptionLog
 
 
 class SubscriptionLogsPurger:
@@ -15,3 +15,12 @@ class SubscriptionLogsPurger:
             < (func.localtimestamp() - datetime.timedelta(days=days_to_keep))
         )
         session.execute(query)
+
+
+class SubscriptionDeliveriesPurger:
+    def purge(self, days_to_keep, session):
+        query = SubscriptionDelivery.__table__.delete().where(
+            SubscriptionDelivery.delivered_at
+            < (func.localtimestamp() - datetime.timedelta(days=days_to_keep))
+        )
+        session.execute(query)
@@ -0,0 +1,202 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .replica import ReplicaRouter
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+    from ..types import WebhookdConfigDict
+
+logger = logging.getLogger(__name__)
+
+POOL_REST_API = 'rest_api'
+POOL_CELERY = 'celery'
+
+DEFAULT_REPLICA_MAX_LAG = 5
+
+DEFAULT_POOL_SETTINGS = {
+    POOL_REST_API: {'size': None, 'max_overflow': 10, 'timeout': 30},
+    POOL_CELERY: {'size': 1, 'max_overflow': 2, 'timeout': 30},
+}
+
+
+class PoolStatusDict(TypedDict):
+    name: str
+    pool: str
+    size: int
+    max_overflow: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    wait_count: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class _WaitStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool measuring how long threads wait to check out a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = _WaitStats()
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_stats.record(time.monotonic() - start)
+
+
+class EngineRegistry:
+    """Process-wide engines and scoped sessions, keyed by database URI.
+
+    Every service of a process shares the same connection pool for a given
+    `db_uri`. The pool is sized for the kind of process it lives in: REST API
+    threads in the main process, or a single task at a time in each Celery
+    worker process. Pools inherited through `fork()` are discarded in the child
+    without closing the parent's connections.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._engines: dict[str, Engine] = {}
+        self._sessions: dict[str, scoped_session] = {}
+        self._pool_names: dict[str, str] = {}
+        self._routers: dict[tuple[str, str], ReplicaRouter] = {}
+        self.pool_name = POOL_REST_API
+
+    def get_engine(
+        self, config: WebhookdConfigDict, db_uri: str | None = None
+    ) -> Engine:
+        db_uri = db_uri or config['db_uri']
+        with self._lock:
+            if (engine := self._engines.get(db_uri)) is None:
+                engine = self._engines[db_uri] = self._create_engine(config, db_uri)
+                self._pool_names[db_uri] = self.pool_name
+            return engine
+
+    def get_session(
+        self, config: WebhookdConfigDict, db_uri: str | None = None
+    ) -> scoped_session:
+        db_uri = db_uri or config['db_uri']
+        engine = self.get_engine(config, db_uri)
+        with self._lock:
+            if (Session := self._sessions.get(db_uri)) is None:
+                Session = self._sessions[db_uri] = scoped_session(sessionmaker())
+                Session.configure(bind=engine)
+            return Session
+
+    def get_replica_router(self, config: WebhookdConfigDict) -> ReplicaRouter | None:
+        db_ro_uri = config.get('db_ro_uri')
+        if not db_ro_uri:
+            return None
+
+        key = (config['db_uri'], db_ro_uri)
+        primary = self.get_session(config)
+        replica = self.get_session(config, db_uri=db_ro_uri)
+        replica_engine = self.get_engine(config, db_uri=db_ro_uri)
+        max_lag = config.get('db_ro_max_lag', DEFAULT_REPLICA_MAX_LAG)
+        with self._lock:
+            if (router := self._routers.get(key)) is None:
+                router = self._routers[key] = ReplicaRouter(
+                    primary, replica, replica_engine, max_lag
+                )
+            return router
+
+    def dispose(self) -> None:
+        with self._lock:
+            for Session in self._sessions.values():
+                Session.remove()
+            for engine in self._engines.values():
+                engine.dispose()
+            self._sessions.clear()
+            self._engines.clear()
+            self._pool_names.clear()
+            self._routers.clear()
+
+    def pool_status(self) -> list[PoolStatusDict]:
+        with self._lock:
+            engines = list(self._engines.items())
+        return [
+            self._pool_status(db_uri, engine)
+            for db_uri, engine in engines
+            if isinstance(engine.pool, InstrumentedQueuePool)
+        ]
+
+    def _pool_status(self, db_uri: str, engine: Engine) -> PoolStatusDict:
+        pool: InstrumentedQueuePool = engine.pool  # type: ignore[assignment]
+        return {
+            'name': f'{engine.url.host or "localhost"}/{engine.url.database}',
+            'pool': self._pool_names.get(db_uri, ''),
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'wait_count': pool.wait_stats.count,
+            'wait_seconds_total': pool.wait_stats.total,
+            'wait_seconds_max': pool.wait_stats.max,
+        }
+
+    def _create_engine(self, config: WebhookdConfigDict, db_uri: str) -> Engine:
+        settings = pool_settings(config, self.pool_name)
+        logger.debug(
+            'Creating %s database pool (size=%s, max_overflow=%s)',
+            self.pool_name,
+            settings['size'],
+            settings['max_overflow'],
+        )
+        return create_engine(
+            db_uri,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings['size'],
+            max_overflow=settings['max_overflow'],
+            pool_timeout=settings['timeout'],
+            pool_pre_ping=True,
+        )
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        for engine in self._engines.values():
+            # NOTE: close=False leaves the parent's connections untouched
+            engine.dispose(close=False)
+
+
+def pool_settings(config: WebhookdConfigDict, pool_name: str) -> dict[str, Any]:
+    settings = dict(DEFAULT_POOL_SETTINGS[pool_name])
+    settings.update(config.get('db_pool', {}).get(pool_name) or {})
+    if not settings['size']:
+        settings['size'] = config['rest_api']['max_threads']
+    return settings
+
+
+registry = EngineRegistry()
+os.register_at_fork(after_in_child=registry._reset_after_fork)
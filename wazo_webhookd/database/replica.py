@@ -0,0 +1,93 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import exc, text
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.orm import scoped_session
+
+logger = logging.getLogger(__name__)
+
+LAG_CHECK_INTERVAL = 1.0
+
+# NOTE: an idle standby has replayed everything it received, so its last
+# replay timestamp is not a lag. A primary returns NULL for both functions.
+_LAG_QUERY = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE('
+    'EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0'
+    ') END'
+)
+
+
+class ReplicaRouter:
+    """Choose between the replica and the primary for read-only sessions.
+
+    Reads go to the primary when the replica is unreachable, when it lags more
+    than `max_lag` seconds behind, or when this process committed a write
+    recently enough that the replica may not have replayed it yet.
+    """
+
+    def __init__(
+        self,
+        primary: scoped_session,
+        replica: scoped_session,
+        replica_engine: Engine,
+        max_lag: float,
+    ) -> None:
+        self.primary = primary
+        self.replica = replica
+        self._replica_engine = replica_engine
+        self._max_lag = max_lag
+        self._last_write = float('-inf')
+        self._checked_at = float('-inf')
+        self._replica_usable = True
+
+    def record_write(self) -> None:
+        self._last_write = time.monotonic()
+
+    def replica_failed(self) -> None:
+        self._set_usable(False, 'Database replica query failed')
+        self._checked_at = time.monotonic()
+
+    def reader(self) -> scoped_session:
+        now = time.monotonic()
+        if now - self._last_write < self._max_lag + LAG_CHECK_INTERVAL:
+            return self.primary
+        if now - self._checked_at >= LAG_CHECK_INTERVAL:
+            self._checked_at = now
+            self._check_replica()
+        return self.replica if self._replica_usable else self.primary
+
+    def _check_replica(self) -> None:
+        try:
+            lag = self._measure_lag()
+        except exc.DBAPIError as e:
+            self._set_usable(False, f'Database replica unavailable: {e}')
+            return
+
+        if lag > self._max_lag:
+            self._set_usable(False, f'Database replica lags by {lag:.1f}s')
+        else:
+            self._set_usable(True, 'Database replica caught up')
+
+    def _measure_lag(self) -> float:
+        if self._replica_engine.dialect.name != 'postgresql':
+            return 0.0
+        with self._replica_engine.connect() as connection:
+            return float(connection.execute(_LAG_QUERY).scalar() or 0)
+
+    def _set_usable(self, usable: bool, reason: str) -> None:
+        if usable != self._replica_usable:
+            if usable:
+                logger.info('%s, reading from replica', reason)
+            else:
+                logger.warning('%s, reading from primary', reason)
+        self._replica_usable = usable
@@ -0,0 +1,101 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+import tempfile
+from unittest import TestCase
+
+from hamcrest import assert_that, contains_exactly, equal_to, has_entries, is_, not_
+
+from ..registry import POOL_CELERY, EngineRegistry, pool_settings
+
+
+class TestEngineRegistry(TestCase):
+    def setUp(self):
+        fd, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        self.config = {
+            'db_uri': f'sqlite:///{self.db_path}',
+            'rest_api': {'max_threads': 4},
+        }
+        self.registry = EngineRegistry()
+
+    def tearDown(self):
+        self.registry.dispose()
+        os.unlink(self.db_path)
+
+    def test_engine_is_shared_by_db_uri(self):
+        engine = self.registry.get_engine(self.config)
+
+        assert_that(self.registry.get_engine(dict(self.config)), is_(engine))
+        assert_that(self.registry.get_session(self.config).bind, is_(engine))
+
+    def test_engine_per_db_uri(self):
+        engine = self.registry.get_engine(self.config)
+        other = self.registry.get_engine(self.config, db_uri='sqlite://')
+
+        assert_that(other, is_(not_(engine)))
+
+    def test_pool_status(self):
+        Session = self.registry.get_session(self.config)
+        Session().connection()
+
+        assert_that(
+            self.registry.pool_status(),
+            contains_exactly(
+                has_entries(
+                    pool='rest_api',
+                    size=4,
+                    checked_out=1,
+                    overflow=0,
+                    wait_count=1,
+                )
+            ),
+        )
+        Session.remove()
+        assert_that(self.registry.pool_status()[0]['checked_out'], equal_to(0))
+
+    def test_replica_router_disabled(self):
+        assert_that(self.registry.get_replica_router(self.config), is_(None))
+
+    def test_replica_router_is_shared(self):
+        config = dict(self.config, db_ro_uri='sqlite://')
+
+        router = self.registry.get_replica_router(config)
+
+        assert_that(self.registry.get_replica_router(config), is_(router))
+        assert_that(router.primary, is_(self.registry.get_session(config)))
+        assert_that(
+            router.replica,
+            is_(self.registry.get_session(config, db_uri='sqlite://')),
+        )
+
+    def test_reset_after_fork_replaces_pool(self):
+        engine = self.registry.get_engine(self.config)
+        pool = engine.pool
+
+        self.registry._reset_after_fork()
+
+        assert_that(self.registry.get_engine(self.config), is_(engine))
+        assert_that(engine.pool, is_(not_(pool)))
+
+
+class TestPoolSettings(TestCase):
+    def test_rest_api_defaults_to_max_threads(self):
+        config = {'rest_api': {'max_threads': 7}}
+
+        settings = pool_settings(config, 'rest_api')  # type: ignore[arg-type]
+
+        assert_that(settings, has_entries(size=7, max_overflow=10))
+
+    def test_celery_configured(self):
+        config = {
+            'rest_api': {'max_threads': 7},
+            'db_pool': {'celery': {'size': 2, 'max_overflow': 0, 'timeout': 5}},
+        }
+
+        settings = pool_settings(config, POOL_CELERY)  # type: ignore[arg-type]
+
+        assert_that(settings, has_entries(size=2, max_overflow=0, timeout=5))
@@ -0,0 +1,52 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, is_
+from sqlalchemy import exc
+
+from ..replica import ReplicaRouter
+
+
+class TestReplicaRouter(TestCase):
+    def setUp(self):
+        self.primary = Mock()
+        self.replica = Mock()
+        self.router = ReplicaRouter(self.primary, self.replica, Mock(), max_lag=5)
+
+    def test_reads_from_replica(self):
+        with patch.object(self.router, '_measure_lag', return_value=0.2):
+            assert_that(self.router.reader(), is_(self.replica))
+
+    def test_reads_from_primary_after_write(self):
+        self.router.record_write()
+
+        with patch.object(self.router, '_measure_lag', return_value=0.2):
+            assert_that(self.router.reader(), is_(self.primary))
+
+    def test_reads_from_primary_when_replica_lags(self):
+        with patch.object(self.router, '_measure_lag', return_value=30):
+            assert_that(self.router.reader(), is_(self.primary))
+
+    def test_reads_from_primary_when_replica_unavailable(self):
+        error = exc.OperationalError('SELECT', {}, Exception('down'))
+        with patch.object(self.router, '_measure_lag', side_effect=error):
+            assert_that(self.router.reader(), is_(self.primary))
+
+    def test_lag_check_is_cached(self):
+        with patch.object(self.router, '_measure_lag', return_value=0) as measure:
+            self.router.reader()
+            self.router.reader()
+
+        measure.assert_called_once_with()
+
+    def test_replica_failed(self):
+        with patch.object(self.router, '_measure_lag', return_value=0):
+            self.router.reader()
+            self.router.replica_failed()
+
+            assert_that(self.router.reader(), is_(self.primary))
@@ -0,0 +1,228 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+if TYPE_CHECKING:
+    from multiprocessing.synchronize import Lock
+
+logger = logging.getLogger(__name__)
+
+MAX_SERIES = 2048
+MAX_KEY_SIZE = 192
+LOCK_STRIPES = 64
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DROPPED_SERIES = 'webhookd_metrics_samples_dropped_total'
+
+MetricType = Literal['counter', 'histogram']
+
+# NOTE: count, sum and one value per bucket; a counter only uses the first one
+_WIDTH = len(BUCKETS) + 2
+
+
+class _Metric(NamedTuple):
+    type: MetricType
+    help: str
+
+
+METRICS: dict[str, _Metric] = {
+    'webhookd_bus_events_received_total': _Metric(
+        'counter', 'Bus events received, by event name'
+    ),
+    'webhookd_bus_dispatch_seconds': _Metric(
+        'histogram', 'Time spent dispatching a bus event to its handlers'
+    ),
+    'webhookd_tasks_enqueued_total': _Metric(
+        'counter', 'Hook tasks sent to the Celery queues, by service and lane'
+    ),
+    'webhookd_hooks_total': _Metric(
+        'counter', 'Hook attempts, by service and subscription log status'
+    ),
+    'webhookd_hooks_deduplicated_total': _Metric(
+        'counter', 'Hooks not run because they were already delivered, by service'
+    ),
+    'webhookd_hooks_coalesced_total': _Metric(
+        'counter',
+        'Call pushes and their cancel not sent because the call was cancelled '
+        'before its push, by service and event',
+    ),
+    'webhookd_hook_duration_seconds': _Metric(
+        'histogram', 'Time spent running a hook attempt, by service'
+    ),
+    'webhookd_hook_retries_total': _Metric(
+        'counter', 'Hook attempts scheduled for a retry, by service'
+    ),
+    'webhookd_hook_errors_total': _Metric(
+        'counter', 'Hook attempts failed, by service and error class'
+    ),
+    'webhookd_hook_stage_seconds': _Metric(
+        'histogram',
+        'Time spent in each stage of the delivery of a hook, by service and stage',
+    ),
+    'webhookd_hook_log_write_seconds': _Metric(
+        'histogram', 'Time spent writing subscription logs to the database'
+    ),
+    'webhookd_http_responses_total': _Metric(
+        'counter', 'Responses to HTTP webhooks, by status class'
+    ),
+    'webhookd_mobile_push_seconds': _Metric(
+        'histogram', 'Time spent sending a push notification, by provider'
+    ),
+    DROPPED_SERIES: _Metric(
+        'counter', 'Samples of new series dropped because the metrics storage is full'
+    ),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def series_key(name: str, labels: dict[str, str] | None = None) -> str:
+    if not labels:
+        return name
+    labels_text = ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return f'{name}{{{labels_text}}}'
+
+
+class SharedMetrics:
+    """Prometheus counters and histograms shared with the forked Celery workers.
+
+    Series are stored in a fixed-size hash table allocated in shared memory
+    before the workers are forked, so the main process exposes the samples
+    recorded by all the processes. Samples of new series are dropped, and
+    counted, once `max_series` series exist.
+
+    The key table is only locked to add a series; the samples of a series are
+    guarded by one of `LOCK_STRIPES` locks chosen by its slot, so processes
+    recording different series do not wait for each other.
+    """
+
+    def __init__(self, max_series: int = MAX_SERIES) -> None:
+        self._max_series = max_series
+        self._keys = multiprocessing.Array('c', max_series * MAX_KEY_SIZE)
+        self._values = multiprocessing.Array('d', max_series * _WIDTH, lock=False)
+        self._locks = [multiprocessing.Lock() for _ in range(LOCK_STRIPES)]
+        # NOTE: series never move, the slots known by the main process are
+        # still valid in the forked workers
+        self._slots: dict[str, int] = {}
+        self._dropped_slot = self._find_slot(DROPPED_SERIES)
+
+    def inc(
+        self, name: str, labels: dict[str, str] | None = None, value: float = 1
+    ) -> None:
+        if (slot := self._slot(series_key(name, labels))) is None:
+            return
+        with self._lock(slot):
+            self._values[slot * _WIDTH] += value
+
+    def observe(
+        self, name: str, value: float, labels: dict[str, str] | None = None
+    ) -> None:
+        if (slot := self._slot(series_key(name, labels))) is None:
+            return
+        offset = slot * _WIDTH
+        with self._lock(slot):
+            self._values[offset] += 1
+            self._values[offset + 1] += value
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    self._values[offset + 2 + i] += 1
+
+    @contextmanager
+    def time(self, name: str, labels: dict[str, str] | None = None) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, labels)
+
+    def render(self) -> str:
+        with self._keys.get_lock():
+            keys = self._keys.raw  # type: ignore[attr-defined]
+        with ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            values = self._values[:]
+
+        series: dict[str, list[tuple[str, list[float]]]] = {}
+        for slot in range(self._max_series):
+            raw_key = keys[slot * MAX_KEY_SIZE : (slot + 1) * MAX_KEY_SIZE]
+            if not (key := raw_key.rstrip(b'\0').decode()):
+                continue
+            name, _, labels = key.partition('{')
+            series.setdefault(name, []).append(
+                (labels.rstrip('}'), values[slot * _WIDTH : (slot + 1) * _WIDTH])
+            )
+
+        lines = []
+        for name in sorted(series):
+            metric = METRICS.get(name, _Metric('counter', ''))
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for labels, samples in sorted(series[name]):
+                if metric.type == 'counter':
+                    lines.append(f'{name}{_braces(labels)} {samples[0]}')
+                    continue
+                for bound, count in zip(BUCKETS, samples[2:]):
+                    bucket_labels = _join(labels, f'le="{bound}"')
+                    lines.append(f'{name}_bucket{{{bucket_labels}}} {count}')
+                bucket_labels = _join(labels, 'le="+Inf"')
+                lines.append(f'{name}_bucket{{{bucket_labels}}} {samples[0]}')
+                lines.append(f'{name}_sum{_braces(labels)} {samples[1]}')
+                lines.append(f'{name}_count{_braces(labels)} {samples[0]}')
+        return '\n'.join(lines) + '\n'
+
+    def _lock(self, slot: int) -> Lock:
+        return self._locks[slot % LOCK_STRIPES]
+
+    def _slot(self, key: str) -> int | None:
+        if (slot := self._slots.get(key)) is not None:
+            return slot
+
+        with self._keys.get_lock():
+            slot = self._find_slot(key)
+        if slot is None and self._dropped_slot is not None:
+            with self._lock(self._dropped_slot):
+                self._values[self._dropped_slot * _WIDTH] += 1
+        return slot
+
+    def _find_slot(self, key: str) -> int | None:
+        encoded = key.encode()
+        if len(encoded) <= MAX_KEY_SIZE:
+            start = zlib.crc32(encoded) % self._max_series
+            for i in range(self._max_series):
+                slot = (start + i) % self._max_series
+                offset = slot * MAX_KEY_SIZE
+                current = self._keys[offset : offset + MAX_KEY_SIZE].rstrip(b'\0')
+                if not current:
+                    self._keys[offset : offset + len(encoded)] = encoded
+                elif current != encoded:
+                    continue
+                self._slots[key] = slot
+                return slot
+
+        logger.debug('Cannot store metrics series %s, dropping the sample', key)
+        return None
+
+
+def _braces(labels: str) -> str:
+    return f'{{{labels}}}' if labels else ''
+
+
+def _join(labels: str, label: str) -> str:
+    return f'{labels},{label}' if labels else label
+
+
+# NOTE: must be created before the Celery workers are forked, which is the case
+# when the controller imports the bus consumer
+metrics = SharedMetrics()
@@ -1,14 +1,14 @@
-# Copyright 2020-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2020-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from marshmallow import Schema
-from marshmallow.validate import Equal
+from marshmallow.validate import Equal, OneOf
 from xivo.mallow import fields
 
 
 class ConfigPatchSchema(Schema):
     op = fields.String(validate=Equal('replace'))
-    path = fields.String(validate=Equal('/debug'))
+    path = fields.String(validate=OneOf(['/debug', '/profiling/enabled']))
     value = fields.Boolean()
 
 
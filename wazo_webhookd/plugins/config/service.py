@@ -1,4 +1,4 @@
-# Copyright 2020-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2020-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -7,6 +7,7 @@ import logging
 import threading
 from typing import cast
 
+from ...profiling import profiler
 from ...types import WebhookdConfigDict
 
 
@@ -18,15 +19,31 @@ class ConfigService:
     def __init__(self, config: WebhookdConfigDict) -> None:
         self._config: WebhookdConfigDict = cast(WebhookdConfigDict, dict(config))
         self._enabled = False
+        if self._config['profiling'].get('enabled'):
+            profiler.start()
 
     def get_config(self) -> WebhookdConfigDict:
         with self._lock:
-            return cast(WebhookdConfigDict, dict(self._config))
+            config = cast(WebhookdConfigDict, dict(self._config))
+            # NOTE: profiling stops by itself after its maximum duration
+            config['profiling'] = dict(  # type: ignore[typeddict-item]
+                self._config['profiling'], enabled=profiler.running()
+            )
+            return config
 
     def update_config(self, config: WebhookdConfigDict) -> None:
         with self._lock:
             self._update_debug(config['debug'])
             self._config['debug'] = config['debug']
+            self._update_profiling(config['profiling']['enabled'])
+
+    def _update_profiling(self, enabled: bool) -> None:
+        if enabled == profiler.running():
+            return
+        if enabled:
+            profiler.start()
+        else:
+            profiler.stop()
 
     def _update_debug(self, debug: bool) -> None:
         if debug:
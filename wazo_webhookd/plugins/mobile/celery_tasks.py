@@ -3,17 +3,21 @@
 
 from __future__ import annotations
 
+import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
 import requests
 from celery import Task
+from celery.exceptions import MaxRetriesExceededError
 
 from wazo_webhookd.celery import app
 
+from ...services.helpers import HookRetry
 from ...services.mobile.plugin import PushNotification
 from ...services.mobile.plugin import Service as PushNotificationService
-from .schema import NotificationDict
+from .schema import BulkNotificationDict, NotificationDict
 
 if TYPE_CHECKING:
     from ...types import WebhookdConfigDict
@@ -65,3 +69,95 @@ def send_notification(
     )
     logger.debug('Push response: %s', response)
     return response['success']
+
+
+@app.task(bind=True)
+def send_notifications(
+    task: Task,
+    config: WebhookdConfigDict,
+    notification: BulkNotificationDict,
+) -> int:
+    """Send the same notification to many users, returns the number sent.
+
+    The users whose push can be retried are sent again together by the next
+    attempt of the task.
+    """
+    task.max_retries = config["hook_max_attempts"] - 1
+    logger.debug(
+        "Attempting to send notification to %d users with payload: %s (attempt %d)",
+        len(notification['user_uuids']),
+        notification,
+        task.request.retries + 1,
+    )
+
+    def send(user_uuid: str) -> bool | Exception:
+        try:
+            return send_notification(
+                config,
+                {
+                    'user_uuid': user_uuid,
+                    'notification_type': notification['notification_type'],
+                    'title': notification['title'],
+                    'body': notification['body'],
+                    # NOTE: the extra payload is modified when sent
+                    'extra': copy.deepcopy(notification['extra']),
+                },
+            )
+        except (HookRetry, requests.RequestException) as e:
+            logger.info('Failed to send notification to user %s: %s', user_uuid, e)
+            return e
+        except Exception:
+            logger.exception('Failed to send notification to user %s', user_uuid)
+            return False
+
+    # NOTE: APNs pushes are multiplexed on the pooled HTTP/2 connections and
+    # FCM pushes share the credentials of the service account
+    with ThreadPoolExecutor(
+        max_workers=PushNotificationService.MULTICAST_MAX_WORKERS,
+        thread_name_prefix='mobile-bulk',
+    ) as executor:
+        results = dict(
+            zip(
+                notification['user_uuids'],
+                executor.map(send, notification['user_uuids']),
+            )
+        )
+
+    sent = sum(result is True for result in results.values())
+    failed = {
+        user_uuid: result
+        for user_uuid, result in results.items()
+        if isinstance(result, Exception)
+    }
+    logger.info(
+        'Notification sent to %d/%d users', sent, len(notification['user_uuids'])
+    )
+    if failed:
+        _retry_users(task, config, notification, failed)
+    return sent
+
+
+def _retry_users(
+    task: Task,
+    config: WebhookdConfigDict,
+    notification: BulkNotificationDict,
+    failed: dict[str, Exception],
+) -> None:
+    countdowns = [
+        e.countdown
+        for e in failed.values()
+        if isinstance(e, HookRetry) and e.countdown is not None
+    ]
+    base = config["hook_http_retry_countdown_factor"]
+    countdown = max(countdowns, default=int(base**task.request.retries))
+    try:
+        task.retry(
+            args=(config, notification | {'user_uuids': list(failed)}),
+            countdown=countdown,
+        )
+    except MaxRetriesExceededError:
+        logger.error(
+            'Notification not sent to %d users after %d attempts',
+            len(failed),
+            task.request.retries + 1,
+        )
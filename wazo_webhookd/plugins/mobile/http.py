@@ -1,10 +1,10 @@
-# Copyright 2023-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from typing import Literal, TypedDict
+from typing import Any, Literal, TypedDict
 
 import requests
 from flask import request
@@ -16,11 +16,14 @@ from xivo.tenant_flask_helpers import Tenant
 from wazo_webhookd.rest_api import AuthResource
 
 from ...types import WebhookdConfigDict
-from .celery_tasks import send_notification
-from .schema import notification_schema
+from .celery_tasks import send_notification, send_notifications
+from .schema import bulk_notification_schema, notification_schema
 
 logger = logging.getLogger(__name__)
 
+# NOTE: user uuids are sent in the query string, keep the URL short
+AUTH_USERS_BATCH_SIZE = 100
+
 
 class UserDict(TypedDict):
     """Only a subset of what is returned."""
@@ -66,3 +69,72 @@ class NotificationResource(AuthResource):
         )
         logger.debug('Notification: %s, was sent (%s)', notification, result)
         return '', 204
+
+
+class BulkNotificationResource(AuthResource):
+    def __init__(self, config: WebhookdConfigDict, auth_client: AuthClient) -> None:
+        self.auth_client = auth_client
+        self.config = config
+
+    def find_users(self, user_uuids: set[str]) -> dict[str, UserDict]:
+        """Users of the current tenant among the given ones, unknown users and
+        users of other tenants are left out"""
+        tenant_uuid = Tenant.autodetect().uuid
+        found: dict[str, UserDict] = {}
+        uuids = sorted(user_uuids)
+        for i in range(0, len(uuids), AUTH_USERS_BATCH_SIZE):
+            batch = uuids[i : i + AUTH_USERS_BATCH_SIZE]
+            try:
+                users = self.auth_client.users.list(
+                    tenant_uuid=tenant_uuid,
+                    uuid=','.join(batch),
+                    recurse=False,
+                    limit=len(batch),
+                )['items']
+            except requests.HTTPError as e:
+                logger.debug('Error listing users: %s', str(e))
+                raise APIException(
+                    400, 'User UUIDs are invalid or unauthorized', 'invalid-user-uuid'
+                )
+            for user in users:
+                if user['uuid'] in user_uuids and user['tenant_uuid'] == tenant_uuid:
+                    found[user['uuid']] = user
+        return found
+
+    @staticmethod
+    def _rejection(user: UserDict | None) -> str | None:
+        if user is None:
+            return 'invalid-user-uuid'
+        if user['enabled'] is not True:
+            return 'disabled-user'
+        return None
+
+    @required_acl('webhookd.mobile.notifications.send')
+    def post(self) -> tuple[dict[str, Any], int]:
+        notification = bulk_notification_schema.load(request.json)
+        user_uuids = list(dict.fromkeys(notification['user_uuids']))
+        users = self.find_users(set(user_uuids))
+
+        items = []
+        accepted = []
+        for user_uuid in user_uuids:
+            reason = self._rejection(users.get(user_uuid))
+            if reason is None:
+                accepted.append(user_uuid)
+            items.append(
+                {'user_uuid': user_uuid, 'accepted': reason is None, 'reason': reason}
+            )
+
+        if accepted:
+            result = send_notifications.apply_async(
+                args=(dict(self.config), notification | {'user_uuids': accepted}),
+                retry=True,
+                retry_policy={'max_retries': self.config["hook_max_attempts"] - 1},
+            )
+            logger.debug(
+                'Notification: %s, was sent to %d users (%s)',
+                notification,
+                len(accepted),
+                result,
+            )
+        return {'items': items}, 200
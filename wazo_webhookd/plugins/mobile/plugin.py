@@ -1,11 +1,11 @@
-# Copyright 2023-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from .http import NotificationResource
+from .http import BulkNotificationResource, NotificationResource
 
 if TYPE_CHECKING:
     from ...types import PluginDependencyDict
@@ -22,3 +22,8 @@ class Plugin:
             '/mobile/notifications',
             resource_class_args=[config, auth_client],
         )
+        api.add_resource(
+            BulkNotificationResource,
+            '/mobile/notifications/bulk',
+            resource_class_args=[config, auth_client],
+        )
@@ -1,4 +1,4 @@
-# Copyright 2023-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -11,6 +11,8 @@ from marshmallow.validate import Length, NoneOf, Regexp
 
 from ...services.mobile.plugin import RESERVED_NOTIFICATION_TYPES
 
+MAX_BULK_USERS = 500
+
 
 class NotificationDict(TypedDict):
     notification_type: str
@@ -20,7 +22,15 @@ class NotificationDict(TypedDict):
     extra: dict[str, Any]
 
 
-class NotificationSchema(Schema):
+class BulkNotificationDict(TypedDict):
+    notification_type: str
+    user_uuids: list[str]
+    title: str
+    body: str
+    extra: dict[str, Any]
+
+
+class BaseNotificationSchema(Schema):
     notification_type = fields.String(
         validate=(
             Length(min=1, max=100),
@@ -32,7 +42,6 @@ class NotificationSchema(Schema):
         ),
         required=True,
     )
-    user_uuid = fields.String(validate=Length(equal=36), required=True)
     # There is no technical reason for this character limit,
     # but anything approaching this limit will not be displayed.
     # The only technical limit on the payload is a max total size of 2KB.
@@ -41,4 +50,17 @@ class NotificationSchema(Schema):
     extra = fields.Dict(load_default=dict, dump_default=dict)
 
 
+class NotificationSchema(BaseNotificationSchema):
+    user_uuid = fields.String(validate=Length(equal=36), required=True)
+
+
+class BulkNotificationSchema(BaseNotificationSchema):
+    user_uuids = fields.List(
+        fields.String(validate=Length(equal=36)),
+        validate=Length(min=1, max=MAX_BULK_USERS),
+        required=True,
+    )
+
+
 notification_schema = NotificationSchema()
+bulk_notification_schema = BulkNotificationSchema()
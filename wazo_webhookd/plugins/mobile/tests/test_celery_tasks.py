@@ -1,11 +1,18 @@
-# Copyright 2023-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 from unittest.mock import Mock, patch, sentinel
 
-from ..celery_tasks import send_notification
+import pytest
+from celery.exceptions import MaxRetriesExceededError
+
+from wazo_webhookd.services.helpers import HookRetry
+
+from ..celery_tasks import send_notification, send_notifications
+
+CONFIG = {'hook_max_attempts': 3, 'hook_http_retry_countdown_factor': 2}
 
 
 @patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotificationService')
@@ -38,3 +45,101 @@ def test_send_notification(
         sentinel.body,
         sentinel.extra,
     )
+
+
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotificationService')
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotification')
+def test_send_notifications(
+    mock_push_notification_class: Mock, mock_service_class: Mock
+) -> None:
+    mock_service_class.MULTICAST_MAX_WORKERS = 2
+    mock_service_class.get_external_data.side_effect = lambda config, user_uuid: (
+        {'token': user_uuid},
+        sentinel.external_config,
+        sentinel.jwt,
+    )
+    sent = []
+
+    def send_notification(notification_type, title, body, extra):
+        extra.pop('items')
+        sent.append(extra)
+        return {'success': True}
+
+    mock_push_notification_class().send_notification.side_effect = send_notification
+
+    notification_payload = {
+        'user_uuids': ['user-1', 'user-2'],
+        'notification_type': sentinel.notification_type,
+        'title': sentinel.title,
+        'body': sentinel.body,
+        'extra': {'items': {'key': 'value'}},
+    }
+    assert send_notifications(CONFIG, notification_payload) == 2
+    assert mock_service_class.get_external_data.call_count == 2
+    assert sent == [{}, {}]
+    assert notification_payload['extra'] == {'items': {'key': 'value'}}
+
+
+@pytest.fixture
+def bulk_notification() -> dict:
+    return {
+        'user_uuids': ['user-1', 'user-2', 'user-3'],
+        'notification_type': 'custom',
+        'title': 'title',
+        'body': 'body',
+        'extra': {},
+    }
+
+
+def _failing_push(mock_service_class: Mock, errors: dict) -> None:
+    mock_service_class.MULTICAST_MAX_WORKERS = 2
+
+    def get_external_data(config, user_uuid):
+        if error := errors.get(user_uuid):
+            raise error
+        return {}, {}, 'jwt'
+
+    mock_service_class.get_external_data.side_effect = get_external_data
+
+
+@patch.object(send_notifications, 'retry')
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotificationService')
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotification')
+def test_send_notifications_retries_failed_users(
+    mock_push_notification_class: Mock,
+    mock_service_class: Mock,
+    retry: Mock,
+    bulk_notification: dict,
+) -> None:
+    mock_push_notification_class().send_notification.return_value = {'success': True}
+    errors = {
+        'user-2': HookRetry({'error': 'throttled'}, countdown=30),
+        'user-3': Exception('no mobile token'),
+    }
+    _failing_push(mock_service_class, errors)
+
+    assert send_notifications(CONFIG, bulk_notification) == 1
+    retry.assert_called_once_with(
+        args=(CONFIG, bulk_notification | {'user_uuids': ['user-2']}),
+        countdown=30,
+    )
+
+
+@patch.object(send_notifications, 'retry')
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotificationService')
+@patch('wazo_webhookd.plugins.mobile.celery_tasks.PushNotification')
+def test_send_notifications_gives_up_after_max_attempts(
+    mock_push_notification_class: Mock,
+    mock_service_class: Mock,
+    retry: Mock,
+    bulk_notification: dict,
+) -> None:
+    mock_push_notification_class().send_notification.return_value = {'success': True}
+    _failing_push(mock_service_class, {'user-1': HookRetry({'error': 'timeout'})})
+    retry.side_effect = MaxRetriesExceededError()
+
+    assert send_notifications(CONFIG, bulk_notification) == 2
+    retry.assert_called_once_with(
+        args=(CONFIG, bulk_notification | {'user_uuids': ['user-1']}),
+        countdown=1,
+    )
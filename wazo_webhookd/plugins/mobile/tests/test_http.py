@@ -1,4 +1,4 @@
-# Copyright 2023-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -11,7 +11,7 @@ from flask_restful import Api
 from xivo.rest_api_helpers import APIException
 
 from ....rest_api import VERSION
-from ..http import NotificationResource
+from ..http import BulkNotificationResource, NotificationResource
 
 
 @patch('wazo_webhookd.plugins.mobile.http.Tenant')
@@ -93,3 +93,113 @@ def test_post(
         retry=True,
         retry_policy={'max_retries': 1},
     )
+
+
+@patch('wazo_webhookd.plugins.mobile.http.Tenant')
+def test_find_users_filtered_by_uuid(mock_tenant: Mock) -> None:
+    mock_tenant.autodetect.return_value = Mock(uuid='tenant')
+    mock_auth_client = Mock()
+    user = {'uuid': 'a' * 36, 'tenant_uuid': 'tenant'}
+    mock_auth_client.users.list.return_value = {'items': [user]}
+
+    resource = BulkNotificationResource({'auth': {}}, mock_auth_client)  # type: ignore
+    found = resource.find_users({'a' * 36, 'c' * 36})
+
+    assert found == {'a' * 36: user}
+    mock_auth_client.users.list.assert_called_once_with(
+        tenant_uuid='tenant', uuid=f'{"a" * 36},{"c" * 36}', recurse=False, limit=2
+    )
+
+
+@patch('wazo_webhookd.plugins.mobile.http.Tenant')
+def test_find_users_in_batches(mock_tenant: Mock) -> None:
+    mock_tenant.autodetect.return_value = Mock(uuid='tenant')
+    mock_auth_client = Mock()
+    user_uuids = {f'{i:036}' for i in range(150)}
+    mock_auth_client.users.list.side_effect = lambda uuid, **kwargs: {
+        'items': [{'uuid': u, 'tenant_uuid': 'tenant'} for u in uuid.split(',')]
+    }
+
+    resource = BulkNotificationResource({'auth': {}}, mock_auth_client)  # type: ignore
+    found = resource.find_users(user_uuids)
+
+    assert found.keys() == user_uuids
+    limits = [c.kwargs['limit'] for c in mock_auth_client.users.list.call_args_list]
+    assert limits == [100, 50]
+
+
+@patch('wazo_webhookd.plugins.mobile.http.Tenant')
+def test_find_users_other_tenant(mock_tenant: Mock) -> None:
+    mock_tenant.autodetect.return_value = Mock(uuid='tenant')
+    mock_auth_client = Mock()
+    mock_auth_client.users.list.return_value = {
+        'items': [{'uuid': 'c' * 36, 'tenant_uuid': 'other-tenant'}]
+    }
+
+    resource = BulkNotificationResource({'auth': {}}, mock_auth_client)  # type: ignore
+    found = resource.find_users({'c' * 36})
+
+    assert found == {}
+
+
+@patch('wazo_webhookd.plugins.mobile.http.Tenant')
+def test_find_users_error(mock_tenant: Mock) -> None:
+    mock_tenant.autodetect.return_value = Mock(uuid='tenant')
+    mock_auth_client = Mock()
+    error = requests.HTTPError(response=Mock(status_code=401))
+    mock_auth_client.users.list.side_effect = error
+
+    resource = BulkNotificationResource({'auth': {}}, mock_auth_client)  # type: ignore
+    with pytest.raises(APIException):
+        resource.find_users({'c' * 36})
+
+
+@patch('wazo_webhookd.plugins.mobile.http.Tenant')
+@patch('wazo_webhookd.plugins.mobile.http.send_notifications')
+def test_post_bulk(mock_send_notifications: Mock, mock_tenant: Mock, api: Api) -> None:
+    mock_tenant.autodetect.return_value = Mock(uuid='tenant')
+    mock_auth_client = Mock()
+    mock_auth_client.users.list.return_value = {
+        'items': [
+            {'uuid': 'a' * 36, 'enabled': True, 'tenant_uuid': 'tenant'},
+            {'uuid': 'b' * 36, 'enabled': False, 'tenant_uuid': 'tenant'},
+        ]
+    }
+    test_config = {'auth': {}, 'hook_max_attempts': 1}
+    notification = {
+        'notification_type': 'custom',
+        'title': 'title',
+        'body': 'body',
+        'user_uuids': ['a' * 36, 'b' * 36, 'c' * 36, 'a' * 36],
+    }
+
+    with patch.object(BulkNotificationResource, 'method_decorators', []):
+        api.add_resource(
+            BulkNotificationResource,
+            '/mobile/notifications/bulk',
+            resource_class_args=[test_config, mock_auth_client],
+        )
+        client = api.app.test_client()
+        response = client.post(
+            f'/{VERSION}/mobile/notifications/bulk', json=notification
+        )
+
+    assert response.status_code == 200, response.text
+    assert response.json == {
+        'items': [
+            {'user_uuid': 'a' * 36, 'accepted': True, 'reason': None},
+            {'user_uuid': 'b' * 36, 'accepted': False, 'reason': 'disabled-user'},
+            {'user_uuid': 'c' * 36, 'accepted': False, 'reason': 'invalid-user-uuid'},
+        ]
+    }
+    mock_auth_client.users.list.assert_called_once_with(
+        tenant_uuid='tenant',
+        uuid=','.join(['a' * 36, 'b' * 36, 'c' * 36]),
+        recurse=False,
+        limit=3,
+    )
+    mock_send_notifications.apply_async.assert_called_once_with(
+        args=(test_config, dict(notification, user_uuids=['a' * 36], extra={})),
+        retry=True,
+        retry_policy={'max_retries': 0},
+    )
@@ -1,11 +1,11 @@
-# Copyright 2023-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2023-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
-from unittest.mock import Mock, sentinel
+from unittest.mock import Mock, call, sentinel
 
-from ..http import NotificationResource
+from ..http import BulkNotificationResource, NotificationResource
 from ..plugin import Plugin as MobilePlugin
 
 
@@ -18,8 +18,17 @@ def test_load_plugin() -> None:
     }
 
     MobilePlugin().load(dependencies)  # type: ignore
-    mock_api.add_resource.assert_called_once_with(
-        NotificationResource,
-        '/mobile/notifications',
-        resource_class_args=[sentinel.config, sentinel.auth],
+    mock_api.add_resource.assert_has_calls(
+        [
+            call(
+                NotificationResource,
+                '/mobile/notifications',
+                resource_class_args=[sentinel.config, sentinel.auth],
+            ),
+            call(
+                BulkNotificationResource,
+                '/mobile/notifications/bulk',
+                resource_class_args=[sentinel.config, sentinel.auth],
+            ),
+        ]
     )
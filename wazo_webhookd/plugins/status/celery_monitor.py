@@ -0,0 +1,190 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from xivo.status import Status
+
+if TYPE_CHECKING:
+    from celery import Celery
+    from xivo.status import StatusDict
+
+    from wazo_webhookd.types import WebhookdConfigDict
+
+logger = logging.getLogger(__name__)
+
+INSPECT_TIMEOUT = 1.0
+
+
+class CeleryMonitor:
+    """Depth of the Celery queues and load of their workers.
+
+    Inspecting the workers waits for their replies, so a background thread
+    polls the broker and the workers every `monitor_interval` seconds and
+    `GET /status` reports the last poll. A queue fails when its oldest waiting
+    task, or the estimated time to drain its backlog, exceeds its latency
+    budget, or when its workers completed no task since the previous poll
+    while messages were waiting at both polls.
+    """
+
+    def __init__(self, app: Celery, config: WebhookdConfigDict) -> None:
+        celery_config = config['celery']
+        self._app = app
+        self._interval = celery_config['monitor_interval']
+        self._budgets = {celery_config['queue_name']: celery_config['latency_budget']}
+        if priority_queue := celery_config['priority_queue_name']:
+            self._budgets[priority_queue] = celery_config['priority_latency_budget']
+        self._lock = threading.Lock()
+        self._status: dict[str, Any] = {'status': Status.ok, 'queues': {}}
+        self._completed: dict[str, tuple[int, float]] = {}
+        self._messages: dict[str, int] = {}
+        # NOTE: daemon thread, it stops with the process
+        self._thread = threading.Thread(
+            target=self._run, name='celery-monitor', daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def provide_status(self, status: StatusDict) -> None:
+        with self._lock:
+            status['celery'] = dict(self._status)  # type: ignore[assignment]
+
+    def _run(self) -> None:
+        while True:
+            self._update()
+            time.sleep(self._interval)
+
+    def _update(self) -> None:
+        try:
+            result = self.poll()
+        except Exception as e:
+            logger.warning('Cannot inspect the Celery queues: %s', e)
+            result = {'status': Status.fail, 'error': str(e), 'queues': {}}
+        with self._lock:
+            self._status = result
+
+    def poll(self) -> dict[str, Any]:
+        now = time.time()
+        inspect = self._app.control.inspect(timeout=INSPECT_TIMEOUT)
+        active = inspect.active() or {}
+        reserved = inspect.reserved() or {}
+        stats = inspect.stats() or {}
+        worker_queues = {
+            worker: {queue['name'] for queue in queues}
+            for worker, queues in (inspect.active_queues() or {}).items()
+        }
+
+        queues = {}
+        with self._app.connection_for_read() as connection:
+            for name, budget in self._budgets.items():
+                with connection.channel() as channel:
+                    _, messages, consumers = channel.queue_declare(
+                        queue=name, passive=True
+                    )
+                workers = sorted(w for w, q in worker_queues.items() if name in q)
+                queues[name] = self._queue_status(
+                    name,
+                    now,
+                    budget,
+                    messages,
+                    consumers,
+                    {
+                        worker: (
+                            active.get(worker, []),
+                            reserved.get(worker, []),
+                            stats.get(worker, {}),
+                        )
+                        for worker in workers
+                    },
+                )
+
+        failed = any(queue['status'] == Status.fail for queue in queues.values())
+        return {'status': Status.fail if failed else Status.ok, 'queues': queues}
+
+    def _queue_status(
+        self,
+        name: str,
+        now: float,
+        budget: float,
+        messages: int,
+        consumers: int,
+        workers: dict[str, tuple[list[dict], list[dict], dict[str, Any]]],
+    ) -> dict[str, Any]:
+        completed_per_second = 0.0
+        oldest_task_age = None
+        workers_status = {}
+        for worker, (active, reserved, stats) in workers.items():
+            completed_per_second += self._completion_rate(worker, now, stats)
+            for request in reserved:
+                if queued_at := (request.get('kwargs') or {}).get('queued_at'):
+                    age = max(now - queued_at, 0.0)
+                    oldest_task_age = max(oldest_task_age or 0.0, age)
+            workers_status[worker] = _worker_status(active, reserved, stats)
+
+        backlog_seconds = None
+        if not messages:
+            backlog_seconds = 0.0
+        elif completed_per_second:
+            backlog_seconds = round(messages / completed_per_second, 3)
+
+        # NOTE: the prefetched tasks do not tell the age of a stuck queue
+        previous_messages = self._messages.get(name)
+        self._messages[name] = messages
+        stalled = bool(messages and previous_messages and not completed_per_second)
+
+        failed = (
+            bool(messages and not consumers)
+            or stalled
+            or (oldest_task_age or 0.0) > budget
+            or (backlog_seconds or 0.0) > budget
+        )
+        return {
+            'status': Status.fail if failed else Status.ok,
+            'messages': messages,
+            'unacked': sum(len(reserved) for _, reserved, _ in workers.values()),
+            'consumers': consumers,
+            'oldest_task_age': (
+                round(oldest_task_age, 3) if oldest_task_age is not None else None
+            ),
+            'completed_per_second': round(completed_per_second, 3),
+            'backlog_seconds': backlog_seconds,
+            'stalled': stalled,
+            'latency_budget': budget,
+            'workers': workers_status,
+        }
+
+    def _completion_rate(self, worker: str, now: float, stats: dict) -> float:
+        total = sum((stats.get('total') or {}).values())
+        previous = self._completed.get(worker)
+        self._completed[worker] = (total, now)
+        if not previous or now <= previous[1]:
+            return 0.0
+        # NOTE: the count restarts with the worker
+        return max(total - previous[0], 0) / (now - previous[1])
+
+
+def _worker_status(
+    active: list[dict], reserved: list[dict], stats: dict[str, Any]
+) -> dict[str, Any]:
+    pool = stats.get('pool') or {}
+    autoscaler = stats.get('autoscaler') or {}
+    processes = autoscaler.get('current') or len(pool.get('processes') or [])
+    return {
+        'active': len(active),
+        'reserved': len(reserved),
+        'processes': processes,
+        'min_processes': autoscaler.get('min'),
+        'max_processes': autoscaler.get('max', pool.get('max-concurrency')),
+        'utilization': round(len(active) / processes, 3) if processes else 0.0,
+        'saturated': bool(
+            processes
+            and len(active) >= processes
+            and processes >= autoscaler.get('max', processes)
+        ),
+    }
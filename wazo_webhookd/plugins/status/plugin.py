@@ -8,7 +8,10 @@ from typing import TYPE_CHECKING
 from xivo.status import Status
 
 from wazo_webhookd import auth
+from wazo_webhookd.celery import app as celery_app
+from wazo_webhookd.database.registry import registry
 
+from .celery_monitor import CeleryMonitor
 from .http import StatusResource
 
 if TYPE_CHECKING:
@@ -26,6 +29,11 @@ def _provide_master_tenant_status(status: StatusDict) -> None:
         status['master_tenant']['status'] = Status.ok
 
 
+def _provide_database_status(status: StatusDict) -> None:
+    status['database']['status'] = Status.ok
+    status['database']['pools'] = registry.pool_status()
+
+
 class Plugin:
     def load(self, dependencies: PluginDependencyDict) -> None:
         api = dependencies['api']
@@ -34,6 +42,11 @@ class Plugin:
 
         status_aggregator.add_provider(bus_consumer.provide_status)
         status_aggregator.add_provider(_provide_master_tenant_status)
+        status_aggregator.add_provider(_provide_database_status)
+
+        celery_monitor = CeleryMonitor(celery_app, dependencies['config'])
+        celery_monitor.start()
+        status_aggregator.add_provider(celery_monitor.provide_status)
 
         api.add_resource(
             StatusResource, '/status', resource_class_args=[status_aggregator]
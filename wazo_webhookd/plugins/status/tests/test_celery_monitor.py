@@ -0,0 +1,174 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from hamcrest import assert_that, equal_to, has_entries
+from xivo.status import Status
+
+from ..celery_monitor import CeleryMonitor
+
+CONFIG = {
+    'celery': {
+        'queue_name': 'celery-webhookd',
+        'priority_queue_name': 'celery-webhookd-priority',
+        'latency_budget': 300,
+        'priority_latency_budget': 10,
+        'monitor_interval': 15,
+    },
+}
+
+
+@patch('wazo_webhookd.plugins.status.celery_monitor.time.time')
+class TestCeleryMonitor(TestCase):
+    def setUp(self):
+        self.app = MagicMock()
+        self.inspect = self.app.control.inspect.return_value
+        self.inspect.active.return_value = {
+            'webhookd@wazo': [{'kwargs': {}}] * 3,
+            'webhookd-priority@wazo': [],
+        }
+        self.inspect.reserved.return_value = {
+            'webhookd@wazo': [{'kwargs': {'queued_at': 990.0}}, {'kwargs': {}}],
+            'webhookd-priority@wazo': [],
+        }
+        self.inspect.active_queues.return_value = {
+            'webhookd@wazo': [{'name': 'celery-webhookd'}],
+            'webhookd-priority@wazo': [{'name': 'celery-webhookd-priority'}],
+        }
+        self.stats({'webhookd@wazo': 100, 'webhookd-priority@wazo': 10})
+        self.depths = {'celery-webhookd': 200, 'celery-webhookd-priority': 0}
+        channel = self.app.connection_for_read.return_value.__enter__.return_value
+        channel.channel.return_value.__enter__.return_value.queue_declare = (
+            lambda queue, passive: (queue, self.depths[queue], 1)
+        )
+        self.monitor = CeleryMonitor(self.app, CONFIG)  # type: ignore
+
+    def stats(self, totals):
+        self.inspect.stats.return_value = {
+            worker: {
+                'total': {'hook_runner_task': total},
+                'pool': {'max-concurrency': 5, 'processes': [1, 2, 3]},
+                'autoscaler': {'min': 3, 'max': 5, 'current': 3},
+            }
+            for worker, total in totals.items()
+        }
+
+    def test_queue_depth_and_workers(self, now):
+        now.return_value = 1000.0
+        self.monitor.poll()
+        self.stats({'webhookd@wazo': 120, 'webhookd-priority@wazo': 10})
+        now.return_value = 1010.0
+
+        result = self.monitor.poll()
+
+        assert_that(result['status'], equal_to(Status.ok))
+        assert_that(
+            result['queues']['celery-webhookd'],
+            has_entries(
+                status=Status.ok,
+                messages=200,
+                unacked=2,
+                consumers=1,
+                oldest_task_age=20.0,
+                completed_per_second=2.0,
+                backlog_seconds=100.0,
+                workers={
+                    'webhookd@wazo': {
+                        'active': 3,
+                        'reserved': 2,
+                        'processes': 3,
+                        'min_processes': 3,
+                        'max_processes': 5,
+                        'utilization': 1.0,
+                        'saturated': False,
+                    }
+                },
+            ),
+        )
+        assert_that(
+            result['queues']['celery-webhookd-priority'],
+            has_entries(status=Status.ok, messages=0, backlog_seconds=0.0),
+        )
+
+    def test_fail_when_the_oldest_task_exceeds_the_budget(self, now):
+        now.return_value = 1300.0
+
+        result = self.monitor.poll()
+
+        assert_that(result['status'], equal_to(Status.fail))
+        assert_that(
+            result['queues']['celery-webhookd'],
+            has_entries(status=Status.fail, oldest_task_age=310.0),
+        )
+
+    def test_fail_when_the_backlog_exceeds_the_budget(self, now):
+        now.return_value = 1000.0
+        self.monitor.poll()
+        self.depths['celery-webhookd-priority'] = 100
+        self.stats({'webhookd@wazo': 100, 'webhookd-priority@wazo': 15})
+        now.return_value = 1010.0
+
+        result = self.monitor.poll()
+
+        assert_that(
+            result['queues']['celery-webhookd-priority'],
+            has_entries(status=Status.fail, backlog_seconds=200.0),
+        )
+
+    def test_fail_when_the_workers_make_no_progress(self, now):
+        now.return_value = 1000.0
+        self.monitor.poll()
+        now.return_value = 1010.0
+
+        result = self.monitor.poll()
+
+        assert_that(
+            result['queues']['celery-webhookd'],
+            has_entries(
+                status=Status.fail,
+                completed_per_second=0.0,
+                backlog_seconds=None,
+                stalled=True,
+            ),
+        )
+
+    def test_first_poll_not_stalled(self, now):
+        now.return_value = 1000.0
+
+        result = self.monitor.poll()
+
+        assert_that(
+            result['queues']['celery-webhookd'],
+            has_entries(status=Status.ok, backlog_seconds=None, stalled=False),
+        )
+
+    def test_new_backlog_not_stalled(self, now):
+        now.return_value = 1000.0
+        self.depths['celery-webhookd'] = 0
+        self.monitor.poll()
+        self.depths['celery-webhookd'] = 200
+        now.return_value = 1010.0
+
+        result = self.monitor.poll()
+
+        assert_that(
+            result['queues']['celery-webhookd'],
+            has_entries(status=Status.ok, stalled=False),
+        )
+
+    def test_status_reports_inspection_errors(self, now):
+        now.return_value = 1000.0
+        self.app.connection_for_read.side_effect = OSError('connection refused')
+        status = {}
+
+        self.monitor._update()
+        self.monitor.provide_status(status)
+
+        assert_that(
+            status['celery'],
+            equal_to(
+                {'status': Status.fail, 'error': 'connection refused', 'queues': {}}
+            ),
+        )
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import logging
+import time
 import uuid
 from collections.abc import Callable
 from functools import partial
@@ -14,7 +15,12 @@ import kombu.exceptions
 
 from wazo_webhookd.auth import master_tenant_uuid
 
-from .celery_tasks import hook_runner_task
+from ... import timeline
+from ...bus import current_message_id, current_message_redelivered
+from ...metrics import metrics
+from .celery_tasks import hook_multicast_task, hook_runner_task
+from .coalescer import CALL_EVENT, CANCEL_CALL_EVENT, call_coalescer, call_key
+from .lanes import DEFAULT_LANE, event_lane, lane_options
 from .schema import subscription_schema
 
 if TYPE_CHECKING:
@@ -38,8 +44,12 @@ SubscriptionCallbackRow = tuple[
     SubscriptionCallback | None, list[str], SubscriptionHeaders
 ]
 
+MulticastKey = tuple[str, str, frozenset[tuple[str, Any]]]
+
 EMPTY_SUBSCRIPTION_CALLBACK: SubscriptionCallbackRow = None, [], {}
 
+MULTICAST_BATCH_SIZE = 500
+
 
 class SubscriptionBusEventHandler:
     def __init__(
@@ -51,13 +61,20 @@ class SubscriptionBusEventHandler:
     ) -> None:
         self._bus_consumer = bus_consumer
         self._subscription_callbacks: dict[str, SubscriptionCallbackRow] = {}
+        # NOTE: subscriptions receiving the same event with the same headers,
+        # e.g. all the mobile subscriptions of a tenant, are run in one task
+        self._multicast_groups: dict[MulticastKey, dict[str, Subscription]] = {}
+        self._multicast_callbacks: dict[MulticastKey, SubscriptionCallback] = {}
+        self._multicast_keys: dict[str, list[MulticastKey]] = {}
         self._lock = Lock()
         self._config = config
         self._service = subscription_service
         self._service.pubsub.subscribe('created', self.on_subscription_created)
         self._service.pubsub.subscribe('updated', self.on_subscription_updated)
         self._service.pubsub.subscribe('deleted', self.on_subscription_deleted)
+        self._service.pubsub.subscribe('deleted_many', self.on_subscriptions_deleted)
         self._service_manager = service_manager
+        call_coalescer.configure(config.get('hook_call_coalescing_window', 0))
 
     def subscribe(self) -> None:
         for subscription in self._service.list():
@@ -72,6 +89,9 @@ class SubscriptionBusEventHandler:
     def on_subscription_deleted(self, subscription: Subscription) -> None:
         self._unregister(subscription)
 
+    def on_subscriptions_deleted(self, subscriptions: list[Subscription]) -> None:
+        self._unregister_many(subscriptions)
+
     @staticmethod
     def _build_headers(subscription: Subscription) -> SubscriptionHeaders:
         headers: SubscriptionHeaders = {
@@ -89,20 +109,37 @@ class SubscriptionBusEventHandler:
             headers.update(origin_uuid=str(wazo_uuid))
         return headers
 
+    def _split_events(self, subscription: Subscription) -> tuple[list[str], list[str]]:
+        multicast_events = self._multicast_events(subscription.service)
+        unicast, multicast = [], []
+        for event in subscription.events:
+            (multicast if event in multicast_events else unicast).append(event)
+        return unicast, multicast
+
+    def _multicast_events(self, service_name: str) -> set[str]:
+        try:
+            service: Extension = self._service_manager[service_name]
+        except KeyError:
+            return set()
+        return set(getattr(service.plugin, 'MULTICAST_EVENTS', ()))
+
     def _register(self, subscription: Subscription):
         uuid = subscription.uuid
         data = subscription_schema.dump(subscription)
+        unicast_events, multicast_events = self._split_events(subscription)
 
         with self._lock:
             fn, events, extra_headers = self._subscription_callbacks[uuid] = (
                 partial(self._callback, data),
-                subscription.events,
+                unicast_events,
                 self._build_headers(subscription),
             )
 
         for event in events:
             headers = self._handle_tenant_events(event, extra_headers)
             self._bus_consumer.subscribe(event, fn, headers=headers)
+        for event in multicast_events:
+            self._join_multicast(event, data, extra_headers)
 
     def _unregister(self, subscription):
         uuid = subscription.uuid
@@ -113,21 +150,40 @@ class SubscriptionBusEventHandler:
 
         for event in events:
             self._bus_consumer.unsubscribe(event, fn)
+        self._leave_multicast(uuid)
+
+    def _unregister_many(self, subscriptions: list[Subscription]):
+        with self._lock:
+            callbacks = [
+                self._subscription_callbacks.pop(
+                    subscription.uuid, EMPTY_SUBSCRIPTION_CALLBACK
+                )
+                for subscription in subscriptions
+            ]
+
+        # NOTE: each subscription has its own bindings (see _build_headers) and
+        # AMQP has no bulk unbind, so the bindings are removed one by one
+        for fn, events, _ in callbacks:
+            for event in events:
+                self._bus_consumer.unsubscribe(event, fn)
+        for subscription in subscriptions:
+            self._leave_multicast(subscription.uuid)
 
     def _update(self, subscription: Subscription):
         uuid = subscription.uuid
         data = subscription_schema.dump(subscription)
         headers = self._build_headers(subscription)
         fn = partial(self._callback, data)
+        events, multicast_events = self._split_events(subscription)
 
         with self._lock:
             prev_fn, prev_events, prev_headers = self._subscription_callbacks.pop(uuid)
 
-        all_events = set(subscription.events) | set(prev_events)
+        all_events = set(events) | set(prev_events)
 
         for event in all_events:
             headers = self._handle_tenant_events(event, headers)
-            if event not in subscription.events:  # removed events
+            if event not in events:  # removed events
                 self._bus_consumer.unsubscribe(event, prev_fn)
             elif event not in prev_events:  # newly added event
                 self._bus_consumer.subscribe(event, fn, headers=headers)
@@ -139,9 +195,46 @@ class SubscriptionBusEventHandler:
                 self._bus_consumer.subscribe(event, fn, headers=headers)
 
         with self._lock:
-            self._subscription_callbacks[uuid] = (fn, subscription.events, headers)
+            self._subscription_callbacks[uuid] = (fn, events, headers)
 
-    def _callback(self, subscription: Subscription, payload: dict[str, Any]) -> None:
+        self._leave_multicast(uuid)
+        for event in multicast_events:
+            self._join_multicast(event, data, self._build_headers(subscription))
+
+    def _join_multicast(
+        self, event: str, subscription: Subscription, headers: SubscriptionHeaders
+    ) -> None:
+        headers = self._handle_tenant_events(event, headers).copy()
+        headers.pop('x-subscription', None)
+        key = (subscription['service'], event, frozenset(headers.items()))
+
+        with self._lock:
+            new_group = key not in self._multicast_groups
+            if new_group:
+                self._multicast_groups[key] = {}
+                self._multicast_callbacks[key] = partial(self._multicast_callback, key)
+            self._multicast_groups[key][subscription['uuid']] = subscription
+            self._multicast_keys.setdefault(subscription['uuid'], []).append(key)
+            fn = self._multicast_callbacks[key]
+
+        if new_group:
+            self._bus_consumer.subscribe(event, fn, headers=headers)
+
+    def _leave_multicast(self, subscription_uuid) -> None:
+        subscription_uuid = str(subscription_uuid)
+        emptied: list[tuple[str, SubscriptionCallback]] = []
+        with self._lock:
+            for key in self._multicast_keys.pop(subscription_uuid, []):
+                members = self._multicast_groups[key]
+                members.pop(subscription_uuid, None)
+                if not members:
+                    del self._multicast_groups[key]
+                    emptied.append((key[1], self._multicast_callbacks.pop(key)))
+
+        for event, fn in emptied:
+            self._bus_consumer.unsubscribe(event, fn)
+
+    def _entry_point_name(self, subscription: Subscription) -> str | None:
         try:
             service: Extension = self._service_manager[subscription['service']]
         except KeyError:
@@ -150,14 +243,46 @@ class SubscriptionBusEventHandler:
                 subscription['service'],
                 subscription['name'],
             )
+            return None
+
+        entry_point: EntryPoint = service.entry_point
+        return f'{entry_point.module}:{entry_point.attr}'
+
+    def _multicast_callback(self, key: MulticastKey, payload: dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._multicast_groups.get(key, {}).values())
+        if not subscriptions:
+            return
+        if not (entry_point_name := self._entry_point_name(subscriptions[0])):
+            return
+
+        config = dict(self._config)
+        for i in range(0, len(subscriptions), MULTICAST_BATCH_SIZE):
+            batch = subscriptions[i : i + MULTICAST_BATCH_SIZE]
+            hook_multicast_task.delay(
+                entry_point_name,
+                config,
+                batch,
+                payload,
+                queued_at=time.time(),
+                received_at=timeline.get('received'),
+                message_id=current_message_id(),
+                redelivered=current_message_redelivered(),
+            )
+            metrics.inc(
+                'webhookd_tasks_enqueued_total',
+                {'service': subscriptions[0]['service'], 'lane': DEFAULT_LANE},
+            )
+
+    def _callback(self, subscription: Subscription, payload: dict[str, Any]) -> None:
+        if not (entry_point_name := self._entry_point_name(subscription)):
+            return
+        if self._coalesce(subscription, payload):
             return
 
         try:
             hook_uuid = str(uuid.uuid4())
 
-            entry_point: EntryPoint = service.entry_point
-            entry_point_name = f'{entry_point.module}:{entry_point.attr}'
-
             task_args = (
                 hook_uuid,
                 entry_point_name,
@@ -165,7 +290,25 @@ class SubscriptionBusEventHandler:
                 subscription,
                 payload,
             )
-            hook_runner_task.delay(*task_args)
+            event_name = payload.get('name', '')
+            lane = event_lane(self._config, event_name)
+            # NOTE: no broker TTL, the worker drops the expired hooks so that
+            # they are logged and counted, see expired_detail
+            options = lane_options(self._config, lane)
+            hook_runner_task.apply_async(
+                task_args,
+                {
+                    'queued_at': time.time(),
+                    'received_at': timeline.get('received'),
+                    'message_id': current_message_id(),
+                    'redelivered': current_message_redelivered(),
+                },
+                **options,
+            )
+            metrics.inc(
+                'webhookd_tasks_enqueued_total',
+                {'service': subscription['service'], 'lane': lane},
+            )
         except kombu.exceptions.OperationalError:
             # NOTE(sileht): That's not perfect in real life, because if celery
             # lose the connection, we have a good chance that our bus lose it
@@ -178,6 +321,23 @@ class SubscriptionBusEventHandler:
             # NOTE(sileht): If we have a programming error, don't retry forever
             raise
 
+    def _coalesce(self, subscription: Subscription, payload: dict[str, Any]) -> bool:
+        if not (key := call_key(subscription, payload)):
+            return False
+        event_name = payload.get('name')
+        if event_name == CALL_EVENT:
+            # NOTE: recorded before the task is sent, so a worker can not start
+            # sending the push before it is known as queued
+            call_coalescer.queued(key)
+        elif event_name == CANCEL_CALL_EVENT and call_coalescer.cancel(key):
+            logger.info('Call %s cancelled before its push was sent, dropping', key)
+            metrics.inc(
+                'webhookd_hooks_coalesced_total',
+                {'service': subscription['service'], 'event': event_name},
+            )
+            return True
+        return False
+
     def _handle_tenant_events(
         self, event_name: str, headers: SubscriptionHeaders
     ) -> SubscriptionHeaders:
@@ -5,15 +5,23 @@ from __future__ import annotations
 
 import datetime
 import logging
+import time
+import uuid
 from importlib import import_module
 from typing import TYPE_CHECKING, Any
 
 import celery
 
+from wazo_webhookd import timeline
 from wazo_webhookd.bus import BusPublisher
 from wazo_webhookd.celery import app
+from wazo_webhookd.metrics import metrics
 from wazo_webhookd.services.helpers import HookExpectedError, HookRetry
 
+from . import idempotency
+from .coalescer import CALL_EVENT, call_coalescer, call_key
+from .lanes import DEFAULT_LANE, event_lane, event_ttl, queue_latencies
+from .log_policy import LogPolicy
 from .notifier import SubscriptionNotifier
 from .service import SubscriptionService
 
@@ -34,6 +42,36 @@ def truncated(detail: Any) -> str:
     return detail
 
 
+def expiry_deadline(
+    config: WebhookdConfigDict, event_name: str, queued_at: float | None
+) -> float | None:
+    if queued_at and (ttl := event_ttl(config, event_name)):
+        return queued_at + ttl
+    return None
+
+
+def expired_detail(
+    config: WebhookdConfigDict, event_name: str, queued_at: float | None
+) -> dict[str, Any] | None:
+    if not queued_at or not (ttl := event_ttl(config, event_name)):
+        return None
+    age = time.time() - queued_at
+    if age <= ttl:
+        return None
+    return {'error': 'event expired', 'ttl': ttl, 'age': round(age, 3)}
+
+
+def with_timings(detail: Any, labels: dict[str, str], branch: str | None = None) -> Any:
+    timings = timeline.stop(branch)
+    for stage, seconds in timings.items():
+        metrics.observe(
+            'webhookd_hook_stage_seconds', seconds, dict(labels, stage=stage)
+        )
+    if isinstance(detail, dict):
+        return dict(detail, timings=timings)
+    return detail
+
+
 class ServiceTask(celery.Task):
     _service: SubscriptionService | None = None
 
@@ -55,6 +93,10 @@ def hook_runner_task(
     config: WebhookdConfigDict,
     subscription: Subscription,
     event: dict[str, Any],
+    queued_at: float | None = None,
+    received_at: float | None = None,
+    message_id: str | None = None,
+    redelivered: bool = False,
 ) -> None:
     task.max_retries = config["hook_max_attempts"] - 1
     service = task.get_service(config)
@@ -68,13 +110,93 @@ def hook_runner_task(
     except KeyError:
         event_name = '<unknown>'
 
+    lane = event_lane(config, event_name)
+    log_policy = LogPolicy.from_config(config, subscription)
+    # NOTE: retries wait for their countdown, only the first attempt is measured
+    first_attempt = not task.request.retries
+    if queued_at and first_attempt:
+        queue_latencies.observe(lane, time.time() - queued_at)
+    timeline.start(
+        received=received_at if first_attempt else None,
+        enqueued=queued_at if first_attempt else None,
+        dequeued=time.time(),
+    )
+
+    if expired := expired_detail(config, event_name, queued_at):
+        logger.warning(
+            "Hook `%s/%s` (%s) dropped: %s", ep_name, hook_uuid, event_name, expired
+        )
+        queue_latencies.expire(lane)
+        now = datetime.datetime.utcnow()
+        service.create_hook_log(
+            hook_uuid,
+            subscription["uuid"],
+            "expired",
+            task.request.retries + 1,
+            config["hook_max_attempts"],
+            now,
+            now,
+            event,
+            log_policy.trim(expired),
+            stored=log_policy.stored("expired"),
+        )
+        return
+
+    if (
+        event_name == CALL_EVENT
+        and (key := call_key(subscription, event))
+        and not call_coalescer.start(key)
+    ):
+        logger.info(
+            "Hook `%s/%s` (%s) dropped: call %s cancelled before the push was sent",
+            ep_name,
+            hook_uuid,
+            event_name,
+            key,
+        )
+        metrics.inc(
+            'webhookd_hooks_coalesced_total',
+            {'service': subscription['service'], 'event': event_name},
+        )
+        return
+
+    deadline = expiry_deadline(config, event_name, queued_at)
+    labels = {'service': subscription['service']}
+    key = idempotency.idempotency_key(message_id, subscription["uuid"])
+    # NOTE: only a message delivered again by RabbitMQ can be a duplicate
+    if key and redelivered and service.delivered([key]):
+        logger.info(
+            "Hook `%s/%s` (%s) dropped: already delivered with key %s",
+            ep_name,
+            hook_uuid,
+            event_name,
+            key,
+        )
+        metrics.inc('webhookd_hooks_deduplicated_total', labels)
+        return
+
     started = datetime.datetime.utcnow()
     try:
-        detail = hook.run(task, config, subscription, event)
+        # NOTE: without bus message, the key is the same for the retries only
+        with idempotency.delivering(key or hook_uuid), metrics.time(
+            'webhookd_hook_duration_seconds', labels
+        ):
+            detail = hook.run(task, config, subscription, event)
     except HookRetry as e:
+        if e.countdown is not None:
+            retry_backoff = e.countdown
+        else:
+            base = config["hook_http_retry_countdown_factor"]
+            retry_backoff = int(base**task.request.retries)
+
         if task.request.retries + 1 >= config["hook_max_attempts"]:
             verb = "reached max attempts"
             status = "error"
+            metrics.inc('webhookd_hook_errors_total', dict(labels, error='HookRetry'))
+        elif deadline and time.time() + retry_backoff > deadline:
+            verb = "expires before its next attempt"
+            status = "expired"
+            queue_latencies.expire(lane)
         else:
             verb = "will retry"
             status = "failure"
@@ -98,16 +220,16 @@ def hook_runner_task(
             started,
             ended,
             event,
-            e.detail,
+            log_policy.trim(with_timings(e.detail, labels)),
+            stored=log_policy.stored(status),
         )
 
-        if task.request.retries + 1 >= config["hook_max_attempts"]:
+        if status != "failure":
             return
-
-        base = config["hook_http_retry_countdown_factor"]
-        retry_backoff = int(base**task.request.retries)
+        metrics.inc('webhookd_hook_retries_total', labels)
         task.retry(countdown=retry_backoff)
     except Exception as e:
+        metrics.inc('webhookd_hook_errors_total', dict(labels, error=type(e).__name__))
         if isinstance(e, HookExpectedError):
             detail = e.detail
             logger.error(
@@ -138,7 +260,8 @@ def hook_runner_task(
             started,
             ended,
             event,
-            detail,
+            log_policy.trim(with_timings(detail, labels)),
+            stored=log_policy.stored("error"),
         )
 
     else:
@@ -159,5 +282,168 @@ def hook_runner_task(
             started,
             ended,
             event,
-            detail or {},
+            log_policy.trim(with_timings(detail or {}, labels)),
+            stored=log_policy.stored("success"),
+            idempotency_key=key,
+        )
+
+
+@app.task(base=ServiceTask, bind=True)
+def hook_multicast_task(
+    task: ServiceTask,
+    ep_name: str,
+    config: WebhookdConfigDict,
+    subscriptions: list[Subscription],
+    event: dict[str, Any],
+    queued_at: float | None = None,
+    received_at: float | None = None,
+    message_id: str | None = None,
+    redelivered: bool = False,
+) -> None:
+    """Run one event for many subscriptions of a service supporting it.
+
+    The service returns the result of each subscription. Subscriptions to
+    retry are rescheduled individually with hook_runner_task.
+    """
+    service = task.get_service(config)
+    module_name, attr_name = ep_name.split(':', 1)
+    hook = getattr(import_module(module_name), attr_name)
+    event_name = event.get('name', '<unknown>')
+    if queued_at:
+        queue_latencies.observe(DEFAULT_LANE, time.time() - queued_at)
+    # NOTE: the service continues the timeline of each subscription in a branch
+    timeline.start(received=received_at, enqueued=queued_at, dequeued=time.time())
+    logger.info(
+        "running hook %s for %d subscriptions for event: %s",
+        ep_name,
+        len(subscriptions),
+        event,
+    )
+
+    max_attempts = config["hook_max_attempts"]
+    if expired := expired_detail(config, event_name, queued_at):
+        logger.warning("Hook `%s` (%s) dropped: %s", ep_name, event_name, expired)
+        now = datetime.datetime.utcnow()
+        hook_logs, counted_only = [], []
+        for subscription in subscriptions:
+            queue_latencies.expire(DEFAULT_LANE)
+            log_policy = LogPolicy.from_config(config, subscription)
+            (hook_logs if log_policy.stored("expired") else counted_only).append(
+                {
+                    'uuid': str(uuid.uuid4()),
+                    'subscription_uuid': subscription["uuid"],
+                    'status': "expired",
+                    'attempts': 1,
+                    'max_attempts': max_attempts,
+                    'started_at': now,
+                    'ended_at': now,
+                    'event': event,
+                    'detail': log_policy.trim(expired),
+                }
+            )
+        service.create_hook_logs(hook_logs, counted_only=counted_only)
+        timeline.stop()
+        return
+
+    keys = {}
+    if message_id:
+        keys = {
+            s["uuid"]: idempotency.idempotency_key(message_id, s["uuid"])
+            for s in subscriptions
+        }
+    if keys and redelivered:
+        delivered = service.delivered(keys.values())
+        if delivered:
+            logger.info(
+                "Hook `%s` (%s) already delivered to %d subscriptions",
+                ep_name,
+                event_name,
+                len(delivered),
+            )
+            for subscription in subscriptions:
+                if keys[subscription["uuid"]] in delivered:
+                    metrics.inc(
+                        'webhookd_hooks_deduplicated_total',
+                        {'service': subscription['service']},
+                    )
+            subscriptions = [
+                s for s in subscriptions if keys[s["uuid"]] not in delivered
+            ]
+            if not subscriptions:
+                timeline.stop()
+                return
+
+    started = datetime.datetime.utcnow()
+    try:
+        results = hook.run_multicast(task, config, subscriptions, event)
+    except Exception as e:
+        results = [e] * len(subscriptions)
+    ended = datetime.datetime.utcnow()
+
+    hook_logs, counted_only = [], []
+    for subscription, result in zip(subscriptions, results):
+        hook_uuid = str(uuid.uuid4())
+        labels = {'service': subscription['service']}
+        if isinstance(result, Exception):
+            error = type(result).__name__
+            metrics.inc('webhookd_hook_errors_total', dict(labels, error=error))
+        if isinstance(result, HookRetry) and max_attempts > 1:
+            status, detail = "failure", result.detail
+            logger.error(
+                "Hook `%s/%s` (%s) will retry (1/%s): %s",
+                ep_name,
+                hook_uuid,
+                event_name,
+                max_attempts,
+                truncated(detail),
+            )
+            # NOTE: the first attempt is done, same backoff as hook_runner_task
+            countdown = 1 if result.countdown is None else result.countdown
+            metrics.inc('webhookd_hook_retries_total', labels)
+            hook_runner_task.apply_async(
+                (hook_uuid, ep_name, config, subscription, event),
+                {'queued_at': queued_at, 'message_id': message_id},
+                countdown=countdown,
+                retries=1,
+            )
+        elif isinstance(result, (HookRetry, HookExpectedError)):
+            status, detail = "error", result.detail
+            logger.error(
+                "Hook `%s/%s` (%s) failure: %s",
+                ep_name,
+                hook_uuid,
+                event_name,
+                truncated(detail),
+            )
+        elif isinstance(result, Exception):
+            status, detail = "error", {'error': str(result)}
+            logger.error(
+                "Hook `%s/%s` (%s) error: %s",
+                ep_name,
+                hook_uuid,
+                event_name,
+                truncated(detail),
+                exc_info=result,
+            )
+        else:
+            status, detail = "success", result or {}
+        log_policy = LogPolicy.from_config(config, subscription)
+        (hook_logs if log_policy.stored(status) else counted_only).append(
+            {
+                'uuid': hook_uuid,
+                'subscription_uuid': subscription["uuid"],
+                'status': status,
+                'attempts': 1,
+                'max_attempts': max_attempts,
+                'started_at': started,
+                'ended_at': ended,
+                'event': event,
+                'detail': log_policy.trim(
+                    with_timings(detail, labels, subscription["uuid"])
+                ),
+            }
         )
+    timeline.stop()
+    service.create_hook_logs(
+        hook_logs, counted_only=counted_only, idempotency_keys=keys
+    )
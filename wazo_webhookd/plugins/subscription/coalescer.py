@@ -0,0 +1,117 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+import zlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from ...database.models import Subscription
+
+logger = logging.getLogger(__name__)
+
+CALL_EVENT = 'call_push_notification'
+CANCEL_CALL_EVENT = 'call_cancel_push_notification'
+COALESCER_SLOTS = 4096
+COALESCING_WINDOW = 60
+
+_FINGERPRINT, _STATE, _UPDATED_AT = range(3)
+_EMPTY, _QUEUED, _SENT, _CANCELLED = range(4)
+
+
+def call_key(subscription: Subscription, event: dict[str, Any]) -> str | None:
+    data = event.get('data') or {}
+    if not (call_id := data.get('call_id')):
+        return None
+    return f'{subscription["uuid"]}:{call_id}'
+
+
+class CallCoalescer:
+    """Incoming call pushes still queued when their call is cancelled.
+
+    The bus handler records each queued call push. When the cancel push of a
+    call arrives while its call push is still queued, the cancel is not sent
+    and the worker drops the call push, so the phone never rings for a call
+    that is already gone. Once a worker started sending the call push, the
+    cancel push is sent as usual.
+
+    Calls are hashed into a fixed number of slots allocated in shared memory
+    before the Celery workers are forked. A call that finds its slot used by
+    another recent call is not tracked and is never coalesced.
+    """
+
+    def __init__(
+        self, slots: int = COALESCER_SLOTS, window: float = COALESCING_WINDOW
+    ) -> None:
+        self._slots = slots
+        self._window = window
+        # NOTE: the last value counts the coalesced calls
+        self._state = multiprocessing.Array('d', slots * 3 + 1)
+
+    def configure(self, window: float) -> None:
+        self._window = window
+
+    def queued(self, key: str) -> None:
+        if not self._window:
+            return
+        offset, fingerprint = self._slot(key)
+        with self._state.get_lock():
+            now = time.monotonic()
+            if self._state[offset + _FINGERPRINT] != fingerprint and self._is_live(
+                offset, now
+            ):
+                logger.debug('Not coalescing call %s, slot in use', key)
+                return
+            self._state[offset + _FINGERPRINT] = fingerprint
+            self._state[offset + _STATE] = _QUEUED
+            self._state[offset + _UPDATED_AT] = now
+
+    def cancel(self, key: str) -> bool:
+        """Return True when the cancel must not be sent"""
+        offset, fingerprint = self._slot(key)
+        with self._state.get_lock():
+            if (
+                self._state[offset + _FINGERPRINT] != fingerprint
+                or self._state[offset + _STATE] != _QUEUED
+                or not self._is_live(offset, time.monotonic())
+            ):
+                return False
+            self._state[offset + _STATE] = _CANCELLED
+            self._state[-1] += 1
+        return True
+
+    def start(self, key: str) -> bool:
+        """Return False when the call push must not be sent"""
+        offset, fingerprint = self._slot(key)
+        with self._state.get_lock():
+            if self._state[offset + _FINGERPRINT] != fingerprint:
+                return True
+            if self._state[offset + _STATE] == _CANCELLED:
+                self._state[offset + _STATE] = _EMPTY
+                return False
+            self._state[offset + _STATE] = _SENT
+        return True
+
+    def coalesced(self) -> int:
+        return int(self._state[-1])
+
+    def _is_live(self, offset: int, now: float) -> bool:
+        return (
+            self._state[offset + _STATE] in (_QUEUED, _CANCELLED)
+            and now - self._state[offset + _UPDATED_AT] < self._window
+        )
+
+    def _slot(self, key: str) -> tuple[int, int]:
+        encoded = key.encode()
+        offset = zlib.crc32(encoded) % self._slots * 3
+        # NOTE: a second hash tells apart the calls sharing a slot
+        return offset, zlib.adler32(encoded)
+
+
+# NOTE: must be created before the Celery workers are forked, which is the
+# case when the subscription celery tasks are loaded
+call_coalescer = CallCoalescer()
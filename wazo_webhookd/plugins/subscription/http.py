@@ -13,13 +13,18 @@ from xivo.tenant_flask_helpers import Tenant, token
 from wazo_webhookd.rest_api import AuthResource
 
 from .schema import (
+    StatsDict,
     SubscriptionDict,
     SubscriptionLogDict,
     SubscriptionLogRequestSchema,
     UserSubscriptionDict,
+    stats_bucket_schema,
+    stats_schema,
     subscription_list_params_schema,
     subscription_log_schema,
     subscription_schema,
+    subscription_stats_request_schema,
+    subscription_stats_schema,
     user_subscription_schema,
 )
 
@@ -45,6 +50,11 @@ class UserSubscriptionListResponseDict(TypedDict):
     total: int
 
 
+class StatsResponseDict(TypedDict):
+    items: list[dict]
+    summary: StatsDict
+
+
 class SubscriptionsAuthResource(AuthResource):
     def __init__(self, service: SubscriptionService) -> None:
         super().__init__()
@@ -178,3 +188,37 @@ class SubscriptionLogsResource(SubscriptionsAuthResource):
             'items': subscription_log_schema.dump(results, many=True),
             'total': len(results),
         }
+
+
+class SubscriptionStatsResource(SubscriptionsAuthResource):
+    @required_acl('webhookd.subscriptions.{subscription_uuid}.stats.read')
+    def get(self, subscription_uuid: str) -> StatsResponseDict:
+        # NOTE: to return 404 if the subscription doesn't exist
+        self._service.get(subscription_uuid, self.visible_tenants())
+
+        params = subscription_stats_request_schema.load(request.args)
+        result = self._service.get_stats(
+            subscription_uuid,
+            params['from_date'],
+            params['until_date'],
+            params['interval'],
+        )
+        return {
+            'items': stats_bucket_schema.dump(result['items'], many=True),
+            'summary': stats_schema.dump(result['total']),
+        }
+
+
+class SubscriptionsStatsResource(SubscriptionsAuthResource):
+    @required_acl('webhookd.subscriptions.stats.read')
+    def get(self) -> StatsResponseDict:
+        params = subscription_stats_request_schema.load(request.args)
+        result = self._service.get_tenant_stats(
+            self.visible_tenants(params['recurse']),
+            params['from_date'],
+            params['until_date'],
+        )
+        return {
+            'items': subscription_stats_schema.dump(result['items'], many=True),
+            'summary': stats_schema.dump(result['total']),
+        }
@@ -0,0 +1,87 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import datetime
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from wazo_webhookd.database.models import SubscriptionDelivery
+
+HEADER = 'Idempotency-Key'
+SEEN_KEYS = 10000
+
+_NAMESPACE = uuid.UUID('9c1c5e3a-6f0d-4d36-9a55-1f0b8e6c2d47')
+_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+_local = threading.local()
+
+
+def idempotency_key(message_id: str | None, subscription_uuid: str) -> str | None:
+    """Same key for each delivery of a bus message to a subscription"""
+    if not message_id:
+        return None
+    return str(uuid.uuid5(_NAMESPACE, f'{message_id}:{subscription_uuid}'))
+
+
+def record(dialect: str, keys: dict[str, str]):
+    """Insert the idempotency keys of delivered hooks, by subscription uuid,
+    ignoring the keys already delivered by another worker"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows: list[dict[str, Any]] = [
+        {'idempotency_key': key, 'subscription_uuid': uuid_, 'delivered_at': now}
+        for uuid_, key in keys.items()
+    ]
+    statement = _INSERTS[dialect](SubscriptionDelivery.__table__).values(rows)
+    return statement.on_conflict_do_nothing(index_elements=['idempotency_key'])
+
+
+@contextmanager
+def delivering(key: str | None) -> Iterator[None]:
+    """Make the idempotency key of the hook run by the current thread available
+    to the service sending it"""
+    _local.key = key
+    try:
+        yield
+    finally:
+        _local.key = None
+
+
+def current_key() -> str | None:
+    return getattr(_local, 'key', None)
+
+
+class SeenKeys:
+    """Idempotency keys of the last hooks delivered by this process.
+
+    Checked before the database, which knows the keys delivered by every
+    worker, including before a restart.
+    """
+
+    def __init__(self, size: int = SEEN_KEYS) -> None:
+        self._size = size
+        self._keys: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._keys:
+                return False
+            self._keys.move_to_end(key)
+            return True
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            if len(self._keys) > self._size:
+                self._keys.popitem(last=False)
+
+
+seen_keys = SeenKeys()
@@ -0,0 +1,88 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import multiprocessing
+from typing import TYPE_CHECKING, Any, TypedDict
+
+if TYPE_CHECKING:
+    from ...types import WebhookdConfigDict
+
+DEFAULT_LANE = 'default'
+PRIORITY_LANE = 'priority'
+LANES = (DEFAULT_LANE, PRIORITY_LANE)
+
+
+_TASKS, _TOTAL, _MAX, _EXPIRED = range(4)
+_VALUES = 4
+
+
+class QueueLatencyDict(TypedDict):
+    tasks: int
+    average: float
+    max: float
+    expired: int
+
+
+def event_lane(config: WebhookdConfigDict, event_name: str) -> str:
+    celery_config = config['celery']
+    if (
+        celery_config['priority_queue_name']
+        and event_name in celery_config['priority_events']
+    ):
+        return PRIORITY_LANE
+    return DEFAULT_LANE
+
+
+def lane_options(config: WebhookdConfigDict, lane: str) -> dict[str, Any]:
+    if lane == PRIORITY_LANE:
+        return {'queue': config['celery']['priority_queue_name']}
+    return {}
+
+
+def event_ttl(config: WebhookdConfigDict, event_name: str) -> float | None:
+    return config.get('hook_event_ttl', {}).get(event_name) or None
+
+
+class QueueLatencies:
+    """Time spent by the hooks in the Celery queue of each lane, and number of
+    hooks dropped because their event expired.
+
+    Allocated in shared memory before the Celery workers are forked, so the
+    main process reports the latencies observed by all the workers.
+    """
+
+    def __init__(self, lanes: tuple[str, ...] = LANES) -> None:
+        self._index = {lane: i for i, lane in enumerate(lanes)}
+        # NOTE: tasks, total and max latency, expired tasks of each lane
+        self._values = multiprocessing.Array('d', len(lanes) * _VALUES)
+
+    def observe(self, lane: str, latency: float) -> None:
+        offset = self._index[lane] * _VALUES
+        latency = max(latency, 0.0)
+        with self._values.get_lock():
+            self._values[offset + _TASKS] += 1
+            self._values[offset + _TOTAL] += latency
+            self._values[offset + _MAX] = max(self._values[offset + _MAX], latency)
+
+    def expire(self, lane: str) -> None:
+        with self._values.get_lock():
+            self._values[self._index[lane] * _VALUES + _EXPIRED] += 1
+
+    def stats(self) -> dict[str, QueueLatencyDict]:
+        with self._values.get_lock():
+            values = self._values[:]
+        result: dict[str, QueueLatencyDict] = {}
+        for lane, i in self._index.items():
+            tasks, total, max_latency, expired = values[i * _VALUES : (i + 1) * _VALUES]
+            result[lane] = {
+                'tasks': int(tasks),
+                'average': total / tasks if tasks else 0.0,
+                'max': max_latency,
+                'expired': int(expired),
+            }
+        return result
+
+
+queue_latencies = QueueLatencies()
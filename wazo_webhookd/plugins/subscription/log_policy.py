@@ -0,0 +1,97 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import random
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from ...database.models import Subscription
+    from ...types import HookLogPolicyConfigDict, WebhookdConfigDict
+
+logger = logging.getLogger(__name__)
+
+ALL = 'all'
+FAILURES = 'failures'
+SAMPLED = 'sampled'
+COUNTERS = 'counters'
+MODES = (ALL, FAILURES, SAMPLED, COUNTERS)
+
+BODY_KEYS = ('request_body', 'response_body')
+
+# NOTE: subscription metadata overriding the `hook_log_policy` configuration
+MODE_METADATUM = 'log_policy'
+SAMPLE_RATE_METADATUM = 'log_success_sample_rate'
+MAX_BODY_SIZE_METADATUM = 'log_max_body_size'
+
+
+class LogPolicy:
+    """Which hook logs of a subscription are stored, and how much of them.
+
+    `all` stores every hook log, `failures` only the hooks that did not
+    succeed, `sampled` the hooks that did not succeed and a random share of
+    the successes, and `counters` none of them. Stats and metrics count every
+    hook whatever the policy.
+    """
+
+    def __init__(
+        self,
+        mode: str = ALL,
+        success_sample_rate: float = 1.0,
+        max_body_size: int | None = None,
+    ) -> None:
+        self.mode = mode
+        self.success_sample_rate = success_sample_rate
+        self.max_body_size = max_body_size
+
+    @classmethod
+    def from_config(
+        cls, config: WebhookdConfigDict, subscription: Subscription
+    ) -> LogPolicy:
+        defaults: HookLogPolicyConfigDict = config.get(  # type: ignore[assignment]
+            'hook_log_policy', {}
+        )
+        mode = defaults.get('mode', ALL)
+        sample_rate = defaults.get('success_sample_rate', 1.0)
+        max_body_size = defaults.get('max_body_size')
+
+        metadata = subscription.get('metadata') or {}
+        try:
+            if (value := metadata.get(MODE_METADATUM)) is not None:
+                if value not in MODES:
+                    raise ValueError(value)
+                mode = value
+            if (value := metadata.get(SAMPLE_RATE_METADATUM)) is not None:
+                sample_rate = min(max(float(value), 0.0), 1.0)
+            if (value := metadata.get(MAX_BODY_SIZE_METADATUM)) is not None:
+                max_body_size = int(value) or None
+        except ValueError as e:
+            logger.warning(
+                'Subscription %s: invalid log policy metadata: %s',
+                subscription['uuid'],
+                e,
+            )
+        return cls(mode, sample_rate, max_body_size)
+
+    def stored(self, status: str) -> bool:
+        if self.mode == ALL:
+            return True
+        if self.mode == COUNTERS:
+            return False
+        if status != 'success':
+            return True
+        if self.mode == FAILURES:
+            return False
+        return random.random() < self.success_sample_rate
+
+    def trim(self, detail: Any) -> Any:
+        if not self.max_body_size or not isinstance(detail, dict):
+            return detail
+        trimmed = dict(detail)
+        for key in BODY_KEYS:
+            body = trimmed.get(key)
+            if isinstance(body, str) and len(body) > self.max_body_size:
+                trimmed[key] = body[: self.max_body_size] + '... [truncated]'
+        return trimmed
@@ -1,4 +1,4 @@
-# Copyright 2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2025-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -61,6 +61,16 @@ class SubscriptionNotifier:
     def deleted(self, subscription: Subscription):
         """Publish webhookd_subscription_deleted event to the bus."""
 
+        self._bus_publisher.publish(self._deleted_event(subscription))
+
+    def deleted_many(self, subscriptions: list[Subscription]):
+        """Publish webhookd_subscription_deleted events to the bus, one per
+        subscription, after a bulk deletion."""
+
+        for subscription in subscriptions:
+            self._bus_publisher.publish(self._deleted_event(subscription))
+
+    def _deleted_event(self, subscription: Subscription):
         if subscription.owner_user_uuid:
             subscription_data = user_subscription_schema.dump(subscription)
             event = WebhookdSubscriptionDeletedUserEvent(
@@ -74,4 +84,4 @@ class SubscriptionNotifier:
                 subscription=subscription_data,
                 tenant_uuid=subscription.owner_tenant_uuid,
             )
-        self._bus_publisher.publish(event)
+        return event
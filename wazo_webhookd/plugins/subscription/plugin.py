@@ -1,4 +1,4 @@
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -6,19 +6,26 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from xivo.pubsub import CallbackCollector
+from xivo.status import Status
 
 from .bus import SubscriptionBusEventHandler
+from .coalescer import call_coalescer
 from .http import (
     SubscriptionLogsResource,
     SubscriptionResource,
     SubscriptionsResource,
+    SubscriptionsStatsResource,
+    SubscriptionStatsResource,
     UserSubscriptionResource,
     UserSubscriptionsResource,
 )
+from .lanes import queue_latencies
 from .notifier import SubscriptionNotifier
 from .service import SubscriptionService
 
 if TYPE_CHECKING:
+    from xivo.status import StatusDict
+
     from ...types import PluginDependencyDict
 
 
@@ -29,6 +36,7 @@ class Plugin:
         bus_publisher = dependencies['bus_publisher']
         config = dependencies['config']
         service_manager = dependencies['service_manager']
+        status_aggregator = dependencies['status_aggregator']
         subscribe_to_next_token_change = dependencies['next_token_change_subscribe']
 
         master_tenant_callback_collector = CallbackCollector()
@@ -40,6 +48,11 @@ class Plugin:
         api.add_resource(
             SubscriptionsResource, '/subscriptions', resource_class_args=[service]
         )
+        api.add_resource(
+            SubscriptionsStatsResource,
+            '/subscriptions/stats',
+            resource_class_args=[service],
+        )
         api.add_resource(
             SubscriptionResource,
             '/subscriptions/<subscription_uuid>',
@@ -60,8 +73,20 @@ class Plugin:
             '/subscriptions/<subscription_uuid>/logs',
             resource_class_args=[service],
         )
+        api.add_resource(
+            SubscriptionStatsResource,
+            '/subscriptions/<subscription_uuid>/stats',
+            resource_class_args=[service],
+        )
 
         bus_handler = SubscriptionBusEventHandler(
             bus_consumer, config, service_manager, service
         )
         master_tenant_callback_collector.subscribe(bus_handler.subscribe)
+        status_aggregator.add_provider(_provide_task_queues_status)
+
+
+def _provide_task_queues_status(status: StatusDict) -> None:
+    status['task_queues']['status'] = Status.ok
+    status['task_queues']['lanes'] = queue_latencies.stats()
+    status['task_queues']['coalesced_calls'] = call_coalescer.coalesced()
@@ -1,6 +1,7 @@
 # Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import datetime
 from typing import Any, Literal, TypedDict
 
 from marshmallow import EXCLUDE, Schema, ValidationError, post_load, pre_load, validates
@@ -44,6 +45,21 @@ class SubscriptionLogDict(TypedDict):
     detail: dict[str, Any]
 
 
+class DurationStatsDict(TypedDict):
+    average: float | None
+    p50: float | None
+    p95: float | None
+
+
+class StatsDict(TypedDict):
+    attempts: int
+    success: int
+    failure: int
+    error: int
+    expired: int
+    duration: DurationStatsDict
+
+
 class UserSubscriptionDict(TypedDict):
     uuid: str
     name: str
@@ -194,7 +210,50 @@ class SubscriptionLogRequestSchema(ListSchema):
     from_date = fields.DateTime(load_default=None)
 
 
+class SubscriptionStatsRequestSchema(Schema):
+    from_date = fields.DateTime(load_default=None)
+    until_date = fields.DateTime(load_default=None)
+    interval = fields.String(validate=OneOf(['hour', 'day']), load_default='hour')
+    recurse = fields.Boolean(load_default=False)
+
+    @post_load
+    def default_period(self, data, **kwargs):
+        if data['until_date'] is None:
+            data['until_date'] = datetime.datetime.utcnow()
+        if data['from_date'] is None:
+            data['from_date'] = data['until_date'] - datetime.timedelta(days=1)
+        return data
+
+
+class DurationStatsSchema(Schema):
+    average = fields.Float()
+    p50 = fields.Float()
+    p95 = fields.Float()
+
+
+class StatsSchema(Schema):
+    attempts = fields.Integer()
+    success = fields.Integer()
+    failure = fields.Integer()
+    error = fields.Integer()
+    expired = fields.Integer()
+    duration = fields.Nested(DurationStatsSchema)
+
+
+class StatsBucketSchema(StatsSchema):
+    bucket = fields.DateTime()
+
+
+class SubscriptionStatsSchema(StatsSchema):
+    subscription_uuid = fields.String()
+    name = fields.String()
+
+
 subscription_schema = SubscriptionSchema()
 subscription_list_params_schema = SubscriptionListParamsSchema()
 user_subscription_schema = UserSubscriptionSchema()
 subscription_log_schema = SubscriptionLogSchema()
+subscription_stats_request_schema = SubscriptionStatsRequestSchema()
+stats_schema = StatsSchema()
+stats_bucket_schema = StatsBucketSchema()
+subscription_stats_schema = SubscriptionStatsSchema()
@@ -1,26 +1,31 @@
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterable
 from contextlib import contextmanager
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from sqlalchemy import and_, create_engine, distinct, exc, func, or_
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import and_, distinct, exc, func, or_
+from sqlalchemy.orm import Session, scoped_session
 from wazo_bus.resources.auth.events import TenantDeletedEvent
 from wazo_bus.resources.user.event import UserDeletedEvent
 from xivo.pubsub import Pubsub
 
 from wazo_webhookd.database.models import (
     Subscription,
+    SubscriptionDelivery,
     SubscriptionLog,
     SubscriptionMetadatum,
+    SubscriptionStats,
 )
+from wazo_webhookd.database.registry import registry
+from wazo_webhookd.metrics import metrics
 from wazo_webhookd.types import ServicePluginDependencyDict
 
+from . import idempotency, stats
 from .exceptions import NoSuchSubscription
 from .notifier import SubscriptionNotifier
 
@@ -30,6 +35,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 
 class SubscriptionService:
     # NOTE(sileht): We share the pubsub object, so a plugin that instantiate
@@ -40,13 +47,9 @@ class SubscriptionService:
     def __init__(
         self, config: WebhookdConfigDict, notifier: SubscriptionNotifier
     ) -> None:
-        self._engine = create_engine(
-            config['db_uri'],
-            pool_size=config['rest_api']['max_threads'],
-            pool_pre_ping=True,
-        )
-        self._Session: scoped_session = scoped_session(sessionmaker())
-        self._Session.configure(bind=self._engine)
+        # NOTE: engines are shared by every service of the process, see registry
+        self._Session: scoped_session = registry.get_session(config)
+        self._replica = registry.get_replica_router(config)
         self._notifier = notifier
 
     def subscribe_bus(self, bus):
@@ -54,8 +57,7 @@ class SubscriptionService:
         bus.subscribe(TenantDeletedEvent.name, self._on_tenant_deleted_event)
 
     def close(self) -> None:
-        self._Session.close()
-        self._engine.dispose()
+        self._Session.remove()
 
     @contextmanager
     def rw_session(self) -> Generator[scoped_session, None, None]:
@@ -68,14 +70,30 @@ class SubscriptionService:
             raise
         finally:
             self._Session.remove()
+            if self._replica:
+                self._replica.record_write()
 
-    @contextmanager
-    def ro_session(self) -> Generator[scoped_session, None, None]:
-        session = self._Session()
+    def _read(self, query: Callable[[Session], T]) -> T:
+        """Run a read-only query, on the replica when it is usable.
+
+        A query failing on the replica is run again on the primary.
+        """
+        if not self._replica or (reader := self._replica.reader()) is self._Session:
+            return self._run(self._Session, query)
         try:
-            yield session
+            return self._run(reader, query)
+        except exc.DBAPIError as e:
+            logger.warning('Database replica query failed, retrying on primary: %s', e)
+            self._replica.replica_failed()
+        return self._run(self._Session, query)
+
+    @staticmethod
+    def _run(scoped: scoped_session, query: Callable[[Session], T]) -> T:
+        session = scoped()
+        try:
+            return query(session)
         finally:
-            self._Session.remove()
+            scoped.remove()
 
     def list(
         self,
@@ -84,7 +102,7 @@ class SubscriptionService:
         events_user_uuid=None,
         search_metadata=None,
     ):
-        with self.ro_session() as session:
+        def query(session):
             query = session.query(Subscription)
             if owner_tenant_uuids:
                 query = query.filter(
@@ -117,6 +135,8 @@ class SubscriptionService:
                 query = query.filter(Subscription.uuid.in_(subquery))
             return query.all()
 
+        return self._read(query)
+
     def _get(
         self, session, subscription_uuid, owner_tenant_uuids=None, owner_user_uuid=None
     ):
@@ -134,10 +154,11 @@ class SubscriptionService:
         return result
 
     def get(self, subscription_uuid, owner_tenant_uuids=None, owner_user_uuid=None):
-        with self.ro_session() as session:
-            return self._get(
+        return self._read(
+            lambda session: self._get(
                 session, subscription_uuid, owner_tenant_uuids, owner_user_uuid
             )
+        )
 
     def create(self, new_subscription):
         with self.rw_session() as session:
@@ -191,7 +212,7 @@ class SubscriptionService:
         direction='desc',
         search=None,
     ):
-        with self.ro_session() as session:
+        def query(session):
             query = session.query(SubscriptionLog).filter(
                 SubscriptionLog.subscription_uuid == subscription_uuid
             )
@@ -218,6 +239,80 @@ class SubscriptionService:
 
             return query.all()
 
+        return self._read(query)
+
+    def get_stats(self, subscription_uuid, from_date, until_date, interval='hour'):
+        def query(session):
+            return (
+                session.query(SubscriptionStats)
+                .filter(
+                    SubscriptionStats.subscription_uuid == subscription_uuid,
+                    SubscriptionStats.bucket >= from_date,
+                    SubscriptionStats.bucket < until_date,
+                )
+                .order_by(SubscriptionStats.bucket)
+                .all()
+            )
+
+        rows = self._read(query)
+
+        buckets: dict[Any, dict[str, Any]] = {}
+        total: dict[str, Any] = {}
+        for row in rows:
+            values = {counter: getattr(row, counter) for counter in stats.COLUMNS}
+            bucket = row.bucket
+            if interval == 'day':
+                bucket = bucket.replace(hour=0)
+            stats.add(buckets.setdefault(bucket, {}), values)
+            stats.add(total, values)
+        return {
+            'items': [
+                {'bucket': bucket, **stats.summarize(values)}
+                for bucket, values in buckets.items()
+            ],
+            'total': stats.summarize(total),
+        }
+
+    def get_tenant_stats(self, owner_tenant_uuids, from_date, until_date):
+        def query(session):
+            return (
+                session.query(
+                    Subscription.uuid,
+                    Subscription.name,
+                    *(
+                        func.sum(getattr(SubscriptionStats, counter)).label(counter)
+                        for counter in stats.COLUMNS
+                    ),
+                )
+                .join(
+                    SubscriptionStats,
+                    SubscriptionStats.subscription_uuid == Subscription.uuid,
+                )
+                .filter(
+                    Subscription.owner_tenant_uuid.in_(owner_tenant_uuids),
+                    SubscriptionStats.bucket >= from_date,
+                    SubscriptionStats.bucket < until_date,
+                )
+                .group_by(Subscription.uuid, Subscription.name)
+                .order_by(Subscription.name, Subscription.uuid)
+                .all()
+            )
+
+        rows = self._read(query)
+
+        total: dict[str, Any] = {}
+        items = []
+        for row in rows:
+            items.append(
+                {
+                    'subscription_uuid': row.uuid,
+                    'name': row.name,
+                    **stats.summarize(row._mapping),
+                }
+            )
+            stats.add(total, row._mapping)
+        return {'items': items, 'total': stats.summarize(total)}
+
     def create_hook_log(
         self,
         uuid,
@@ -229,22 +324,43 @@ class SubscriptionService:
         ended_at,
         event,
         detail,
+        stored=True,
+        idempotency_key=None,
     ):
-        with self.rw_session() as session:
-            hooklog = SubscriptionLog(
-                uuid=uuid,
-                subscription_uuid=subscription_uuid,
-                status=status,
-                attempts=attempts,
-                max_attempts=max_attempts,
-                started_at=started_at,
-                ended_at=ended_at,
-                event=event,
-                detail=detail,
-            )
-            session.add(hooklog)
+        delivered = {}
+        if idempotency_key and status == 'success':
+            delivered[subscription_uuid] = idempotency_key
+        with metrics.time(
+            'webhookd_hook_log_write_seconds'
+        ), self.rw_session() as session:
+            if stored:
+                hooklog = SubscriptionLog(
+                    uuid=uuid,
+                    subscription_uuid=subscription_uuid,
+                    status=status,
+                    attempts=attempts,
+                    max_attempts=max_attempts,
+                    started_at=started_at,
+                    ended_at=ended_at,
+                    event=event,
+                    detail=detail,
+                )
+                session.add(hooklog)
             try:
+                self._record_stats(
+                    session,
+                    [
+                        {
+                            'subscription_uuid': subscription_uuid,
+                            'status': status,
+                            'started_at': started_at,
+                            'ended_at': ended_at,
+                        }
+                    ],
+                )
+                self._record_deliveries(session, delivered)
                 session.commit()
+                metrics.inc('webhookd_hooks_total', {'status': status})
             except exc.IntegrityError as e:
                 if "violates foreign key constraint" in str(e):
                     logger.warning(
@@ -255,6 +371,80 @@ class SubscriptionService:
                 else:
                     raise
 
+    def create_hook_logs(
+        self,
+        hook_logs: list[dict[str, Any]],
+        counted_only: list[dict[str, Any]] | None = None,
+        idempotency_keys: dict[str, str] | None = None,
+    ) -> None:
+        """Store the hook logs; the hook logs `counted_only` are not stored
+        but still counted in the stats and the metrics. `idempotency_keys` by
+        subscription uuid are recorded for the successful hooks."""
+        counted_only = counted_only or []
+        idempotency_keys = idempotency_keys or {}
+        delivered = {
+            hook_log['subscription_uuid']: key
+            for hook_log in hook_logs + counted_only
+            if hook_log['status'] == 'success'
+            and (key := idempotency_keys.get(hook_log['subscription_uuid']))
+        }
+        with metrics.time(
+            'webhookd_hook_log_write_seconds'
+        ), self.rw_session() as session:
+            session.add_all(SubscriptionLog(**hook_log) for hook_log in hook_logs)
+            try:
+                self._record_stats(session, hook_logs + counted_only)
+                self._record_deliveries(session, delivered)
+                session.commit()
+                for hook_log in hook_logs + counted_only:
+                    metrics.inc('webhookd_hooks_total', {'status': hook_log['status']})
+                return
+            except exc.IntegrityError as e:
+                if "violates foreign key constraint" not in str(e):
+                    raise
+                session.rollback()
+
+        # NOTE: some subscriptions have been deleted in the meantime
+        for hook_log in hook_logs:
+            key = idempotency_keys.get(hook_log['subscription_uuid'])
+            self.create_hook_log(**hook_log, idempotency_key=key)
+        for hook_log in counted_only:
+            key = idempotency_keys.get(hook_log['subscription_uuid'])
+            self.create_hook_log(**hook_log, stored=False, idempotency_key=key)
+
+    def delivered(self, idempotency_keys: Iterable[str]) -> set[str]:
+        """The idempotency keys of the hooks already delivered"""
+        keys = set(idempotency_keys)
+        delivered = {key for key in keys if key in idempotency.seen_keys}
+        if not (unknown := keys - delivered):
+            return delivered
+        # NOTE: not from the replica, which may not have the last deliveries
+        with self.rw_session() as session:
+            query = session.query(SubscriptionDelivery.idempotency_key).filter(
+                SubscriptionDelivery.idempotency_key.in_(unknown)
+            )
+            found = {key for key, in query}
+        for key in found:
+            idempotency.seen_keys.add(key)
+        return delivered | found
+
+    def _record_deliveries(self, session, keys: dict[str, str]) -> None:
+        if not keys:
+            return
+        dialect = session.get_bind().dialect.name
+        session.execute(idempotency.record(dialect, keys))
+        # NOTE: known by the other workers once committed
+        for key in keys.values():
+            idempotency.seen_keys.add(key)
+
+    def _record_stats(self, session, hook_logs: list[dict[str, Any]]) -> None:
+        # NOTE: in the transaction of the logs, dashboards never read the logs
+        if not hook_logs:
+            return
+        session.flush()
+        dialect = session.get_bind().dialect.name
+        session.execute(stats.upsert(dialect, stats.rollup(hook_logs)))
+
     # executed in the bus consumer thread
     def _on_user_deleted_event(self, user):
         logger.debug('User deleted event received for user %s', user['data']['uuid'])
@@ -267,35 +457,51 @@ class SubscriptionService:
         )
         self._remove_tenant(tenant['data']['uuid'])
 
+    def delete_user_subscriptions(self, user_uuid):
+        return self._delete_many(
+            or_(
+                Subscription.owner_user_uuid == user_uuid,
+                Subscription.events_user_uuid == user_uuid,
+            )
+        )
+
+    def delete_tenant_subscriptions(self, tenant_uuid):
+        return self._delete_many(Subscription.owner_tenant_uuid == tenant_uuid)
+
+    def _delete_many(self, *criteria):
+        with self.rw_session() as session:
+            subscriptions = session.query(Subscription).filter(*criteria).all()
+            if not subscriptions:
+                return []
+
+            # NOTE: the database cascades the deletion to events, options,
+            # metadata and logs, no need to load them through the ORM
+            session.query(Subscription).filter(
+                Subscription.uuid.in_(
+                    [subscription.uuid for subscription in subscriptions]
+                )
+            ).delete(synchronize_session=False)
+            session.expunge_all()
+
+        self.pubsub.publish('deleted_many', subscriptions)
+        self._notifier.deleted_many(subscriptions)
+        return subscriptions
+
     def _remove_user(self, user_uuid):
-        subscription_uuids = {
-            subscription.uuid
-            for subscription in self.list(owner_user_uuid=user_uuid)
-            + self.list(events_user_uuid=user_uuid)
-        }
+        subscriptions = self.delete_user_subscriptions(user_uuid)
         logger.info(
-            'User deleted event received, removing %d subscriptions for user %s',
-            len(subscription_uuids),
+            'User deleted event received, removed %d subscriptions for user %s',
+            len(subscriptions),
             user_uuid,
         )
-        for subscription_uuid in subscription_uuids:
-            try:
-                self.delete(subscription_uuid)
-            except NoSuchSubscription:
-                pass
 
     def _remove_tenant(self, tenant_uuid):
-        subscriptions = self.list(owner_tenant_uuids=[tenant_uuid])
+        subscriptions = self.delete_tenant_subscriptions(tenant_uuid)
         logger.info(
-            'Tenant deleted event received, removing %d subscriptions for tenant %s',
+            'Tenant deleted event received, removed %d subscriptions for tenant %s',
             len(subscriptions),
             tenant_uuid,
         )
-        for subscription in subscriptions:
-            try:
-                self.delete(subscription.uuid)
-            except NoSuchSubscription:
-                pass
 
 
 def build_subscription_service(
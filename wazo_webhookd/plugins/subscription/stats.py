@@ -0,0 +1,90 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import datetime
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from wazo_webhookd.database.models import STATS_DURATION_COLUMNS, SubscriptionStats
+
+STATUSES = ('success', 'failure', 'error', 'expired')
+COUNTERS = ('attempts',) + STATUSES + tuple(c for _, c in STATS_DURATION_COLUMNS)
+COLUMNS = COUNTERS + ('duration_sum',)
+
+_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def bucket_start(at: datetime.datetime) -> datetime.datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup(hook_logs: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Increments of the stats rows of the hook logs, one per subscription and
+    bucket"""
+    rows: dict[tuple[str, datetime.datetime], dict[str, Any]] = {}
+    for hook_log in hook_logs:
+        started_at, ended_at = hook_log['started_at'], hook_log['ended_at']
+        key = (hook_log['subscription_uuid'], bucket_start(started_at))
+        if (row := rows.get(key)) is None:
+            row = rows[key] = dict.fromkeys(COUNTERS, 0)
+            row.update(subscription_uuid=key[0], bucket=key[1], duration_sum=0.0)
+        row['attempts'] += 1
+        row[hook_log['status']] += 1
+        # NOTE: expired hooks are dropped before running
+        if hook_log['status'] == 'expired':
+            continue
+        duration = (ended_at - started_at).total_seconds()
+        row['duration_sum'] += duration
+        row[next(c for bound, c in STATS_DURATION_COLUMNS if duration <= bound)] += 1
+    return list(rows.values())
+
+
+def upsert(dialect: str, rows: list[dict[str, Any]]):
+    """Add the increments to the existing stats rows in a single statement"""
+    statement = _INSERTS[dialect](SubscriptionStats.__table__).values(rows)
+    table = SubscriptionStats.__table__
+    return statement.on_conflict_do_update(
+        index_elements=['subscription_uuid', 'bucket'],
+        set_={
+            column: table.c[column] + statement.excluded[column] for column in COLUMNS
+        },
+    )
+
+
+def percentile(histogram: list[int], q: float) -> float | None:
+    """Estimate a percentile of the durations, interpolated in its bucket"""
+    if not (total := sum(histogram)):
+        return None
+    rank = total * q
+    lower = 0.0
+    for (upper, _), count in zip(STATS_DURATION_COLUMNS, histogram):
+        if count and rank <= count:
+            if upper == float('inf'):
+                return lower
+            return round(lower + (upper - lower) * rank / count, 3)
+        rank -= count
+        lower = upper
+    return lower
+
+
+def add(totals: dict[str, Any], row: Mapping[str, Any]) -> dict[str, Any]:
+    for counter in COLUMNS:
+        totals[counter] = totals.get(counter, 0) + (row[counter] or 0)
+    return totals
+
+
+def summarize(totals: Mapping[str, Any]) -> dict[str, Any]:
+    histogram = [totals.get(column) or 0 for _, column in STATS_DURATION_COLUMNS]
+    ran = sum(histogram)
+    return {
+        **{counter: totals.get(counter) or 0 for counter in ('attempts',) + STATUSES},
+        'duration': {
+            'average': round(totals['duration_sum'] / ran, 3) if ran else None,
+            'p50': percentile(histogram, 0.5),
+            'p95': percentile(histogram, 0.95),
+        },
+    }
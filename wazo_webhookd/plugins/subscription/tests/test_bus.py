@@ -0,0 +1,196 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, contains_inanyorder, equal_to, has_key
+
+from ..bus import SubscriptionBusEventHandler
+
+MULTICAST_EVENT = 'global_voicemail_message_created'
+
+
+def subscription(uuid, user_uuid, events):
+    return Mock(
+        uuid=uuid,
+        service='mobile',
+        events=events,
+        events_user_uuid=user_uuid,
+        events_wazo_uuid=None,
+        owner_tenant_uuid='tenant',
+    )
+
+
+@patch('wazo_webhookd.plugins.subscription.bus.hook_multicast_task')
+@patch('wazo_webhookd.plugins.subscription.bus.hook_runner_task')
+@patch('wazo_webhookd.plugins.subscription.bus.subscription_schema')
+class TestMulticast(TestCase):
+    def setUp(self):
+        self.bus_consumer = Mock()
+        mobile = Mock()
+        mobile.plugin.MULTICAST_EVENTS = (MULTICAST_EVENT,)
+        mobile.entry_point.module = 'mobile_module'
+        mobile.entry_point.attr = 'Service'
+        self.handler = SubscriptionBusEventHandler(
+            self.bus_consumer, {}, {'mobile': mobile}, Mock()  # type: ignore
+        )
+
+    def _dump(self, schema):
+        schema.dump.side_effect = lambda s: {
+            'uuid': s.uuid,
+            'service': s.service,
+            'name': s.uuid,
+        }
+
+    def _callbacks(self, event):
+        return [
+            call.args[1]
+            for call in self.bus_consumer.subscribe.call_args_list
+            if call.args[0] == event
+        ]
+
+    def test_one_task_for_all_subscriptions(
+        self, schema, hook_runner_task, hook_multicast_task
+    ):
+        self._dump(schema)
+        events = [MULTICAST_EVENT, 'user_missed_call']
+        self.handler.on_subscription_created(subscription('s1', 'user-1', events))
+        self.handler.on_subscription_created(subscription('s2', 'user-2', events))
+
+        [callback] = self._callbacks(MULTICAST_EVENT)
+        assert_that(len(self._callbacks('user_missed_call')), equal_to(2))
+
+        callback({'name': MULTICAST_EVENT})
+
+        hook_runner_task.delay.assert_not_called()
+        hook_multicast_task.delay.assert_called_once()
+        ep_name, _, subscriptions, _ = hook_multicast_task.delay.call_args.args
+        assert_that(ep_name, equal_to('mobile_module:Service'))
+        assert_that([s['uuid'] for s in subscriptions], contains_inanyorder('s1', 's2'))
+
+    def test_unsubscribed_with_last_subscription(
+        self, schema, hook_runner_task, hook_multicast_task
+    ):
+        self._dump(schema)
+        first = subscription('s1', 'user-1', [MULTICAST_EVENT])
+        second = subscription('s2', 'user-2', [MULTICAST_EVENT])
+        self.handler.on_subscription_created(first)
+        self.handler.on_subscription_created(second)
+        [callback] = self._callbacks(MULTICAST_EVENT)
+
+        self.handler.on_subscription_deleted(first)
+        self.bus_consumer.unsubscribe.assert_not_called()
+
+        self.handler.on_subscriptions_deleted([second])
+        self.bus_consumer.unsubscribe.assert_called_once_with(MULTICAST_EVENT, callback)
+
+
+@patch('wazo_webhookd.plugins.subscription.bus.hook_runner_task')
+@patch('wazo_webhookd.plugins.subscription.bus.subscription_schema')
+class TestLanes(TestCase):
+    def setUp(self):
+        self.bus_consumer = Mock()
+        mobile = Mock()
+        mobile.plugin.MULTICAST_EVENTS = ()
+        config = {
+            'celery': {
+                'priority_queue_name': 'priority',
+                'priority_events': ['call_push_notification'],
+            },
+            'hook_event_ttl': {'call_push_notification': 60},
+        }
+        self.handler = SubscriptionBusEventHandler(
+            self.bus_consumer, config, {'mobile': mobile}, Mock()  # type: ignore
+        )
+
+    def _callback(self, schema, event):
+        schema.dump.return_value = {'service': 'mobile'}
+        events = ['call_push_notification', 'user_missed_call']
+        self.handler.on_subscription_created(subscription('s1', 'user-1', events))
+        [callback] = [
+            call.args[1]
+            for call in self.bus_consumer.subscribe.call_args_list
+            if call.args[0] == event
+        ]
+        return callback
+
+    def test_priority_event_sent_to_priority_queue(self, schema, hook_runner_task):
+        self._callback(schema, 'call_push_notification')(
+            {'name': 'call_push_notification'}
+        )
+
+        call = hook_runner_task.apply_async.call_args
+        assert_that(call.kwargs, equal_to({'queue': 'priority'}))
+        assert_that(call.args[1], has_key('queued_at'))
+
+    def test_other_event_sent_to_default_queue(self, schema, hook_runner_task):
+        self._callback(schema, 'user_missed_call')({'name': 'user_missed_call'})
+
+        assert_that(hook_runner_task.apply_async.call_args.kwargs, equal_to({}))
+
+
+@patch('wazo_webhookd.plugins.subscription.bus.call_coalescer')
+@patch('wazo_webhookd.plugins.subscription.bus.hook_runner_task')
+@patch('wazo_webhookd.plugins.subscription.bus.subscription_schema')
+class TestCallCoalescing(TestCase):
+    def setUp(self):
+        self.bus_consumer = Mock()
+        mobile = Mock()
+        mobile.plugin.MULTICAST_EVENTS = ()
+        self.handler = SubscriptionBusEventHandler(
+            self.bus_consumer,
+            {'celery': {'priority_queue_name': None}},
+            {'mobile': mobile},
+            Mock(),  # type: ignore
+        )
+
+    def _callback(self, schema, event):
+        schema.dump.return_value = {'uuid': 's1', 'service': 'mobile'}
+        events = ['call_push_notification', 'call_cancel_push_notification']
+        self.handler.on_subscription_created(subscription('s1', 'user-1', events))
+        [callback] = [
+            call.args[1]
+            for call in self.bus_consumer.subscribe.call_args_list
+            if call.args[0] == event
+        ]
+        return callback
+
+    def test_push_recorded_as_queued(self, schema, hook_runner_task, coalescer):
+        event = {'name': 'call_push_notification', 'data': {'call_id': 'c1'}}
+
+        self._callback(schema, 'call_push_notification')(event)
+
+        coalescer.queued.assert_called_once_with('s1:c1')
+        hook_runner_task.apply_async.assert_called_once()
+
+    def test_cancel_of_queued_push_dropped(self, schema, hook_runner_task, coalescer):
+        coalescer.cancel.return_value = True
+        event = {'name': 'call_cancel_push_notification', 'data': {'call_id': 'c1'}}
+
+        self._callback(schema, 'call_cancel_push_notification')(event)
+
+        coalescer.cancel.assert_called_once_with('s1:c1')
+        hook_runner_task.apply_async.assert_not_called()
+
+    @patch('wazo_webhookd.plugins.subscription.bus.metrics')
+    def test_cancel_of_queued_push_counted(
+        self, metrics, schema, hook_runner_task, coalescer
+    ):
+        coalescer.cancel.return_value = True
+        event = {'name': 'call_cancel_push_notification', 'data': {'call_id': 'c1'}}
+
+        self._callback(schema, 'call_cancel_push_notification')(event)
+
+        metrics.inc.assert_called_once_with(
+            'webhookd_hooks_coalesced_total',
+            {'service': 'mobile', 'event': 'call_cancel_push_notification'},
+        )
+
+    def test_cancel_of_sent_push_sent(self, schema, hook_runner_task, coalescer):
+        coalescer.cancel.return_value = False
+        event = {'name': 'call_cancel_push_notification', 'data': {'call_id': 'c1'}}
+
+        self._callback(schema, 'call_cancel_push_notification')(event)
+
+        hook_runner_task.apply_async.assert_called_once()
@@ -1,11 +1,25 @@
-# Copyright 2017-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
+from unittest.mock import ANY, patch
 
-from hamcrest import assert_that
+from hamcrest import assert_that, close_to, contains_exactly, equal_to, has_entries
 
-from ..celery_tasks import truncated
+from wazo_webhookd import timeline
+from wazo_webhookd.services.helpers import HookExpectedError, HookRetry
+
+from ..celery_tasks import hook_multicast_task, hook_runner_task, truncated
+from ..idempotency import current_key, idempotency_key
+
+TTL_CONFIG = {
+    'celery': {'priority_queue_name': None},
+    'hook_max_attempts': 3,
+    'hook_http_retry_countdown_factor': 2,
+    'hook_event_ttl': {'call_push_notification': 60},
+}
 
 
 class TestCeleryTasks(TestCase):
@@ -28,3 +42,324 @@ class TestCeleryTasks(TestCase):
 
     def test_none(self):
         assert_that(truncated(None), "None")
+
+
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.hook_runner_task')
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.import_module')
+@patch.object(hook_multicast_task, 'get_service')
+class TestHookMulticastTask(TestCase):
+    def test_results_logged_and_failures_retried(
+        self, get_service, import_module, hook_runner_task
+    ):
+        config = {'hook_max_attempts': 3, 'hook_http_retry_countdown_factor': 2}
+        subscriptions = [
+            {'uuid': 's1', 'service': 'mobile'},
+            {'uuid': 's2', 'service': 'mobile'},
+            {'uuid': 's3', 'service': 'mobile'},
+        ]
+        event = {'name': 'event'}
+        hook = import_module.return_value.Service
+        hook.run_multicast.return_value = [
+            {'success': True},
+            HookRetry({'error': 'throttled'}, countdown=30),
+            Exception('boom'),
+        ]
+
+        hook_multicast_task('module:Service', config, subscriptions, event)
+
+        [hook_logs] = get_service.return_value.create_hook_logs.call_args.args
+        assert_that(
+            hook_logs,
+            contains_exactly(
+                has_entries(subscription_uuid='s1', status='success'),
+                has_entries(subscription_uuid='s2', status='failure'),
+                has_entries(subscription_uuid='s3', status='error'),
+            ),
+        )
+        hook_runner_task.apply_async.assert_called_once_with(
+            (
+                hook_logs[1]['uuid'],
+                'module:Service',
+                config,
+                subscriptions[1],
+                event,
+            ),
+            {'queued_at': None, 'message_id': None},
+            countdown=30,
+            retries=1,
+        )
+
+    def test_successes_not_stored_by_log_policy(
+        self, get_service, import_module, hook_runner_task
+    ):
+        config = {
+            'hook_max_attempts': 3,
+            'hook_log_policy': {'mode': 'failures', 'max_body_size': 3},
+        }
+        subscriptions = [
+            {'uuid': 's1', 'service': 'http'},
+            {'uuid': 's2', 'service': 'http'},
+            {'uuid': 's3', 'service': 'http', 'metadata': {'log_policy': 'all'}},
+        ]
+        hook = import_module.return_value.Service
+        hook.run_multicast.return_value = [
+            {'response_body': 'ok'},
+            HookExpectedError({'response_body': 'not found'}),
+            {'response_body': 'ok'},
+        ]
+
+        hook_multicast_task('module:Service', config, subscriptions, {'name': 'e'})
+
+        create_hook_logs = get_service.return_value.create_hook_logs
+        [hook_logs] = create_hook_logs.call_args.args
+        assert_that(
+            hook_logs,
+            contains_exactly(
+                has_entries(
+                    subscription_uuid='s2',
+                    detail=has_entries(response_body='not... [truncated]'),
+                ),
+                has_entries(subscription_uuid='s3'),
+            ),
+        )
+        assert_that(
+            create_hook_logs.call_args.kwargs['counted_only'],
+            contains_exactly(has_entries(subscription_uuid='s1', status='success')),
+        )
+
+    def test_stage_timings_per_subscription(
+        self, get_service, import_module, hook_runner_task
+    ):
+        config = {'hook_max_attempts': 3}
+        subscriptions = [
+            {'uuid': 's1', 'service': 'mobile'},
+            {'uuid': 's2', 'service': 'mobile'},
+        ]
+
+        def run_multicast(task, config, subscriptions, event):
+            fork = timeline.fork()
+
+            def push(subscription):
+                with fork.branch(subscription['uuid']):
+                    timeline.mark('auth_done')
+                    if subscription['uuid'] == 's1':
+                        timeline.mark('request_sent')
+                return {}
+
+            with ThreadPoolExecutor() as executor:
+                return list(executor.map(push, subscriptions))
+
+        hook = import_module.return_value.Service
+        hook.run_multicast.side_effect = run_multicast
+        now = time.time()
+
+        hook_multicast_task(
+            'module:Service',
+            config,
+            subscriptions,
+            {'name': 'e'},
+            queued_at=now - 2,
+            received_at=now - 3,
+        )
+
+        [hook_logs] = get_service.return_value.create_hook_logs.call_args.args
+        stages = [set(hook_log['detail']['timings']) for hook_log in hook_logs]
+        assert_that(
+            stages,
+            contains_exactly(
+                {'dispatch', 'queue', 'auth', 'prepare', 'finish'},
+                {'dispatch', 'queue', 'auth', 'finish'},
+            ),
+        )
+        assert_that(hook_logs[0]['detail']['timings']['queue'], close_to(2, 0.5))
+
+
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.import_module')
+@patch.object(hook_runner_task, 'retry')
+@patch.object(hook_runner_task, 'get_service')
+class TestHookRunnerTaskExpiry(TestCase):
+    def _run(self, queued_at, event_name='call_push_notification'):
+        hook_runner_task(
+            'hook-uuid',
+            'module:Service',
+            TTL_CONFIG,
+            {'uuid': 'subscription-uuid', 'service': 'mobile'},
+            {'name': event_name},
+            queued_at=queued_at,
+        )
+
+    def test_expired_event_dropped(self, get_service, retry, import_module):
+        self._run(time.time() - 61)
+
+        import_module.return_value.Service.run.assert_not_called()
+        get_service.return_value.create_hook_log.assert_called_once_with(
+            'hook-uuid',
+            'subscription-uuid',
+            'expired',
+            1,
+            3,
+            ANY,
+            ANY,
+            {'name': 'call_push_notification'},
+            ANY,
+            stored=True,
+        )
+        detail = get_service.return_value.create_hook_log.call_args.args[8]
+        assert_that(detail, has_entries(error='event expired', ttl=60))
+
+    def test_event_without_ttl_not_expired(self, get_service, retry, import_module):
+        self._run(time.time() - 3600, event_name='user_missed_call')
+
+        import_module.return_value.Service.run.assert_called_once()
+
+    def test_no_retry_after_expiry(self, get_service, retry, import_module):
+        hook = import_module.return_value.Service
+        hook.run.side_effect = HookRetry({'error': 'throttled'}, countdown=30)
+
+        self._run(time.time() - 40)
+
+        retry.assert_not_called()
+        status = get_service.return_value.create_hook_log.call_args.args[2]
+        assert_that(status, equal_to('expired'))
+
+    def test_retry_before_expiry(self, get_service, retry, import_module):
+        hook = import_module.return_value.Service
+        hook.run.side_effect = HookRetry({'error': 'throttled'}, countdown=30)
+
+        self._run(time.time())
+
+        retry.assert_called_once_with(countdown=30)
+
+
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.call_coalescer')
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.import_module')
+@patch.object(hook_runner_task, 'get_service')
+class TestHookRunnerTaskCoalescing(TestCase):
+    def _run(self):
+        hook_runner_task(
+            'hook-uuid',
+            'module:Service',
+            TTL_CONFIG,
+            {'uuid': 'subscription-uuid', 'service': 'mobile'},
+            {'name': 'call_push_notification', 'data': {'call_id': 'c1'}},
+            queued_at=time.time(),
+        )
+
+    def test_cancelled_call_dropped(self, get_service, import_module, coalescer):
+        coalescer.start.return_value = False
+
+        self._run()
+
+        coalescer.start.assert_called_once_with('subscription-uuid:c1')
+        import_module.return_value.Service.run.assert_not_called()
+
+    @patch('wazo_webhookd.plugins.subscription.celery_tasks.metrics')
+    def test_cancelled_call_counted(
+        self, metrics, get_service, import_module, coalescer
+    ):
+        coalescer.start.return_value = False
+
+        self._run()
+
+        metrics.inc.assert_called_once_with(
+            'webhookd_hooks_coalesced_total',
+            {'service': 'mobile', 'event': 'call_push_notification'},
+        )
+
+    def test_call_sent(self, get_service, import_module, coalescer):
+        coalescer.start.return_value = True
+
+        self._run()
+
+        import_module.return_value.Service.run.assert_called_once()
+
+
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.import_module')
+@patch.object(hook_runner_task, 'get_service')
+class TestHookRunnerTaskTimings(TestCase):
+    def test_stage_durations_logged(self, get_service, import_module):
+        import_module.return_value.Service.run.return_value = {'result': 'ok'}
+        now = time.time()
+
+        hook_runner_task(
+            'hook-uuid',
+            'module:Service',
+            TTL_CONFIG,
+            {'uuid': 'subscription-uuid', 'service': 'http'},
+            {'name': 'user_created'},
+            queued_at=now - 1,
+            received_at=now - 2,
+        )
+
+        detail = get_service.return_value.create_hook_log.call_args.args[8]
+        assert_that(
+            detail,
+            has_entries(
+                result='ok',
+                timings=has_entries(dispatch=close_to(1, 0.01), queue=close_to(1, 0.1)),
+            ),
+        )
+
+
+@patch('wazo_webhookd.plugins.subscription.celery_tasks.import_module')
+@patch.object(hook_runner_task, 'get_service')
+class TestHookRunnerTaskIdempotency(TestCase):
+    def _run(self, message_id='message-id', redelivered=False):
+        hook_runner_task(
+            'hook-uuid',
+            'module:Service',
+            TTL_CONFIG,
+            {'uuid': 'subscription-uuid', 'service': 'http'},
+            {'name': 'user_created'},
+            message_id=message_id,
+            redelivered=redelivered,
+        )
+
+    def test_redelivered_hook_not_run_again(self, get_service, import_module):
+        key = idempotency_key('message-id', 'subscription-uuid')
+        get_service.return_value.delivered.return_value = {key}
+
+        self._run(redelivered=True)
+
+        get_service.return_value.delivered.assert_called_once_with([key])
+        import_module.return_value.Service.run.assert_not_called()
+        get_service.return_value.create_hook_log.assert_not_called()
+
+    def test_identical_events_all_delivered(self, get_service, import_module):
+        get_service.return_value.delivered.return_value = {'anything'}
+
+        self._run(message_id=None)
+        self._run(message_id=None)
+        self._run(message_id='message-id')
+
+        get_service.return_value.delivered.assert_not_called()
+        assert_that(import_module.return_value.Service.run.call_count, equal_to(3))
+
+    def test_key_recorded_on_success(self, get_service, import_module):
+        keys = []
+        import_module.return_value.Service.run.side_effect = lambda *args: keys.append(
+            current_key()
+        )
+
+        self._run()
+
+        key = idempotency_key('message-id', 'subscription-uuid')
+        assert_that(keys, contains_exactly(key))
+        assert_that(
+            get_service.return_value.create_hook_log.call_args.kwargs,
+            has_entries(idempotency_key=key),
+        )
+
+    def test_hook_uuid_sent_without_message_id(self, get_service, import_module):
+        keys = []
+        import_module.return_value.Service.run.side_effect = lambda *args: keys.append(
+            current_key()
+        )
+
+        self._run(message_id=None)
+
+        assert_that(keys, contains_exactly('hook-uuid'))
+        assert_that(
+            get_service.return_value.create_hook_log.call_args.kwargs,
+            has_entries(idempotency_key=None),
+        )
@@ -0,0 +1,66 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to
+
+from ..coalescer import CallCoalescer, call_key
+
+
+class TestCallKey(TestCase):
+    def test_key(self):
+        event = {'name': 'call_push_notification', 'data': {'call_id': '123.4'}}
+
+        assert_that(call_key({'uuid': 'sub'}, event), equal_to('sub:123.4'))  # type: ignore
+
+    def test_no_call_id(self):
+        event = {'name': 'call_push_notification', 'data': {}}
+
+        assert_that(call_key({'uuid': 'sub'}, event), equal_to(None))  # type: ignore
+
+
+class TestCallCoalescer(TestCase):
+    def setUp(self):
+        self.coalescer = CallCoalescer(slots=8, window=60)
+
+    def test_cancel_before_push_sent(self):
+        self.coalescer.queued('call')
+
+        assert_that(self.coalescer.cancel('call'), equal_to(True))
+        assert_that(self.coalescer.start('call'), equal_to(False))
+        assert_that(self.coalescer.coalesced(), equal_to(1))
+
+    def test_cancel_after_push_sent(self):
+        self.coalescer.queued('call')
+
+        assert_that(self.coalescer.start('call'), equal_to(True))
+        assert_that(self.coalescer.cancel('call'), equal_to(False))
+        assert_that(self.coalescer.coalesced(), equal_to(0))
+
+    def test_cancel_unknown_call(self):
+        assert_that(self.coalescer.cancel('call'), equal_to(False))
+        assert_that(self.coalescer.start('call'), equal_to(True))
+
+    @patch('wazo_webhookd.plugins.subscription.coalescer.time.monotonic')
+    def test_cancel_after_window(self, monotonic):
+        monotonic.return_value = 0
+        self.coalescer.queued('call')
+
+        monotonic.return_value = 60
+        assert_that(self.coalescer.cancel('call'), equal_to(False))
+
+    def test_disabled(self):
+        self.coalescer.configure(0)
+        self.coalescer.queued('call')
+
+        assert_that(self.coalescer.cancel('call'), equal_to(False))
+
+    def test_slot_in_use_not_overwritten(self):
+        coalescer = CallCoalescer(slots=1, window=60)
+        coalescer.queued('call-1')
+        coalescer.queued('call-2')
+
+        assert_that(coalescer.cancel('call-2'), equal_to(False))
+        assert_that(coalescer.cancel('call-1'), equal_to(True))
@@ -0,0 +1,43 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+
+from hamcrest import assert_that, equal_to, is_not
+from sqlalchemy.dialects import postgresql
+
+from ..idempotency import SeenKeys, idempotency_key, record
+
+
+class TestIdempotencyKey(TestCase):
+    def test_same_key_for_a_message_and_a_subscription(self):
+        key = idempotency_key('message-id', 'subscription-uuid')
+
+        assert_that(idempotency_key('message-id', 'subscription-uuid'), equal_to(key))
+        assert_that(idempotency_key('message-id', 'other-uuid'), is_not(key))
+        assert_that(idempotency_key('other-id', 'subscription-uuid'), is_not(key))
+
+    def test_no_key_without_message_id(self):
+        assert_that(idempotency_key(None, 'subscription-uuid'), equal_to(None))
+
+    def test_record_ignores_keys_already_delivered(self):
+        statement = record('postgresql', {'subscription-uuid': 'key'})
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert_that(
+            sql.endswith('ON CONFLICT (idempotency_key) DO NOTHING'), equal_to(True)
+        )
+
+
+class TestSeenKeys(TestCase):
+    def test_least_recently_seen_key_evicted(self):
+        keys = SeenKeys(size=2)
+        keys.add('a')
+        keys.add('b')
+        assert_that('a' in keys, equal_to(True))
+
+        keys.add('c')
+
+        assert_that('a' in keys, equal_to(True))
+        assert_that('b' in keys, equal_to(False))
+        assert_that('c' in keys, equal_to(True))
@@ -0,0 +1,76 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+
+from hamcrest import assert_that, equal_to
+
+from ..lanes import (
+    DEFAULT_LANE,
+    PRIORITY_LANE,
+    QueueLatencies,
+    event_lane,
+    event_ttl,
+    lane_options,
+)
+
+CONFIG = {
+    'celery': {
+        'priority_queue_name': 'celery-webhookd-priority',
+        'priority_events': ['call_push_notification'],
+    },
+    'hook_event_ttl': {'call_push_notification': 60, 'user_missed_call': 0},
+}
+
+
+class TestEventLane(TestCase):
+    def test_priority_event(self):
+        lane = event_lane(CONFIG, 'call_push_notification')  # type: ignore
+
+        assert_that(lane, equal_to(PRIORITY_LANE))
+        assert_that(
+            lane_options(CONFIG, lane),  # type: ignore
+            equal_to({'queue': 'celery-webhookd-priority'}),
+        )
+
+    def test_other_event(self):
+        lane = event_lane(CONFIG, 'user_missed_call')  # type: ignore
+
+        assert_that(lane, equal_to(DEFAULT_LANE))
+        assert_that(lane_options(CONFIG, lane), equal_to({}))  # type: ignore
+
+    def test_no_priority_queue(self):
+        config = {'celery': dict(CONFIG['celery'], priority_queue_name=None)}
+
+        lane = event_lane(config, 'call_push_notification')  # type: ignore
+
+        assert_that(lane, equal_to(DEFAULT_LANE))
+
+
+class TestEventTTL(TestCase):
+    def test_ttl(self):
+        assert_that(event_ttl(CONFIG, 'call_push_notification'), equal_to(60))  # type: ignore
+
+    def test_no_ttl(self):
+        assert_that(event_ttl(CONFIG, 'user_missed_call'), equal_to(None))  # type: ignore
+        assert_that(event_ttl(CONFIG, 'user_created'), equal_to(None))  # type: ignore
+
+
+class TestQueueLatencies(TestCase):
+    def test_stats(self):
+        latencies = QueueLatencies()
+
+        latencies.observe(PRIORITY_LANE, 0.1)
+        latencies.observe(PRIORITY_LANE, 0.3)
+        latencies.observe(DEFAULT_LANE, -1)
+        latencies.expire(PRIORITY_LANE)
+
+        stats = latencies.stats()
+        assert_that(stats[PRIORITY_LANE]['tasks'], equal_to(2))
+        assert_that(stats[PRIORITY_LANE]['expired'], equal_to(1))
+        self.assertAlmostEqual(stats[PRIORITY_LANE]['average'], 0.2)
+        self.assertAlmostEqual(stats[PRIORITY_LANE]['max'], 0.3)
+        assert_that(
+            stats[DEFAULT_LANE],
+            equal_to({'tasks': 1, 'average': 0.0, 'max': 0.0, 'expired': 0}),
+        )
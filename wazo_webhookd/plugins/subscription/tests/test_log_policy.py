@@ -0,0 +1,89 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to, has_properties
+
+from ..log_policy import LogPolicy
+
+CONFIG = {
+    'hook_log_policy': {
+        'mode': 'sampled',
+        'success_sample_rate': 0.1,
+        'max_body_size': 100,
+    }
+}
+
+
+class TestLogPolicy(TestCase):
+    def test_from_config(self):
+        policy = LogPolicy.from_config(CONFIG, {'uuid': 's1'})
+
+        assert_that(
+            policy,
+            has_properties(mode='sampled', success_sample_rate=0.1, max_body_size=100),
+        )
+
+    def test_overridden_by_metadata(self):
+        subscription = {
+            'uuid': 's1',
+            'metadata': {
+                'log_policy': 'failures',
+                'log_success_sample_rate': '2',
+                'log_max_body_size': '0',
+            },
+        }
+
+        policy = LogPolicy.from_config(CONFIG, subscription)
+
+        assert_that(
+            policy,
+            has_properties(
+                mode='failures', success_sample_rate=1.0, max_body_size=None
+            ),
+        )
+
+    def test_invalid_metadata_ignored(self):
+        subscription = {'uuid': 's1', 'metadata': {'log_policy': 'nothing'}}
+
+        policy = LogPolicy.from_config(CONFIG, subscription)
+
+        assert_that(policy, has_properties(mode='sampled'))
+
+    def test_stored(self):
+        for mode, status, expected in [
+            ('all', 'success', True),
+            ('failures', 'success', False),
+            ('failures', 'expired', True),
+            ('counters', 'error', False),
+        ]:
+            assert_that(LogPolicy(mode).stored(status), equal_to(expected), mode)
+
+    @patch('wazo_webhookd.plugins.subscription.log_policy.random.random')
+    def test_sampled_successes(self, random):
+        policy = LogPolicy('sampled', success_sample_rate=0.1)
+
+        random.return_value = 0.05
+        assert_that(policy.stored('success'), equal_to(True))
+        random.return_value = 0.5
+        assert_that(policy.stored('success'), equal_to(False))
+        assert_that(policy.stored('failure'), equal_to(True))
+
+    def test_bodies_trimmed(self):
+        detail = {'request_body': 'x' * 10, 'response_body': 'ok', 'timings': {}}
+
+        trimmed = LogPolicy(max_body_size=4).trim(detail)
+
+        assert_that(
+            trimmed,
+            equal_to(
+                {
+                    'request_body': 'xxxx... [truncated]',
+                    'response_body': 'ok',
+                    'timings': {},
+                }
+            ),
+        )
+        assert_that(detail['request_body'], equal_to('x' * 10))
@@ -0,0 +1,96 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from unittest import TestCase
+from unittest.mock import Mock, patch, sentinel
+
+from hamcrest import assert_that, is_
+from sqlalchemy import exc
+
+from ..service import SubscriptionService
+
+
+@patch('wazo_webhookd.plugins.subscription.service.registry')
+class TestReadReplica(TestCase):
+    def _service(self, registry):
+        self.primary = Mock()
+        self.replica = Mock()
+        self.router = Mock(primary=self.primary, replica=self.replica)
+        self.router.reader.return_value = self.replica
+        registry.get_session.return_value = self.primary
+        registry.get_replica_router.return_value = self.router
+        return SubscriptionService({}, Mock())  # type: ignore
+
+    def _found(self, session, result):
+        query = session.return_value.query.return_value
+        query.filter.return_value.one_or_none.return_value = result
+
+    def test_reads_from_replica(self, registry):
+        service = self._service(registry)
+        self._found(self.replica, sentinel.subscription)
+
+        assert_that(service.get('uuid'), is_(sentinel.subscription))
+        self.primary.assert_not_called()
+        self.router.replica_failed.assert_not_called()
+
+    def test_replica_error_retried_on_primary(self, registry):
+        service = self._service(registry)
+        error = exc.OperationalError('SELECT', {}, Exception('connection lost'))
+        self.replica.return_value.query.side_effect = error
+        self._found(self.primary, sentinel.subscription)
+
+        assert_that(service.get('uuid'), is_(sentinel.subscription))
+        self.router.replica_failed.assert_called_once_with()
+        self.replica.remove.assert_called_once_with()
+        self.primary.remove.assert_called_once_with()
+
+    def test_primary_error_not_retried(self, registry):
+        service = self._service(registry)
+        self.router.reader.return_value = self.primary
+        error = exc.OperationalError('SELECT', {}, Exception('connection lost'))
+        self.primary.return_value.query.side_effect = error
+
+        self.assertRaises(exc.OperationalError, service.get, 'uuid')
+        self.router.replica_failed.assert_not_called()
+        assert_that(self.primary.call_count, is_(1))
+
+
+@patch('wazo_webhookd.plugins.subscription.service.metrics')
+@patch('wazo_webhookd.plugins.subscription.service.registry')
+class TestCreateHookLog(TestCase):
+    def _service(self, registry):
+        self.session = Mock()
+        registry.get_session.return_value.return_value = self.session
+        registry.get_replica_router.return_value = None
+        service = SubscriptionService({}, Mock())  # type: ignore
+        service._record_stats = Mock()  # type: ignore
+        return service
+
+    def _create(self, service):
+        service.create_hook_log(
+            'hook-uuid', 'subscription-uuid', 'success', 1, 3, None, None, {}, {}
+        )
+
+    def test_counted_once_committed(self, registry, metrics):
+        service = self._service(registry)
+
+        self._create(service)
+
+        metrics.inc.assert_called_once_with(
+            'webhookd_hooks_total', {'status': 'success'}
+        )
+
+    def test_not_counted_when_subscription_deleted(self, registry, metrics):
+        service = self._service(registry)
+        self.session.commit.side_effect = [
+            exc.IntegrityError(
+                'INSERT', {}, Exception('violates foreign key constraint')
+            ),
+            None,
+        ]
+
+        self._create(service)
+
+        metrics.inc.assert_not_called()
@@ -0,0 +1,118 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import datetime
+from unittest import TestCase
+
+from hamcrest import assert_that, contains_inanyorder, equal_to, has_entries
+from sqlalchemy.dialects import postgresql
+
+from .. import stats
+
+STARTED_AT = datetime.datetime(2026, 1, 1, 10, 5, 30)
+
+
+def _hook_log(subscription_uuid, status, seconds, started_at=STARTED_AT):
+    return {
+        'subscription_uuid': subscription_uuid,
+        'status': status,
+        'started_at': started_at,
+        'ended_at': started_at + datetime.timedelta(seconds=seconds),
+    }
+
+
+class TestRollup(TestCase):
+    def test_by_subscription_and_hour(self):
+        later = STARTED_AT + datetime.timedelta(hours=1)
+
+        rows = stats.rollup(
+            [
+                _hook_log('sub-1', 'success', 0.05),
+                _hook_log('sub-1', 'failure', 3),
+                _hook_log('sub-1', 'expired', 0),
+                _hook_log('sub-1', 'error', 45, started_at=later),
+                _hook_log('sub-2', 'success', 0.3),
+            ]
+        )
+
+        bucket = datetime.datetime(2026, 1, 1, 10)
+        assert_that(
+            rows,
+            contains_inanyorder(
+                has_entries(
+                    subscription_uuid='sub-1',
+                    bucket=bucket,
+                    attempts=3,
+                    success=1,
+                    failure=1,
+                    expired=1,
+                    error=0,
+                    duration_sum=3.05,
+                    duration_le_100ms=1,
+                    duration_le_5s=1,
+                ),
+                has_entries(
+                    subscription_uuid='sub-1',
+                    bucket=bucket + datetime.timedelta(hours=1),
+                    attempts=1,
+                    error=1,
+                    duration_gt_30s=1,
+                ),
+                has_entries(
+                    subscription_uuid='sub-2',
+                    bucket=bucket,
+                    attempts=1,
+                    success=1,
+                    duration_le_500ms=1,
+                ),
+            ),
+        )
+
+    def test_upsert_adds_the_increments(self):
+        rows = stats.rollup([_hook_log('sub-1', 'success', 0.05)])
+
+        sql = str(
+            stats.upsert('postgresql', rows).compile(dialect=postgresql.dialect())
+        )
+
+        assert_that('ON CONFLICT (subscription_uuid, bucket) DO UPDATE' in sql)
+        assert_that(
+            'success = (webhookd_subscription_stats.success + excluded.success)' in sql
+        )
+
+
+class TestSummarize(TestCase):
+    def test_percentiles_are_interpolated_in_their_bucket(self):
+        totals = stats.add(
+            {},
+            stats.rollup(
+                [_hook_log('sub-1', 'success', 0.05)] * 2
+                + [_hook_log('sub-1', 'success', 0.2)] * 2
+                + [_hook_log('sub-1', 'failure', 4)]
+            )[0],
+        )
+
+        assert_that(
+            stats.summarize(totals),
+            equal_to(
+                {
+                    'attempts': 5,
+                    'success': 4,
+                    'failure': 1,
+                    'error': 0,
+                    'expired': 0,
+                    'duration': {'average': 0.9, 'p50': 0.138, 'p95': 4.375},
+                }
+            ),
+        )
+
+    def test_no_attempts(self):
+        assert_that(
+            stats.summarize({})['duration'],
+            equal_to({'average': None, 'p50': None, 'p95': None}),
+        )
+
+    def test_slowest_bucket_has_no_upper_bound(self):
+        histogram = [0] * 8 + [3]
+
+        assert_that(stats.percentile(histogram, 0.95), equal_to(30.0))
@@ -0,0 +1,134 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .types import ProfilingConfigDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = '/var/tmp/wazo-webhookd/profiles'
+DEFAULT_INTERVAL = 0.01
+DEFAULT_MAX_DURATION = 300
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})'
+
+
+def collapse(thread_name: str, frame: FrameType | None) -> str:
+    """Return the stack of a thread in the collapsed format, root first"""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Sample the stacks of all the threads of the main process and of the
+    Celery workers for a bounded duration.
+
+    The end of the profiling session is stored in shared memory allocated
+    before the workers are forked: the main process samples in a thread
+    started on demand, and each worker starts its own sampling thread when it
+    receives a task during the session. Nothing runs while profiling is off.
+
+    At the end of the session, each process writes its samples aggregated as
+    collapsed stacks, one `<stack> <count>` line per distinct stack, readable
+    by flame graph tools.
+    """
+
+    def __init__(self) -> None:
+        self._deadline = multiprocessing.Value('d', 0.0, lock=False)
+        self._directory = DEFAULT_DIRECTORY
+        self._interval = DEFAULT_INTERVAL
+        self._max_duration: float = DEFAULT_MAX_DURATION
+        self._main_pid = os.getpid()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def configure(self, config: ProfilingConfigDict) -> None:
+        self._directory = config.get('directory', DEFAULT_DIRECTORY)
+        self._interval = config.get('interval', DEFAULT_INTERVAL)
+        self._max_duration = config.get('max_duration', DEFAULT_MAX_DURATION)
+        self._main_pid = os.getpid()
+
+    def running(self) -> bool:
+        return self._deadline.value > time.time()
+
+    def start(self, duration: float | None = None) -> None:
+        duration = min(duration or self._max_duration, self._max_duration)
+        logger.info('Profiling for %s seconds in %s', duration, self._directory)
+        self._deadline.value = time.time() + duration
+        self.follow()
+
+    def stop(self) -> None:
+        logger.info('Profiling stopped')
+        self._deadline.value = 0.0
+
+    def follow(self) -> None:
+        """Start sampling the current process if a session is running"""
+        if not self.running():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._sample, name='profiler', daemon=True
+            )
+            self._thread.start()
+
+    def _sample(self) -> None:
+        samples: Counter[str] = Counter()
+        started_at = time.time()
+        current = threading.get_ident()
+        while time.time() < self._deadline.value:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != current:
+                    samples[collapse(names.get(ident, str(ident)), frame)] += 1
+            time.sleep(self._interval)
+        self._write(samples, started_at)
+
+    def _write(self, samples: Counter[str], started_at: float) -> None:
+        if not samples:
+            return
+        process = 'main' if os.getpid() == self._main_pid else 'worker'
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(started_at))
+        path = os.path.join(
+            self._directory, f'{process}-{os.getpid()}-{stamp}.collapsed'
+        )
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            with open(path, 'w') as f:
+                for stack, count in samples.most_common():
+                    f.write(f'{stack} {count}\n')
+        except OSError as e:
+            logger.error('Cannot write profile %s: %s', path, e)
+            return
+        logger.info('Profile of %s samples written to %s', sum(samples.values()), path)
+
+    def _reset_after_fork(self) -> None:
+        # NOTE: the sampling thread of the parent does not exist in the child
+        self._lock = threading.Lock()
+        self._thread = None
+
+
+# NOTE: must be created before the Celery workers are forked, which is the case
+# when the controller imports the celery module
+profiler = SamplingProfiler()
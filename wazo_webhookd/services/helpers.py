@@ -6,7 +6,10 @@ from __future__ import annotations
 import contextlib
 import json
 import logging
-from typing import Any, TypedDict
+import weakref
+from collections.abc import Iterable
+from email.message import Message
+from typing import Any, TypedDict, cast
 
 # TODO(sileht): move the http plugin to httpx too.
 import httpx
@@ -14,15 +17,25 @@ import requests
 
 logger = logging.getLogger(__name__)
 
+# NOTE: bytes of the request and response bodies kept in the hook details
+MAX_BODY_SIZE = 65536
+_CHUNK_SIZE = 8192
+
+_response_bodies: weakref.WeakKeyDictionary[
+    httpx.Response | requests.Response, tuple[bytes, bool]
+] = weakref.WeakKeyDictionary()
+
 
 class RequestDetailsDict(TypedDict):
     request_method: str
     request_url: str
     request_body: dict[str, str] | str | None
+    request_body_truncated: bool
     request_headers: dict[str, str]
     response_status_code: int | None
     response_headers: dict[str, str]
     response_body: dict[str, str] | str | None
+    response_body_truncated: bool
 
 
 class ErrorRequestDetailsDict(RequestDetailsDict):
@@ -36,37 +49,147 @@ class HookExpectedError(Exception):
 
 
 class HookRetry(Exception):
-    def __init__(self, detail: ErrorRequestDetailsDict | str | dict[str, Any]) -> None:
+    def __init__(
+        self,
+        detail: ErrorRequestDetailsDict | str | dict[str, Any],
+        countdown: float | None = None,
+    ) -> None:
         self.detail = detail
+        # NOTE: delay asked by the remote service, e.g. with Retry-After
+        self.countdown = countdown
         super().__init__()
 
 
-def _decode(data: str | bytes | None) -> str | dict[str, Any] | None:
+def parse_content_type(content_type: str) -> tuple[str, dict[str, str]]:
+    """
+    https://developer.mozilla.org/en-US/docs/Web/HTTP/Reference/Headers/Content-Type
+    """
+    msg = Message()
+    msg['content-type'] = content_type
+    media_type = msg.get_content_type()
+    if _params := msg.get_params():
+        params = {
+            key.lower(): value
+            for key, value in _params
+            if key.lower() != media_type.lower() and value
+        }
+    else:
+        params = {}
+    return (media_type, params)
+
+
+def _decode(
+    data: str | bytes | None, content_type: str | None, truncated: bool = False
+) -> str | dict[str, Any] | None:
     if data is None:
         return None
 
+    media_type, params = parse_content_type(content_type or 'text/plain')
     if isinstance(data, bytes):
-        text = data.decode()
+        try:
+            text = data.decode(params.get('charset', 'utf-8'), errors='replace')
+        except LookupError:
+            text = data.decode('utf-8', errors='replace')
     else:
         text = data
 
+    if truncated or not (
+        media_type == 'application/json' or media_type.endswith('+json')
+    ):
+        return text
     try:
         return json.loads(text)
     except json.JSONDecodeError:
         return text
 
 
+def _read_response(
+    response: httpx.Response | requests.Response, max_size: int
+) -> tuple[bytes, bool]:
+    """Read at most `max_size` bytes of the body of a response, once.
+
+    The body of a streamed response is not kept by the response, so it is
+    remembered for the error handlers, which get the same response.
+    """
+    if (body := _response_bodies.get(response)) is not None:
+        return body
+    chunks: Iterable[bytes]
+    if isinstance(response, httpx.Response):
+        try:
+            chunks = [response.content]
+        except httpx.ResponseNotRead:
+            chunks = response.iter_bytes(_CHUNK_SIZE)
+    else:
+        chunks = response.iter_content(_CHUNK_SIZE)
+
+    data = bytearray()
+    truncated = False
+    for chunk in chunks:
+        data += chunk[: max_size + 1 - len(data)]
+        if len(data) > max_size:
+            del data[max_size:]
+            truncated = True
+            break
+    body = _response_bodies[response] = (bytes(data), truncated)
+    return body
+
+
+def _request_detail(
+    request: httpx.Request | requests.PreparedRequest, max_size: int
+) -> dict[str, Any]:
+    if isinstance(request, requests.PreparedRequest):
+        data = request.body
+    else:
+        data = request.read()
+    truncated = data is not None and len(data) > max_size
+    if truncated:
+        data = data[:max_size]  # type: ignore[index]
+    return {
+        "request_method": str(request.method or ""),
+        "request_url": str(request.url),
+        "request_body": _decode(data, request.headers.get('Content-Type'), truncated),
+        "request_body_truncated": truncated,
+        "request_headers": dict(request.headers),
+    }
+
+
+def _detail(
+    request: httpx.Request | requests.PreparedRequest,
+    response: httpx.Response | requests.Response | None,
+    max_size: int,
+) -> RequestDetailsDict:
+    detail = _request_detail(request, max_size)
+    if response is None:
+        detail.update(
+            response_status_code=None,
+            response_headers={},
+            response_body="",
+            response_body_truncated=False,
+        )
+    else:
+        data, truncated = _read_response(response, max_size)
+        detail.update(
+            response_status_code=response.status_code,
+            response_headers=dict(response.headers),
+            response_body=_decode(
+                data, response.headers.get('Content-Type'), truncated
+            ),
+            response_body_truncated=truncated,
+        )
+    return cast(RequestDetailsDict, detail)
+
+
 @contextlib.contextmanager
-def requests_automatic_hook_retry(task):
+def requests_automatic_hook_retry(task, max_body_size: int = MAX_BODY_SIZE):
     try:
         yield
     except (requests.exceptions.HTTPError, httpx.HTTPError) as exc:
         if exc.request is None or exc.response is None:
             raise ValueError('No request/response in error object')
-        if isinstance(exc.request, requests.PreparedRequest):
-            req_data = exc.request.body
-        elif isinstance(exc.request, httpx.Request):
-            req_data = exc.request.content  # type: ignore
+        detail = cast(
+            ErrorRequestDetailsDict,
+            {'error': str(exc), **_detail(exc.request, exc.response, max_body_size)},
+        )
         if exc.response.status_code == 410:
             logger.info(
                 "http request fail, service is gone (%d/%d): '%s %s [%s]' %s",
@@ -75,20 +198,9 @@ def requests_automatic_hook_retry(task):
                 exc.request.method,
                 exc.request.url,
                 exc.response.status_code,
-                _decode(exc.response.text),
-            )
-            raise HookExpectedError(
-                {
-                    "error": str(exc),
-                    "request_method": str(exc.request.method),
-                    "request_url": str(exc.request.url),
-                    "request_body": _decode(req_data),
-                    "request_headers": dict(exc.request.headers),
-                    "response_status_code": exc.response.status_code,
-                    "response_headers": dict(exc.response.headers),
-                    "response_body": _decode(exc.response.text),
-                }
+                detail['response_body'],
             )
+            raise HookExpectedError(detail)
         else:
             logger.info(
                 "http request fail, retrying (%s/%s): '%s %s [%s]' %s",
@@ -97,20 +209,9 @@ def requests_automatic_hook_retry(task):
                 exc.request.method,
                 exc.request.url,
                 exc.response.status_code,
-                _decode(exc.response.text),
-            )
-            raise HookRetry(
-                {
-                    "error": str(exc),
-                    "request_method": str(exc.request.method),
-                    "request_url": str(exc.request.url),
-                    "request_body": _decode(req_data),
-                    "request_headers": dict(exc.request.headers),
-                    "response_status_code": exc.response.status_code,
-                    "response_headers": dict(exc.response.headers),
-                    "response_body": _decode(exc.response.text),
-                }
+                detail['response_body'],
             )
+            raise HookRetry(detail)
 
     except (
         httpx.TimeoutException,
@@ -128,37 +229,10 @@ def requests_automatic_hook_retry(task):
             request.url,
             exc,
         )
-        if isinstance(request, requests.PreparedRequest):
-            req_data = request.body
-        else:
-            req_data = request.content
-        raise HookRetry(
-            {
-                "error": str(exc),
-                "request_method": str(request.method),
-                "request_url": str(request.url),
-                "request_body": _decode(req_data),
-                "request_headers": dict(request.headers),
-                "response_status_code": None,
-                "response_headers": {},
-                "response_body": "",
-            }
-        )
+        raise HookRetry({"error": str(exc), **_detail(request, None, max_body_size)})
 
 
 def requests_automatic_detail(
-    response: httpx.Response | requests.Response,
+    response: httpx.Response | requests.Response, max_body_size: int = MAX_BODY_SIZE
 ) -> RequestDetailsDict:
-    if isinstance(response.request, requests.PreparedRequest):
-        req_data = response.request.body
-    else:
-        req_data = response.request.read()
-    return {
-        "request_method": response.request.method or "",
-        "request_url": str(response.request.url),
-        "request_body": _decode(req_data),
-        "request_headers": dict(response.request.headers),
-        "response_status_code": response.status_code,
-        "response_headers": dict(response.headers),
-        "response_body": _decode(response.text),
-    }
+    return _detail(response.request, response, max_body_size)
@@ -7,15 +7,19 @@ import json
 import logging
 import socket
 import urllib.parse
-from email.message import Message
 from typing import TYPE_CHECKING, NamedTuple
 
 import requests
 from celery import Task
 from jinja2.sandbox import SandboxedEnvironment
 
+from wazo_webhookd import timeline
+from wazo_webhookd.metrics import metrics
+from wazo_webhookd.plugins.subscription import idempotency
 from wazo_webhookd.services.helpers import (
+    MAX_BODY_SIZE,
     RequestDetailsDict,
+    parse_content_type,
     requests_automatic_detail,
     requests_automatic_hook_retry,
 )
@@ -39,24 +43,6 @@ class RequestTimeouts(NamedTuple):
 REQUEST_TIMEOUTS = RequestTimeouts(connect=5, read=15)
 
 
-def parse_content_type(content_type: str) -> tuple[str, dict[str, str]]:
-    """
-    https://developer.mozilla.org/en-US/docs/Web/HTTP/Reference/Headers/Content-Type
-    """
-    msg = Message()
-    msg['content-type'] = content_type
-    media_type = msg.get_content_type()
-    if _params := msg.get_params():
-        params = {
-            key.lower(): value
-            for key, value in _params
-            if key.lower() != media_type.lower() and value
-        }
-    else:
-        params = {}
-    return (media_type, params)
-
-
 def build_content_type_header(mimetype: str, options: dict[str, str]) -> str:
     content_type_options = "; ".join(map("=".join, options.items()))
     return f"{mimetype}; {content_type_options}" if content_type_options else mimetype
@@ -104,14 +90,19 @@ class Service:
         data = _data.encode(ct_options['charset'])
 
         headers['Content-Type'] = build_content_type_header(ct_mimetype, ct_options)
+        if idempotency_key := idempotency.current_key():
+            headers[idempotency.HEADER] = idempotency_key
 
         verify = options.get('verify_certificate')
         if verify:
             verify = True if verify == 'true' else verify
             verify = False if verify == 'false' else verify
 
-        with requests_automatic_hook_retry(task):
+        max_body_size = config.get('hook_max_body_size', MAX_BODY_SIZE)
+        with requests_automatic_hook_retry(task, max_body_size):
             session = requests.Session()
+            timeline.mark('request_sent')
+            # NOTE: streamed, only the beginning of large responses is read
             with session.request(
                 options['method'],
                 url,
@@ -119,9 +110,17 @@ class Service:
                 verify=verify,
                 headers=headers,
                 timeout=REQUEST_TIMEOUTS,
+                stream=True,
             ) as r:
+                timeline.mark('response_received')
+                metrics.inc(
+                    'webhookd_http_responses_total',
+                    {'status_class': f'{r.status_code // 100}xx'},
+                )
+                # NOTE: read before the response is closed, errors included
+                detail = requests_automatic_detail(r, max_body_size)
                 r.raise_for_status()  # type: ignore
-                return requests_automatic_detail(r)
+                return detail
 
     @staticmethod
     def url_is_localhost(url: str) -> bool:
@@ -0,0 +1,175 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+import h2.errors
+import h2.events
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MAX_CLIENTS = 64
+MAX_CLIENT_AGE = 3600
+
+APNS_HEADERS = {
+    'apns-expiration': '0',
+    'User-Agent': 'wazo-webhookd',
+}
+
+ClientKey = tuple[str, int | None, str | None]
+
+
+class _PooledClient(NamedTuple):
+    client: httpx.Client
+    created_at: float
+
+
+class ApnsClientPool:
+    """HTTP/2 clients to APNs kept open between pushes of a worker process.
+
+    There is one client per host, port and client certificate, so pushes reuse
+    an established TLS connection and are multiplexed on it. Clients are
+    recycled after `max_age` seconds and a push is retried once on a new
+    connection when APNs refused its stream, i.e. did not process it.
+    """
+
+    def __init__(
+        self,
+        timeout: httpx.Timeout,
+        max_clients: int = MAX_CLIENTS,
+        max_age: float = MAX_CLIENT_AGE,
+    ) -> None:
+        self._timeout = timeout
+        self._max_clients = max_clients
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._clients: OrderedDict[ClientKey, _PooledClient] = OrderedDict()
+
+    def post(
+        self,
+        url: str,
+        headers: dict[str, Any],
+        payload: dict[str, Any],
+        certificate: str | None = None,
+        private_key: str | None = None,
+    ) -> httpx.Response:
+        parsed_url = httpx.URL(url)
+        key = (parsed_url.host, parsed_url.port, _fingerprint(certificate, private_key))
+        client = self._get_client(key, certificate, private_key)
+        stream_ids: list[int] = []
+
+        def trace(name: str, info: dict[str, Any]) -> None:
+            if name == 'http2.send_request_headers.started':
+                stream_ids.append(info['stream_id'])
+
+        try:
+            return client.post(
+                url, headers=headers, json=payload, extensions={'trace': trace}
+            )
+        except httpx.RemoteProtocolError as e:
+            self._discard(key, client)
+            # NOTE: a push on a stream APNs did not refuse may have been sent
+            # to the device, sending it again could show it twice
+            if not _refused(e, stream_ids):
+                raise
+            logger.info('APNs refused the push to %s (%s), retrying', key[0], e)
+            client = self._get_client(key, certificate, private_key)
+            return client.post(url, headers=headers, json=payload)
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [pooled.client for pooled in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    def _get_client(
+        self, key: ClientKey, certificate: str | None, private_key: str | None
+    ) -> httpx.Client:
+        now = time.monotonic()
+        expired: list[httpx.Client] = []
+        with self._lock:
+            if pooled := self._clients.get(key):
+                if now - pooled.created_at < self._max_age:
+                    self._clients.move_to_end(key)
+                    return pooled.client
+                expired.append(self._clients.pop(key).client)
+
+            client = self._new_client(certificate, private_key)
+            self._clients[key] = _PooledClient(client, now)
+            while len(self._clients) > self._max_clients:
+                expired.append(self._clients.popitem(last=False)[1].client)
+
+        for old_client in expired:
+            old_client.close()
+        return client
+
+    def _discard(self, key: ClientKey, client: httpx.Client) -> None:
+        with self._lock:
+            if (pooled := self._clients.get(key)) and pooled.client is client:
+                del self._clients[key]
+        client.close()
+
+    def _new_client(
+        self, certificate: str | None, private_key: str | None
+    ) -> httpx.Client:
+        ssl_context = httpx.create_ssl_context(http2=True)
+        if certificate and private_key:
+            _load_cert_chain(ssl_context, certificate, private_key)
+        return httpx.Client(
+            http2=True,
+            headers=APNS_HEADERS,
+            verify=ssl_context,
+            timeout=self._timeout,
+        )
+
+    def _reset_after_fork(self) -> None:
+        # NOTE: the connections belong to the parent process, leave them open
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()
+
+
+def _refused(error: httpx.RemoteProtocolError, stream_ids: list[int]) -> bool:
+    """Whether the server refused the stream of the request without processing
+    it: reset with REFUSED_STREAM, or a GOAWAY for the streams after ours"""
+    cause = error.__cause__
+    event = cause.args[0] if cause is not None and cause.args else None
+    if isinstance(event, h2.events.StreamReset):
+        return event.error_code == h2.errors.ErrorCodes.REFUSED_STREAM
+    if isinstance(event, h2.events.ConnectionTerminated):
+        last_stream_id = event.last_stream_id
+        return (
+            bool(stream_ids)
+            and last_stream_id is not None
+            and (stream_ids[-1] > last_stream_id)
+        )
+    return False
+
+
+def _fingerprint(certificate: str | None, private_key: str | None) -> str | None:
+    if not (certificate and private_key):
+        return None
+    return hashlib.sha256(f'{certificate}\n{private_key}'.encode()).hexdigest()
+
+
+def _load_cert_chain(
+    ssl_context: ssl.SSLContext, certificate: str, private_key: str
+) -> None:
+    # NOTE: ssl only loads certificates from a path, use an anonymous
+    # in-memory file so that the private key is never written to disk
+    fd = os.memfd_create('apns-certificate', os.MFD_CLOEXEC)
+    with os.fdopen(fd, 'w') as cert_file:
+        cert_file.write(certificate + '\r\n')
+        cert_file.write(private_key)
+        cert_file.flush()
+        ssl_context.load_cert_chain(f'/proc/self/fd/{fd}')
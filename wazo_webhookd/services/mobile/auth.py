@@ -0,0 +1,83 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from wazo_auth_client import Client as AuthClient
+
+if TYPE_CHECKING:
+    from wazo_auth_client.types import TokenDict
+
+logger = logging.getLogger(__name__)
+
+TOKEN_EXPIRATION = 3600
+TOKEN_REFRESH_MARGIN = 300
+
+
+class _CachedToken(NamedTuple):
+    token: str
+    jwt: str
+    refresh_at: float
+
+
+class TokenCache:
+    """wazo-auth tokens of the mobile service, shared by every push of a process.
+
+    A token is renewed `refresh_margin` seconds before it expires, so pushes
+    never use a token about to expire. Concurrent renewals of the same token
+    are serialized, only the first one reaches wazo-auth.
+    """
+
+    def __init__(
+        self,
+        expiration: int = TOKEN_EXPIRATION,
+        refresh_margin: int = TOKEN_REFRESH_MARGIN,
+    ) -> None:
+        self._expiration = expiration
+        self._refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._tokens: dict[tuple, _CachedToken] = {}
+
+    def get(self, auth_config: dict[str, Any]) -> tuple[str, str]:
+        key = self._key(auth_config)
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached is None or time.monotonic() >= cached.refresh_at:
+                cached = self._tokens[key] = self._new_token(auth_config)
+        return cached.token, cached.jwt
+
+    def invalidate(self, auth_config: dict[str, Any]) -> None:
+        with self._lock:
+            self._tokens.pop(self._key(auth_config), None)
+
+    def _new_token(self, auth_config: dict[str, Any]) -> _CachedToken:
+        start = time.monotonic()
+        token: TokenDict = AuthClient(**auth_config).token.new(
+            'wazo_user', expiration=self._expiration
+        )
+        logger.debug('New wazo-auth token created in %.3fs', time.monotonic() - start)
+        return _CachedToken(
+            token=token['token'],
+            jwt=token.get('metadata', {}).get('jwt', ''),
+            refresh_at=start + self._expiration - self._refresh_margin,
+        )
+
+    @staticmethod
+    def _key(auth_config: dict[str, Any]) -> tuple:
+        return tuple(
+            auth_config.get(name)
+            for name in ('host', 'port', 'prefix', 'https', 'username')
+        )
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+
+token_cache = TokenCache()
+os.register_at_fork(after_in_child=token_cache._reset_after_fork)
@@ -0,0 +1,200 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Generic, NamedTuple, TypedDict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+GENERATION_SLOTS = 65_536
+
+
+class CacheStatsDict(TypedDict):
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class _Entry(NamedTuple):
+    value: Any
+    generation: int
+    expires_at: float
+
+
+class SharedGenerations:
+    """Invalidation counters shared with the forked Celery worker processes.
+
+    Keys are hashed into a fixed number of slots allocated in shared memory
+    before the workers are forked. Bumping a key invalidates the entries cached
+    for it in every process, and rarely the entries of keys sharing its slot.
+    """
+
+    def __init__(self, slots: int = GENERATION_SLOTS) -> None:
+        self._slots = slots
+        self._generations = multiprocessing.Array('Q', slots, lock=False)
+
+    def get(self, key: str) -> int:
+        return self._generations[self._slot(key)]
+
+    def bump(self, key: str) -> None:
+        # NOTE: only the bus consumer thread of the main process writes
+        self._generations[self._slot(key)] += 1
+
+    def _slot(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self._slots
+
+
+class SharedCounters:
+    def __init__(self, names: list[str]) -> None:
+        self._index = {name: i for i, name in enumerate(names)}
+        self._counters = multiprocessing.Array('Q', len(names) * 2)
+
+    def hit(self, name: str) -> None:
+        with self._counters.get_lock():
+            self._counters[self._index[name] * 2] += 1
+
+    def miss(self, name: str) -> None:
+        with self._counters.get_lock():
+            self._counters[self._index[name] * 2 + 1] += 1
+
+    def stats(self) -> dict[str, CacheStatsDict]:
+        with self._counters.get_lock():
+            counters = self._counters[:]
+        result: dict[str, CacheStatsDict] = {}
+        for name, i in self._index.items():
+            hits, misses = counters[i * 2], counters[i * 2 + 1]
+            total = hits + misses
+            result[name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / total if total else 0.0,
+            }
+        return result
+
+
+class InvalidatedCache(Generic[T]):
+    """Bounded LRU cache of one process, invalidated through SharedGenerations."""
+
+    def __init__(
+        self,
+        name: str,
+        generations: SharedGenerations,
+        counters: SharedCounters,
+        ttl: float,
+        max_entries: int,
+    ) -> None:
+        self.name = name
+        self._generations = generations
+        self._counters = counters
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def get_or_load(self, key: str, load: Callable[[], T]) -> T:
+        generation = self._generations.get(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry
+                and entry.generation == generation
+                and entry.expires_at > time.monotonic()
+            ):
+                self._entries.move_to_end(key)
+                self._counters.hit(self.name)
+                return entry.value
+
+        self._counters.miss(self.name)
+        # NOTE: the generation is read before loading, so an invalidation
+        # received while loading leaves a stale entry that is never used
+        value = load()
+        with self._lock:
+            self._entries[key] = _Entry(value, generation, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+
+class ExternalDataCache:
+    """wazo-auth data needed to send a push, cached in each worker process.
+
+    External mobile tokens are invalidated by the auth_user_external_auth_*
+    events received by the main process. wazo-auth publishes no event when a
+    tenant mobile configuration changes, so those expire after a short TTL.
+    """
+
+    EXTERNAL_TOKENS = 'external_tokens'
+    USER_TENANTS = 'user_tenants'
+    TENANT_CONFIGS = 'tenant_configs'
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self._generations = SharedGenerations()
+        self._counters = SharedCounters(
+            [self.EXTERNAL_TOKENS, self.USER_TENANTS, self.TENANT_CONFIGS]
+        )
+        self._external_tokens: InvalidatedCache[Any] = InvalidatedCache(
+            self.EXTERNAL_TOKENS,
+            self._generations,
+            self._counters,
+            ttl=300,
+            max_entries=max_entries,
+        )
+        self._user_tenants: InvalidatedCache[str] = InvalidatedCache(
+            self.USER_TENANTS,
+            self._generations,
+            self._counters,
+            ttl=3600,
+            max_entries=max_entries,
+        )
+        self._tenant_configs: InvalidatedCache[Any] = InvalidatedCache(
+            self.TENANT_CONFIGS,
+            self._generations,
+            self._counters,
+            ttl=60,
+            max_entries=max_entries,
+        )
+
+    def external_tokens(self, user_uuid: str, load: Callable[[], T]) -> T:
+        return self._external_tokens.get_or_load(f'user:{user_uuid}', load)
+
+    def user_tenant(self, user_uuid: str, load: Callable[[], str]) -> str:
+        return self._user_tenants.get_or_load(f'user:{user_uuid}', load)
+
+    def tenant_config(self, tenant_uuid: str, load: Callable[[], T]) -> T:
+        return self._tenant_configs.get_or_load(f'tenant:{tenant_uuid}', load)
+
+    def invalidate_user(self, user_uuid: str) -> None:
+        logger.debug('Invalidating cached mobile data of user %s', user_uuid)
+        self._generations.bump(f'user:{user_uuid}')
+
+    def stats(self) -> dict[str, CacheStatsDict]:
+        return self._counters.stats()
+
+    def _reset_after_fork(self) -> None:
+        for cache in (
+            self._external_tokens,
+            self._user_tenants,
+            self._tenant_configs,
+        ):
+            cache._reset_after_fork()
+
+
+# NOTE: must be created before the Celery workers are forked, which is the
+# case when the mobile celery tasks are loaded
+external_data_cache = ExternalDataCache()
+os.register_at_fork(after_in_child=external_data_cache._reset_after_fork)
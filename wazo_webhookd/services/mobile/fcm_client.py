@@ -1,23 +1,28 @@
-# Copyright 2024-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2024-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 # Copyright 2019 Emmanuel Adegbite
 # SPDX-License-Identifier: MIT
 
+import email.utils
 import json
 import logging
+import math
 import os
 import threading
-import time
+from datetime import datetime, timezone
 from typing import Protocol
 
-import google.auth.transport.requests
 import requests
-from google.oauth2 import service_account
 from pyfcm import FCMNotification as FCMNotificationLegacyBase
 from requests.adapters import HTTPAdapter
 from urllib3 import Retry
 
+from wazo_webhookd import timeline
+
+from .fcm_credentials import fcm_credentials
+from .ratelimit import fcm_rate_governor
+
 logger = logging.getLogger(__name__)
 
 
@@ -85,9 +90,31 @@ class RetryAfterException(Exception):
     """
 
     def __init__(self, delay):
+        super().__init__(f"FCM asked to retry after {delay} seconds")
         self.delay = delay
 
 
+def retry_after(response):
+    """
+    Delay in seconds asked by the Retry-After header of a response, if any
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        delay = int(value)
+    except ValueError:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            logger.warning('Invalid FCM Retry-After header: %s', value)
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        delay = math.ceil((date - datetime.now(timezone.utc)).total_seconds())
+    return delay if delay > 0 else None
+
+
 class BaseAPI:
     """
     Base class for the API wrapper for FCM
@@ -149,37 +176,44 @@ class BaseAPI:
 
     @property
     def requests_session(self):
-        if getattr(self.thread_local, "requests_session", None) is None:
-            retries = Retry(
-                backoff_factor=1,
-                status_forcelist=[502, 503],
-                allowed_methods=(Retry.DEFAULT_ALLOWED_METHODS | frozenset(["POST"])),
+        if self.custom_adapter is None and self.FCM_REQ_PROXIES is None:
+            # NOTE: reuse the connections of the service account between pushes
+            return fcm_credentials.session(
+                self._FCM_ACCOUNT_INFO, self.FCM_SCOPES, self._new_requests_session
             )
-            adapter = self.custom_adapter or HTTPAdapter(max_retries=retries)
-            self.thread_local.requests_session = requests.Session()
-            self.thread_local.requests_session.mount("http://", adapter)
-            self.thread_local.requests_session.mount("https://", adapter)
-            self.thread_local.requests_session.headers.update(self.request_headers())
+        if getattr(self.thread_local, "requests_session", None) is None:
+            self.thread_local.requests_session = self._new_requests_session()
 
         return self.thread_local.requests_session
 
+    def _new_requests_session(self):
+        retries = Retry(
+            backoff_factor=1,
+            status_forcelist=[502, 503],
+            allowed_methods=(Retry.DEFAULT_ALLOWED_METHODS | frozenset(["POST"])),
+        )
+        adapter = self.custom_adapter or HTTPAdapter(max_retries=retries)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        # NOTE: the Authorization header is sent with each request, since the
+        # access token changes during the lifetime of the session
+        session.headers.update({"Content-Type": self.CONTENT_TYPE})
+        return session
+
     def _get_access_token(self):
         """Retrieve a valid access token that can be used to authorize requests.
 
         :return: Access token.
         """
-        credentials = service_account.Credentials.from_service_account_info(
-            self._FCM_ACCOUNT_INFO, scopes=self.FCM_SCOPES
+        token, self._project_id = fcm_credentials.access_token(
+            self._FCM_ACCOUNT_INFO, self.FCM_SCOPES
         )
-        self._credentials = credentials
-        self._project_id = credentials.project_id
-        request = google.auth.transport.requests.Request()
-        credentials.refresh(request)
 
         self.FCM_END_POINT = self.FCM_END_POINT.format(project_id=self._project_id)
         logger.debug('FCM endpoint: %s', self.FCM_END_POINT)
 
-        return credentials.token
+        return token
 
     def request_headers(self):
         """
@@ -373,16 +407,19 @@ class BaseAPI:
 
     def do_request(self, payload, timeout):
         logger.debug('FCM request payload: %s', payload)
+        headers = self.request_headers()
+        # NOTE: the headers hold the OAuth2 access token of the service account
+        timeline.mark('auth_done')
+        timeline.mark('request_sent')
         response = self.requests_session.post(
-            self.FCM_END_POINT, data=payload, timeout=timeout
+            self.FCM_END_POINT, data=payload, timeout=timeout, headers=headers
         )
-        if (
-            "Retry-After" in response.headers
-            and int(response.headers["Retry-After"]) > 0
-        ):
-            sleep_time = int(response.headers["Retry-After"])
-            time.sleep(sleep_time)
-            return self.do_request(payload, timeout)
+        timeline.mark('response_received')
+        # NOTE: do not sleep here, the worker process would be unavailable for
+        # the whole delay; the push is retried later by a new task
+        if delay := retry_after(response):
+            fcm_rate_governor.block(self._project_id, delay)
+            raise RetryAfterException(delay)
         return response
 
     def send_request(self, payloads: list[str], timeout: int) -> None:
@@ -635,6 +672,16 @@ class FCMNotification(BaseAPI):
 
 
 class FCMNotificationLegacy(FCMNotificationLegacyBase):
+    def do_request(self, payload, timeout):
+        timeline.mark('request_sent')
+        response = self.requests_session.post(
+            self.FCM_END_POINT, data=payload, timeout=timeout
+        )
+        timeline.mark('response_received')
+        if delay := retry_after(response):
+            raise RetryAfterException(delay)
+        return response
+
     def parse_responses(self):
         # rewrite parse_responses to provide more transparent error handling
         # to help debugging
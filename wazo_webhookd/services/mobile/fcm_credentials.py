@@ -0,0 +1,167 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+import google.auth.transport.requests
+import requests
+from google.oauth2 import service_account
+
+logger = logging.getLogger(__name__)
+
+MAX_ACCOUNTS = 256
+REFRESH_MARGIN = 300
+MIN_VALIDITY = 30
+
+AccountKey = tuple[str, str] | str
+
+
+class _ServiceAccount:
+    def __init__(self, info: dict[str, Any] | str, scopes: list[str]) -> None:
+        self.credentials = service_account.Credentials.from_service_account_info(
+            info, scopes=scopes
+        )
+        self.lock = threading.Lock()
+        self.refreshing = False
+        # NOTE: a requests.Session is not meant to be shared between threads
+        self.sessions = threading.local()
+
+    def remaining(self) -> float:
+        credentials = self.credentials
+        if not credentials.token or not credentials.expiry:
+            return 0
+        # NOTE: google-auth expiry is a naive UTC datetime
+        return (credentials.expiry - datetime.utcnow()).total_seconds()
+
+    def close(self) -> None:
+        if session := getattr(self.sessions, 'session', None):
+            session.close()
+
+
+class FCMCredentialsCache:
+    """OAuth2 credentials and HTTP sessions of the FCM service accounts.
+
+    Access tokens are reused until `refresh_margin` seconds before they
+    expire, then refreshed by a background thread while pushes keep using the
+    current token. A push only waits for Google when the token has less than
+    `min_validity` seconds left, e.g. for the first push of a service account.
+    """
+
+    def __init__(
+        self,
+        max_accounts: int = MAX_ACCOUNTS,
+        refresh_margin: float = REFRESH_MARGIN,
+        min_validity: float = MIN_VALIDITY,
+    ) -> None:
+        self._max_accounts = max_accounts
+        self._refresh_margin = refresh_margin
+        self._min_validity = min_validity
+        self._lock = threading.Lock()
+        self._accounts: OrderedDict[AccountKey, _ServiceAccount] = OrderedDict()
+
+    def access_token(
+        self, info: dict[str, Any] | str, scopes: list[str]
+    ) -> tuple[str, str]:
+        account = self._get_account(info, scopes)
+        remaining = account.remaining()
+        if remaining < self._min_validity:
+            self._refresh(account)
+        elif remaining < self._refresh_margin:
+            self._refresh_in_background(account)
+        credentials = account.credentials
+        return credentials.token, credentials.project_id
+
+    def session(
+        self,
+        info: dict[str, Any] | str,
+        scopes: list[str],
+        new_session: Callable[[], requests.Session],
+    ) -> requests.Session:
+        sessions = self._get_account(info, scopes).sessions
+        if getattr(sessions, 'session', None) is None:
+            sessions.session = new_session()
+        return sessions.session
+
+    def _get_account(
+        self, info: dict[str, Any] | str, scopes: list[str]
+    ) -> _ServiceAccount:
+        key = _account_key(info)
+        evicted: list[_ServiceAccount] = []
+        with self._lock:
+            if account := self._accounts.get(key):
+                self._accounts.move_to_end(key)
+                return account
+            account = self._accounts[key] = _ServiceAccount(info, scopes)
+            while len(self._accounts) > self._max_accounts:
+                evicted.append(self._accounts.popitem(last=False)[1])
+
+        for old_account in evicted:
+            old_account.close()
+        return account
+
+    def _refresh(self, account: _ServiceAccount) -> None:
+        with account.lock:
+            # NOTE: another thread may have refreshed it while we were waiting
+            if account.remaining() >= self._min_validity:
+                return
+            start = time.monotonic()
+            account.credentials.refresh(google.auth.transport.requests.Request())
+            logger.debug(
+                'FCM access token of %s refreshed in %.3fs',
+                account.credentials.service_account_email,
+                time.monotonic() - start,
+            )
+
+    def _refresh_in_background(self, account: _ServiceAccount) -> None:
+        # NOTE: the account lock is held while its token is refreshed
+        if not account.lock.acquire(blocking=False):
+            return
+        try:
+            if account.refreshing:
+                return
+            account.refreshing = True
+        finally:
+            account.lock.release()
+
+        def refresh() -> None:
+            with account.lock:
+                try:
+                    account.credentials.refresh(
+                        google.auth.transport.requests.Request()
+                    )
+                except Exception as e:
+                    # NOTE: the next push retries, then blocks once the token
+                    # expired
+                    logger.warning(
+                        'Failed to refresh the FCM access token of %s: %s',
+                        account.credentials.service_account_email,
+                        e,
+                    )
+                finally:
+                    account.refreshing = False
+
+        threading.Thread(target=refresh, name='fcm-token-refresh', daemon=True).start()
+
+    def _reset_after_fork(self) -> None:
+        # NOTE: the sessions belong to the parent process, leave them open
+        self._lock = threading.Lock()
+        self._accounts = OrderedDict()
+
+
+def _account_key(info: dict[str, Any] | str) -> AccountKey:
+    if isinstance(info, dict):
+        return info.get('client_email', ''), info.get('private_key_id', '')
+    return info
+
+
+fcm_credentials = FCMCredentialsCache()
+os.register_at_fork(after_in_child=fcm_credentials._reset_after_fork)
@@ -1,27 +1,35 @@
-# Copyright 2017-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
-import tempfile
+import os
+import threading
+import time
 import warnings
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from enum import StrEnum
-from typing import TYPE_CHECKING, Any, Literal, NotRequired, TypedDict, cast
+from typing import TYPE_CHECKING, Any, Literal, NotRequired, TypedDict, TypeVar, cast
 
 import httpx
 from celery import Task
 from requests.exceptions import HTTPError
 from wazo_auth_client import Client as AuthClient
 from wazo_bus.resources.voicemail.types import VoicemailMessageDict
+from xivo.status import Status
 
+from wazo_webhookd import timeline
+from wazo_webhookd.metrics import metrics
 from wazo_webhookd.plugins.subscription.notifier import SubscriptionNotifier
 from wazo_webhookd.plugins.subscription.service import SubscriptionService
 from wazo_webhookd.services.helpers import (
+    MAX_BODY_SIZE,
     HookExpectedError,
     HookRetry,
     RequestDetailsDict,
@@ -30,6 +38,9 @@ from wazo_webhookd.services.helpers import (
 )
 
 from ...database.models import Subscription
+from .apns import ApnsClientPool
+from .auth import token_cache
+from .cache import external_data_cache
 from .exceptions import NotificationError
 from .fcm_client import (
     FCMNotification,
@@ -37,14 +48,17 @@ from .fcm_client import (
     FCMNotificationProtocol,
     RetryAfterException,
 )
+from .ratelimit import RateLimited, fcm_rate_governor
 
 if TYPE_CHECKING:
-    from wazo_auth_client.types import TokenDict
+    from xivo.status import StatusDict
 
     from ...types import ServicePluginDependencyDict, WebhookdConfigDict
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 
 class ExternalMobileDict(TypedDict):
     token: str
@@ -127,6 +141,9 @@ class NotificationSentStatusDict(TypedDict):
 
 REQUEST_TIMEOUTS = httpx.Timeout(connect=10, read=15, write=15, pool=None)
 
+apns_client_pool = ApnsClientPool(REQUEST_TIMEOUTS)
+os.register_at_fork(after_in_child=apns_client_pool._reset_after_fork)
+
 DEFAULT_ANDROID_CHANNEL_ID = 'io.wazo.songbird'
 
 
@@ -157,13 +174,50 @@ MAP_NAME_TO_NOTIFICATION_TYPE = {
 }
 
 
+class _SharedAuth:
+    """wazo-auth client shared by the pushes of a multicast hook.
+
+    When wazo-auth rejects its token, e.g. revoked, the token is renewed once
+    for all the pushes and the rejected request is retried with the new one.
+    """
+
+    def __init__(
+        self, config: WebhookdConfigDict, get_auth: Callable[[], tuple[AuthClient, str]]
+    ) -> None:
+        self._auth_config = config['auth']
+        self._get_auth = get_auth
+        self._lock = threading.Lock()
+        self.auth, self.jwt = get_auth()
+
+    def call(self, request: Callable[[AuthClient], T]) -> T:
+        auth = self.auth
+        try:
+            return request(auth)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+        return request(self._renew(auth))
+
+    def _renew(self, rejected: AuthClient) -> AuthClient:
+        with self._lock:
+            if self.auth is rejected:
+                token_cache.invalidate(self._auth_config)
+                self.auth, self.jwt = self._get_auth()
+            return self.auth
+
+
 class Service:
+    # NOTE: sent to all the mobile users of a tenant, see hook_multicast_task
+    MULTICAST_EVENTS = ('global_voicemail_message_created',)
+    MULTICAST_MAX_WORKERS = 8
+
     subscription_service: SubscriptionService
     _config: WebhookdConfigDict
 
     def load(self, dependencies: ServicePluginDependencyDict) -> None:
         bus_consumer = dependencies['bus_consumer']
         bus_publisher = dependencies['bus_publisher']
+        status_aggregator = dependencies['status_aggregator']
         self._config = dependencies['config']
         self.subscription_service = SubscriptionService(
             self._config, SubscriptionNotifier(bus_publisher)
@@ -183,12 +237,18 @@ class Service:
             self.on_external_auth_deleted,
             headers={'x-internal': True},
         )
+        status_aggregator.add_provider(self.provide_status)
         logger.info('Mobile push notification plugin is started')
 
+    def provide_status(self, status: StatusDict) -> None:
+        status['mobile_cache']['status'] = Status.ok
+        status['mobile_cache']['caches'] = external_data_cache.stats()
+
     def on_external_auth_added(self, body: dict, headers: dict):
         if body['data'].get('external_auth_name') == 'mobile':
             user_uuid = body['data']['user_uuid']
             tenant_uuid = headers['tenant_uuid']
+            external_data_cache.invalidate_user(user_uuid)
 
             self._ensure_mobile_subscription(user_uuid, tenant_uuid)
             logger.info(
@@ -199,6 +259,7 @@ class Service:
         if body['data'].get('external_auth_name') == 'mobile':
             user_uuid = body['data']['user_uuid']
             tenant_uuid = headers['tenant_uuid']
+            external_data_cache.invalidate_user(user_uuid)
 
             self._ensure_mobile_subscription(user_uuid, tenant_uuid)
             logger.info(
@@ -211,6 +272,7 @@ class Service:
         if body['data'].get('external_auth_name') == 'mobile':
             user_uuid = body['data']['user_uuid']
             tenant_uuid = headers['tenant_uuid']
+            external_data_cache.invalidate_user(user_uuid)
             subscriptions = self.subscription_service.list(
                 owner_user_uuid=user_uuid,
                 owner_tenant_uuids=[tenant_uuid],
@@ -300,32 +362,51 @@ class Service:
         auth_config = dict(config['auth'])
         # FIXME(sileht): Keep the certificate
         auth_config['verify_certificate'] = False
-        auth = AuthClient(**auth_config)
-        token: TokenDict = auth.token.new('wazo_user', expiration=3600)
-        auth.set_token(token["token"])
-        jwt = token.get("metadata", {}).get("jwt", "")
-        auth.username = None
-        auth.password = None
-        return auth, jwt
+        start = time.monotonic()
+        token, jwt = token_cache.get(auth_config)
+        logger.debug('wazo-auth token acquired in %.3fs', time.monotonic() - start)
+        auth_config.pop('username', None)
+        auth_config.pop('password', None)
+        return AuthClient(token=token, **auth_config), jwt
 
     @classmethod
     def get_external_data(
         cls, config: WebhookdConfigDict, user_uuid: str
     ) -> tuple[ExternalMobileDict, ExternalConfigDict, str]:
-        auth, jwt = cls.get_auth(config)
-        external_tokens: ExternalMobileDict = auth.external.get('mobile', user_uuid)
-        tenant_uuid = auth.users.get(user_uuid)['tenant_uuid']
         try:
-            external_config: ExternalConfigDict = auth.external.get_config(
-                'mobile', tenant_uuid
-            )
+            return cls._get_external_data(config, user_uuid)
         except HTTPError as e:
-            if e.response and e.response.status_code != 404:
+            if e.response is None or e.response.status_code != 401:
                 raise
-            external_config = EMPTY_EXTERNAL_CONFIG
+            # NOTE: the cached token may have been revoked, retry with a new one
+            token_cache.invalidate(config['auth'])
+            return cls._get_external_data(config, user_uuid)
 
+    @classmethod
+    def _get_external_data(
+        cls, config: WebhookdConfigDict, user_uuid: str
+    ) -> tuple[ExternalMobileDict, ExternalConfigDict, str]:
+        auth, jwt = cls.get_auth(config)
+        external_tokens: ExternalMobileDict = external_data_cache.external_tokens(
+            user_uuid, lambda: auth.external.get('mobile', user_uuid)
+        )
+        tenant_uuid = external_data_cache.user_tenant(
+            user_uuid, lambda: auth.users.get(user_uuid)['tenant_uuid']
+        )
+        external_config: ExternalConfigDict = external_data_cache.tenant_config(
+            tenant_uuid, lambda: cls._get_external_config(auth, tenant_uuid)
+        )
         return external_tokens, external_config, jwt
 
+    @staticmethod
+    def _get_external_config(auth: AuthClient, tenant_uuid: str) -> ExternalConfigDict:
+        try:
+            return auth.external.get_config('mobile', tenant_uuid)
+        except HTTPError as e:
+            if e.response and e.response.status_code != 404:
+                raise
+            return EMPTY_EXTERNAL_CONFIG
+
     @classmethod
     def run(
         cls, task: Task, config: WebhookdConfigDict, subscription: Subscription, event
@@ -343,6 +424,7 @@ class Service:
             return None
 
         external_tokens, external_config, jwt = cls.get_external_data(config, user_uuid)
+        timeline.mark('auth_done')
         push = PushNotification(task, config, external_tokens, external_config, jwt)
 
         data = event.get('data')
@@ -358,11 +440,87 @@ class Service:
         logger.error('No matching notification type for event %s', name)
         return None
 
+    @classmethod
+    def run_multicast(
+        cls,
+        task: Task,
+        config: WebhookdConfigDict,
+        subscriptions: list[Subscription],
+        event: dict[str, Any],
+    ) -> list[NotificationSentStatusDict | Exception]:
+        notification_type = MAP_NAME_TO_NOTIFICATION_TYPE[event['name']]
+        shared_auth = _SharedAuth(config, lambda: cls.get_auth(config))
+
+        # NOTE: mobile subscriptions are owned by the tenant of their user
+        external_configs = {
+            tenant_uuid: external_data_cache.tenant_config(
+                tenant_uuid,
+                lambda: shared_auth.call(
+                    lambda auth: cls._get_external_config(auth, tenant_uuid)
+                ),
+            )
+            for tenant_uuid in {s['owner_tenant_uuid'] for s in subscriptions}
+        }
+        fork = timeline.fork()
+
+        def push(subscription: Subscription) -> NotificationSentStatusDict | Exception:
+            if not (user_uuid := subscription['events_user_uuid']):
+                return HookExpectedError(
+                    "subscription doesn't have events_user_uuid set"
+                )
+            try:
+                with fork.branch(subscription['uuid']):
+                    external_tokens: ExternalMobileDict = (
+                        external_data_cache.external_tokens(
+                            user_uuid,
+                            lambda: shared_auth.call(
+                                lambda auth: auth.external.get('mobile', user_uuid)
+                            ),
+                        )
+                    )
+                    timeline.mark('auth_done')
+                    notification = PushNotification(
+                        task,
+                        config,
+                        external_tokens,
+                        external_configs[subscription['owner_tenant_uuid']],
+                        shared_auth.jwt,
+                    )
+                    return getattr(notification, notification_type)(event['data'])
+            except Exception as e:
+                return e
+
+        # NOTE: APNs pushes are multiplexed on the pooled HTTP/2 connection and
+        # FCM pushes share the credentials of the service account
+        with ThreadPoolExecutor(
+            max_workers=cls.MULTICAST_MAX_WORKERS,
+            thread_name_prefix='mobile-multicast',
+        ) as executor:
+            results = list(executor.map(push, subscriptions))
+
+        providers = Counter(
+            result['protocol_used'] if isinstance(result, dict) else 'failed'
+            for result in results
+        )
+        logger.info(
+            '%s sent to %d mobile users: %s',
+            notification_type,
+            len(subscriptions),
+            dict(providers),
+        )
+        return results
+
 
 def generate_timestamp() -> str:
     return datetime.now(tz=timezone.utc).isoformat()
 
 
+@functools.lru_cache(maxsize=256)
+def load_service_account_info(raw: str) -> dict:
+    # NOTE: the returned dict is shared between pushes, do not modify it
+    return json.loads(raw)
+
+
 class PushNotification:
     def __init__(
         self,
@@ -467,7 +625,9 @@ class PushNotification:
             data['items']['data_only'] = True
 
         if self._can_send_to_apn(self.external_tokens):
-            with requests_automatic_hook_retry(self.task):
+            with requests_automatic_hook_retry(
+                self.task, self.config.get('hook_max_body_size', MAX_BODY_SIZE)
+            ), metrics.time('webhookd_mobile_push_seconds', {'provider': 'apns'}):
                 apn_response = self._send_via_apn(
                     message_title, message_body, data, data_only
                 )
@@ -478,16 +638,17 @@ class PushNotification:
                 }
         else:
             try:
-                fcm_response = self._send_via_fcm(
-                    message_title, message_body, data, data_only
-                )
+                with metrics.time('webhookd_mobile_push_seconds', {'provider': 'fcm'}):
+                    fcm_response = self._send_via_fcm(
+                        message_title, message_body, data, data_only
+                    )
                 return {
                     'success': fcm_response['success'] >= 1,
                     'protocol_used': 'fcm',
                     'full_response': fcm_response,
                 }
-            except RetryAfterException as e:
-                raise HookRetry({"error": str(e)})
+            except (RetryAfterException, RateLimited) as e:
+                raise HookRetry({"error": str(e)}, countdown=e.delay)
 
     @staticmethod
     def _can_send_to_apn(external_tokens: ExternalMobileDict) -> bool:
@@ -525,7 +686,9 @@ class PushNotification:
             fcm_service_account_info_raw = self.external_config[
                 'fcm_service_account_info'
             ]
-            fcm_service_account_info = json.loads(fcm_service_account_info_raw)
+            fcm_service_account_info = load_service_account_info(
+                fcm_service_account_info_raw
+            )
             fcm_end_point = FCMNotification.FCM_END_POINT
             legacy_fcm = False
             logger.debug('Using FCM v1 client')
@@ -584,6 +747,10 @@ class PushNotification:
                 'data_message': data_,
                 'time_to_live': 0,
             }
+            fcm_rate_governor.acquire(
+                fcm_service_account_info.get('project_id', ''),
+                self.config.get('mobile_fcm_max_rate', 0),
+            )
 
         # special treatment of some notification types
         if notification_type == NotificationType.INCOMING_CALL:
@@ -629,23 +796,6 @@ class PushNotification:
 
         return notification
 
-    @contextmanager
-    def _apn_push_client(
-        self, cert: str | None = None
-    ) -> Generator[httpx.Client, None, None]:
-        headers = {
-            'apns-expiration': "0",
-            'User-Agent': 'wazo-webhookd',
-        }
-
-        yield httpx.Client(
-            http2=True,
-            headers=headers,
-            verify=True,
-            cert=cert,
-            timeout=REQUEST_TIMEOUTS,
-        )
-
     def _send_via_apn(
         self,
         message_title: str | None,
@@ -674,25 +824,23 @@ class PushNotification:
 
         url = f"https://{host}:{self.config['mobile_apns_port']}/3/device/{token}"
 
-        with self._certificate_filename(
-            apn_certificate, apn_private
-        ) as apn_cert_filename:
-            logger.debug(
-                'Sending push notification to APNS: POST %s, headers: %s,'
-                'certificate: %s, payload: %s',
-                url,
-                headers,
-                apn_cert_filename,
-                payload,
-            )
-            with self._apn_push_client(cert=apn_cert_filename) as client:
-                response = client.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                )
+        logger.debug(
+            'Sending push notification to APNS: POST %s, headers: %s,'
+            'certificate: %s, payload: %s',
+            url,
+            headers,
+            bool(apn_certificate and apn_private),
+            payload,
+        )
+        timeline.mark('request_sent')
+        response = apns_client_pool.post(
+            url, headers, payload, apn_certificate, apn_private
+        )
+        timeline.mark('response_received')
         response.raise_for_status()
-        return requests_automatic_detail(response)
+        return requests_automatic_detail(
+            response, self.config.get('hook_max_body_size', MAX_BODY_SIZE)
+        )
 
     def _create_apn_message(
         self,
@@ -790,18 +938,3 @@ class PushNotification:
                 raise NotificationError(details)
 
         return headers, payload, token
-
-    @staticmethod
-    @contextmanager
-    def _certificate_filename(
-        certificate: str | None, private_key: str | None
-    ) -> Generator[str | None, None, None]:
-        if certificate and private_key:
-            with tempfile.NamedTemporaryFile(mode="w+") as cert_file:
-                cert_file.write(certificate + "\r\n")
-                cert_file.write(private_key)
-                cert_file.flush()
-
-                yield cert_file.name
-        else:
-            yield None
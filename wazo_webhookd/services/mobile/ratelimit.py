@@ -0,0 +1,80 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+RATE_SLOTS = 1024
+MAX_WAIT = 1.0
+
+_TOKENS, _UPDATED_AT, _BLOCKED_UNTIL = range(3)
+
+
+class RateLimited(Exception):
+    def __init__(self, key: str, delay: float) -> None:
+        super().__init__(f'Sending to {key} deferred for {delay:.1f}s')
+        self.key = key
+        self.delay = delay
+
+
+class RateGovernor:
+    """Send rate of each push project, shared with the forked Celery workers.
+
+    Each key has a token bucket allowing `rate` sends per second with bursts
+    of one second worth of sends. A send that would wait more than `max_wait`
+    seconds for a token raises RateLimited instead, so that the worker process
+    schedules a retry rather than sleeping. `block` stops all sends of a key
+    until the delay asked by the push service is over.
+
+    Keys are hashed into a fixed number of slots allocated in shared memory
+    before the workers are forked, so keys sharing a slot share their limits.
+    """
+
+    def __init__(self, slots: int = RATE_SLOTS, max_wait: float = MAX_WAIT) -> None:
+        self._slots = slots
+        self._max_wait = max_wait
+        self._state = multiprocessing.Array('d', slots * 3)
+
+    def acquire(self, key: str, rate: float) -> None:
+        offset = self._offset(key)
+        with self._state.get_lock():
+            now = time.monotonic()
+            blocked_for = self._state[offset + _BLOCKED_UNTIL] - now
+            if blocked_for > 0:
+                raise RateLimited(key, blocked_for)
+            if not rate:
+                return
+
+            elapsed = now - self._state[offset + _UPDATED_AT]
+            tokens = min(rate, self._state[offset + _TOKENS] + elapsed * rate) - 1
+            wait = -tokens / rate if tokens < 0 else 0
+            if wait > self._max_wait:
+                raise RateLimited(key, wait)
+            self._state[offset + _TOKENS] = tokens
+            self._state[offset + _UPDATED_AT] = now
+
+        if wait:
+            logger.debug('Pacing sends to %s: waiting %.3fs', key, wait)
+            time.sleep(wait)
+
+    def block(self, key: str, delay: float) -> None:
+        logger.info('Push service asked to retry sends to %s in %ss', key, delay)
+        offset = self._offset(key)
+        with self._state.get_lock():
+            blocked_until = time.monotonic() + delay
+            if blocked_until > self._state[offset + _BLOCKED_UNTIL]:
+                self._state[offset + _BLOCKED_UNTIL] = blocked_until
+
+    def _offset(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self._slots * 3
+
+
+# NOTE: must be created before the Celery workers are forked, which is the
+# case when the mobile celery tasks are loaded
+fcm_rate_governor = RateGovernor()
@@ -0,0 +1,160 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import h2.errors
+import h2.events
+import httpcore
+import httpx
+from hamcrest import assert_that, equal_to, is_
+
+from ..apns import ApnsClientPool
+
+URL = 'https://api.push.apple.com:443/3/device/token'
+OTHER_URL = 'https://api.sandbox.push.apple.com:443/3/device/token'
+
+
+def goaway(last_stream_id):
+    return Mock(
+        spec=h2.events.ConnectionTerminated,
+        error_code=h2.errors.ErrorCodes.NO_ERROR,
+        last_stream_id=last_stream_id,
+    )
+
+
+def reset(error_code):
+    return Mock(spec=h2.events.StreamReset, stream_id=3, error_code=error_code)
+
+
+def failing_post(error, stream_id=3):
+    def post(url, headers, json, extensions):
+        extensions['trace'](
+            'http2.send_request_headers.started',
+            {'request': Mock(), 'stream_id': stream_id},
+        )
+        try:
+            raise httpcore.RemoteProtocolError(error)
+        except httpcore.RemoteProtocolError as e:
+            raise httpx.RemoteProtocolError(str(e)) from e
+
+    return post
+
+
+@patch('wazo_webhookd.services.mobile.apns.httpx.create_ssl_context')
+@patch('wazo_webhookd.services.mobile.apns.httpx.Client')
+class TestApnsClientPool(TestCase):
+    def setUp(self):
+        self.pool = ApnsClientPool(httpx.Timeout(5), max_clients=2, max_age=60)
+
+    def test_client_is_reused(self, Client, create_ssl_context):
+        self.pool.post(URL, {}, {})
+        self.pool.post(URL, {}, {})
+
+        Client.assert_called_once()
+        assert_that(Client.return_value.post.call_count, equal_to(2))
+
+    def test_client_per_host_and_certificate(self, Client, create_ssl_context):
+        Client.side_effect = lambda **kwargs: Mock()
+
+        self.pool.post(URL, {}, {})
+        self.pool.post(URL, {}, {}, 'certificate', 'key')
+        self.pool.post(OTHER_URL, {}, {})
+
+        assert_that(Client.call_count, equal_to(3))
+
+    def test_certificate_loaded_from_memory(self, Client, create_ssl_context):
+        loaded = []
+        ssl_context = create_ssl_context.return_value
+
+        def load_cert_chain(path):
+            with open(path, newline='') as f:
+                loaded.append(f.read())
+
+        ssl_context.load_cert_chain.side_effect = load_cert_chain
+
+        self.pool.post(URL, {}, {}, 'certificate', 'key')
+
+        assert_that(loaded, equal_to(['certificate\r\nkey']))
+        assert_that(Client.call_args.kwargs['verify'], is_(ssl_context))
+
+    @patch('wazo_webhookd.services.mobile.apns.time.monotonic')
+    def test_client_recycled(self, monotonic, Client, create_ssl_context):
+        first, second = Mock(), Mock()
+        Client.side_effect = [first, second]
+        monotonic.return_value = 0
+        self.pool.post(URL, {}, {})
+
+        monotonic.return_value = 60
+        self.pool.post(URL, {}, {})
+
+        first.close.assert_called_once_with()
+        second.post.assert_called_once()
+
+    def test_least_recently_used_client_closed(self, Client, create_ssl_context):
+        clients = [Mock(), Mock(), Mock()]
+        Client.side_effect = clients
+
+        self.pool.post(URL, {}, {})
+        self.pool.post(URL, {}, {}, 'certificate', 'key')
+        self.pool.post(OTHER_URL, {}, {})
+
+        clients[0].close.assert_called_once_with()
+        clients[1].close.assert_not_called()
+
+    def test_retry_on_goaway_before_stream(self, Client, create_ssl_context):
+        lost, new = Mock(), Mock()
+        lost.post.side_effect = failing_post(goaway(last_stream_id=1))
+        Client.side_effect = [lost, new]
+
+        response = self.pool.post(URL, {'apns-topic': 'topic'}, {'aps': {}})
+
+        assert_that(response, is_(new.post.return_value))
+        lost.close.assert_called_once_with()
+        new.post.assert_called_once_with(
+            URL, headers={'apns-topic': 'topic'}, json={'aps': {}}
+        )
+
+    def test_retry_on_refused_stream(self, Client, create_ssl_context):
+        lost, new = Mock(), Mock()
+        refused = reset(h2.errors.ErrorCodes.REFUSED_STREAM)
+        lost.post.side_effect = failing_post(refused)
+        Client.side_effect = [lost, new]
+
+        response = self.pool.post(URL, {}, {})
+
+        assert_that(response, is_(new.post.return_value))
+
+    def test_no_retry_on_goaway_after_stream(self, Client, create_ssl_context):
+        lost, new = Mock(), Mock()
+        lost.post.side_effect = failing_post(goaway(last_stream_id=3))
+        Client.side_effect = [lost, new]
+
+        self.assertRaises(httpx.RemoteProtocolError, self.pool.post, URL, {}, {})
+        lost.close.assert_called_once_with()
+        new.post.assert_not_called()
+
+    def test_no_retry_on_stream_reset(self, Client, create_ssl_context):
+        lost, new = Mock(), Mock()
+        error = reset(h2.errors.ErrorCodes.INTERNAL_ERROR)
+        lost.post.side_effect = failing_post(error)
+        Client.side_effect = [lost, new]
+
+        self.assertRaises(httpx.RemoteProtocolError, self.pool.post, URL, {}, {})
+        new.post.assert_not_called()
+
+    def test_no_retry_on_disconnect(self, Client, create_ssl_context):
+        lost, new = Mock(), Mock()
+        lost.post.side_effect = failing_post('Server disconnected')
+        Client.side_effect = [lost, new]
+
+        self.assertRaises(httpx.RemoteProtocolError, self.pool.post, URL, {}, {})
+        lost.close.assert_called_once_with()
+        new.post.assert_not_called()
+
+    def test_no_retry_on_timeout(self, Client, create_ssl_context):
+        Client.return_value.post.side_effect = httpx.ReadTimeout('timeout')
+
+        self.assertRaises(httpx.ReadTimeout, self.pool.post, URL, {}, {})
+        Client.assert_called_once()
@@ -0,0 +1,49 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to
+
+from ..auth import TokenCache
+
+AUTH_CONFIG = {'host': 'localhost', 'port': 9497, 'username': 'webhookd'}
+
+
+@patch('wazo_webhookd.services.mobile.auth.AuthClient')
+class TestTokenCache(TestCase):
+    def setUp(self):
+        self.cache = TokenCache(expiration=3600, refresh_margin=300)
+
+    def _tokens(self, AuthClient, *tokens):
+        AuthClient.return_value.token.new.side_effect = [
+            {'token': token, 'metadata': {'jwt': f'{token}-jwt'}} for token in tokens
+        ]
+
+    def test_token_is_reused(self, AuthClient):
+        self._tokens(AuthClient, 'first')
+
+        assert_that(self.cache.get(AUTH_CONFIG), equal_to(('first', 'first-jwt')))
+        assert_that(self.cache.get(AUTH_CONFIG), equal_to(('first', 'first-jwt')))
+        AuthClient.return_value.token.new.assert_called_once_with(
+            'wazo_user', expiration=3600
+        )
+
+    @patch('wazo_webhookd.services.mobile.auth.time.monotonic')
+    def test_token_is_renewed_before_expiration(self, monotonic, AuthClient):
+        self._tokens(AuthClient, 'first', 'second')
+        monotonic.return_value = 1000
+        self.cache.get(AUTH_CONFIG)
+
+        monotonic.return_value = 1000 + 3600 - 300
+
+        assert_that(self.cache.get(AUTH_CONFIG), equal_to(('second', 'second-jwt')))
+
+    def test_invalidate(self, AuthClient):
+        self._tokens(AuthClient, 'first', 'second')
+        self.cache.get(AUTH_CONFIG)
+
+        self.cache.invalidate(AUTH_CONFIG)
+
+        assert_that(self.cache.get(AUTH_CONFIG), equal_to(('second', 'second-jwt')))
@@ -0,0 +1,81 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, equal_to, has_entries
+
+from ..cache import (
+    ExternalDataCache,
+    InvalidatedCache,
+    SharedCounters,
+    SharedGenerations,
+)
+
+
+class TestExternalDataCache(TestCase):
+    def setUp(self):
+        self.cache = ExternalDataCache(max_entries=2)
+
+    def test_cached_until_invalidated(self):
+        load = Mock(side_effect=['first', 'second'])
+
+        assert_that(self.cache.external_tokens('user', load), equal_to('first'))
+        assert_that(self.cache.external_tokens('user', load), equal_to('first'))
+        self.cache.invalidate_user('user')
+        assert_that(self.cache.external_tokens('user', load), equal_to('second'))
+
+    def test_invalidate_user_keeps_tenant_config(self):
+        self.cache.tenant_config('tenant', lambda: 'config')
+
+        self.cache.invalidate_user('user')
+
+        assert_that(
+            self.cache.tenant_config('tenant', Mock(return_value='new')),
+            equal_to('config'),
+        )
+
+    def test_stats(self):
+        self.cache.user_tenant('user', lambda: 'tenant')
+        self.cache.user_tenant('user', lambda: 'tenant')
+        self.cache.user_tenant('user', lambda: 'tenant')
+
+        assert_that(
+            self.cache.stats(),
+            has_entries(
+                user_tenants=has_entries(hits=2, misses=1, hit_rate=2 / 3),
+                external_tokens=has_entries(hits=0, misses=0, hit_rate=0.0),
+            ),
+        )
+
+    def test_failed_load_is_not_cached(self):
+        load = Mock(side_effect=[Exception('unavailable'), 'tokens'])
+
+        self.assertRaises(Exception, self.cache.external_tokens, 'user', load)
+        assert_that(self.cache.external_tokens('user', load), equal_to('tokens'))
+
+
+class TestInvalidatedCache(TestCase):
+    def setUp(self):
+        self.cache = InvalidatedCache(
+            'test', SharedGenerations(slots=16), SharedCounters(['test']), 10, 2
+        )
+
+    def test_least_recently_used_evicted(self):
+        self.cache.get_or_load('a', lambda: 'a')
+        self.cache.get_or_load('b', lambda: 'b')
+        self.cache.get_or_load('a', lambda: 'a')
+        self.cache.get_or_load('c', lambda: 'c')
+
+        assert_that(self.cache.get_or_load('a', lambda: 'new'), equal_to('a'))
+        assert_that(self.cache.get_or_load('b', lambda: 'new'), equal_to('new'))
+
+    @patch('wazo_webhookd.services.mobile.cache.time.monotonic')
+    def test_expired(self, monotonic):
+        monotonic.return_value = 100
+        self.cache.get_or_load('a', lambda: 'old')
+
+        monotonic.return_value = 110
+
+        assert_that(self.cache.get_or_load('a', lambda: 'new'), equal_to('new'))
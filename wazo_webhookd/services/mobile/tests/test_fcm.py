@@ -1,4 +1,4 @@
-# Copyright 2022-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2022-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from unittest import TestCase
@@ -10,7 +10,9 @@ from ..plugin import (
     NotificationPayload,
     NotificationType,
     PushNotification,
+    load_service_account_info,
 )
+from ..ratelimit import RateLimited
 
 
 class TestSendViaFcmLegacy(TestCase):
@@ -168,9 +170,16 @@ class TestSendViaFcmLegacy(TestCase):
 
 class TestSendViaFCMv1(TestCase):
     def setUp(self):
+        load_service_account_info.cache_clear()
         task = Mock()
+        governor_patcher = patch(
+            'wazo_webhookd.services.mobile.plugin.fcm_rate_governor'
+        )
+        self.fcm_rate_governor = governor_patcher.start()
+        self.addCleanup(governor_patcher.stop)
         config = {
             'mobile_fcm_notification_end_point': 'the url',
+            'mobile_fcm_max_rate': s.max_rate,
         }
         external_tokens = {'token': s.token}
         external_config = {
@@ -314,3 +323,25 @@ class TestSendViaFCMv1(TestCase):
             android_channel_id=DEFAULT_ANDROID_CHANNEL_ID,
             low_priority=False,
         )
+
+    @patch('wazo_webhookd.services.mobile.plugin.json.loads')
+    @patch('wazo_webhookd.services.mobile.plugin.FCMNotification')
+    def test_send_rate_limited_per_project(self, FCMNotification, json_loads):
+        json_loads.return_value = {'project_id': s.project_id}
+        self.fcm_rate_governor.acquire.side_effect = RateLimited('project', 2)
+        data: NotificationPayload = {
+            'notification_type': NotificationType.INCOMING_CALL,
+            'items': {},
+        }
+
+        self.assertRaises(
+            RateLimited,
+            self.push_notification._send_via_fcm,
+            None,
+            None,
+            data,
+            data_only=False,
+        )
+
+        self.fcm_rate_governor.acquire.assert_called_once_with(s.project_id, s.max_rate)
+        FCMNotification.return_value.notify_single_device.assert_not_called()
@@ -0,0 +1,44 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, equal_to, is_, none
+
+from ..fcm_client import FCMNotification, RetryAfterException, retry_after
+
+
+class TestRetryAfter(TestCase):
+    def test_seconds(self):
+        assert_that(retry_after(Mock(headers={'Retry-After': '30'})), equal_to(30))
+
+    def test_http_date(self):
+        date = datetime.now(timezone.utc) + timedelta(seconds=120)
+        response = Mock(headers={'Retry-After': format_datetime(date, usegmt=True)})
+
+        assert_that(retry_after(response), equal_to(120))
+
+    def test_missing_or_invalid(self):
+        assert_that(retry_after(Mock(headers={})), is_(none()))
+        assert_that(retry_after(Mock(headers={'Retry-After': '0'})), is_(none()))
+        assert_that(retry_after(Mock(headers={'Retry-After': 'soon'})), is_(none()))
+
+
+@patch('wazo_webhookd.services.mobile.fcm_client.fcm_rate_governor')
+@patch('wazo_webhookd.services.mobile.fcm_client.fcm_credentials')
+class TestDoRequest(TestCase):
+    def test_retry_after_is_not_waited(self, fcm_credentials, fcm_rate_governor):
+        fcm_credentials.access_token.return_value = 'token', 'project'
+        session = fcm_credentials.session.return_value
+        session.post.return_value = Mock(headers={'Retry-After': '30'})
+        push_service = FCMNotification(service_account_info={'project_id': 'project'})
+
+        with self.assertRaises(RetryAfterException) as raised:
+            push_service.do_request(b'payload', timeout=10)
+
+        assert_that(raised.exception.delay, equal_to(30))
+        session.post.assert_called_once()
+        fcm_rate_governor.block.assert_called_once_with('project', 30)
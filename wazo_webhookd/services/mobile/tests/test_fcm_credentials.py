@@ -0,0 +1,128 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, equal_to, is_, is_not
+
+from ..fcm_credentials import FCMCredentialsCache
+
+INFO = {'client_email': 'push@project.iam', 'private_key_id': 'key-1'}
+OTHER_INFO = {'client_email': 'push@project.iam', 'private_key_id': 'key-2'}
+SCOPES = ['scope']
+
+
+class DeferredThread:
+    started: list = []
+
+    def __init__(self, target, **kwargs):
+        self._target = target
+
+    def start(self):
+        self.started.append(self._target)
+
+    @classmethod
+    def run_started(cls):
+        while cls.started:
+            cls.started.pop(0)()
+
+
+@patch('wazo_webhookd.services.mobile.fcm_credentials.threading.Thread', DeferredThread)
+@patch('wazo_webhookd.services.mobile.fcm_credentials.service_account.Credentials')
+class TestFCMCredentialsCache(TestCase):
+    def setUp(self):
+        self.cache = FCMCredentialsCache(
+            max_accounts=1, refresh_margin=300, min_validity=30
+        )
+
+    def _credentials(self, Credentials, expires_in):
+        credentials = Mock(token=None, expiry=None, project_id='project')
+
+        def refresh(request):
+            credentials.token = f'token-{credentials.refresh.call_count}'
+            credentials.expiry = datetime.utcnow() + timedelta(seconds=expires_in)
+
+        credentials.refresh.side_effect = refresh
+        Credentials.from_service_account_info.return_value = credentials
+        return credentials
+
+    def test_token_is_reused(self, Credentials):
+        credentials = self._credentials(Credentials, expires_in=3600)
+
+        assert_that(
+            self.cache.access_token(INFO, SCOPES), equal_to(('token-1', 'project'))
+        )
+        assert_that(
+            self.cache.access_token(INFO, SCOPES), equal_to(('token-1', 'project'))
+        )
+        credentials.refresh.assert_called_once()
+        Credentials.from_service_account_info.assert_called_once_with(
+            INFO, scopes=SCOPES
+        )
+
+    def test_token_refreshed_in_background_before_expiration(self, Credentials):
+        credentials = self._credentials(Credentials, expires_in=200)
+        self.cache.access_token(INFO, SCOPES)
+
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-1'))
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-1'))
+        DeferredThread.run_started()
+
+        assert_that(credentials.refresh.call_count, equal_to(2))
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-2'))
+
+    def test_background_refresh_failure(self, Credentials):
+        credentials = self._credentials(Credentials, expires_in=200)
+        self.cache.access_token(INFO, SCOPES)
+        credentials.refresh.side_effect = Exception('unavailable')
+
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-1'))
+        DeferredThread.run_started()
+
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-1'))
+        DeferredThread.run_started()
+        assert_that(credentials.refresh.call_count, equal_to(3))
+
+    def test_single_background_refresh(self, Credentials):
+        credentials = self._credentials(Credentials, expires_in=200)
+        self.cache.access_token(INFO, SCOPES)
+        account = self.cache._get_account(INFO, SCOPES)
+
+        def refresh(request):
+            assert_that(account.lock.locked(), is_(True))
+            assert_that(account.refreshing, is_(True))
+            self.cache.access_token(INFO, SCOPES)
+
+        credentials.refresh.side_effect = refresh
+        self.cache.access_token(INFO, SCOPES)
+        self.cache.access_token(INFO, SCOPES)
+        DeferredThread.run_started()
+
+        assert_that(credentials.refresh.call_count, equal_to(2))
+        assert_that(account.refreshing, is_(False))
+
+    def test_expired_token_refreshed_before_use(self, Credentials):
+        credentials = self._credentials(Credentials, expires_in=10)
+        self.cache.access_token(INFO, SCOPES)
+
+        assert_that(self.cache.access_token(INFO, SCOPES)[0], equal_to('token-2'))
+        assert_that(credentials.refresh.call_count, equal_to(2))
+
+    def test_session_is_reused(self, Credentials):
+        new_session = Mock(side_effect=lambda: Mock())
+
+        session = self.cache.session(INFO, SCOPES, new_session)
+
+        assert_that(self.cache.session(INFO, SCOPES, new_session), is_(session))
+        new_session.assert_called_once_with()
+
+    def test_least_recently_used_account_evicted(self, Credentials):
+        new_session = Mock(side_effect=lambda: Mock())
+        session = self.cache.session(INFO, SCOPES, new_session)
+
+        other_session = self.cache.session(OTHER_INFO, SCOPES, new_session)
+
+        assert_that(other_session, is_not(session))
+        session.close.assert_called_once_with()
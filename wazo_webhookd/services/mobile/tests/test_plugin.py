@@ -1,7 +1,13 @@
 from datetime import datetime, timezone
 from unittest import TestCase
+from unittest.mock import Mock, patch
 
-from ..plugin import generate_timestamp
+from hamcrest import assert_that, contains_exactly, contains_inanyorder, equal_to
+from requests.exceptions import HTTPError
+
+from ..plugin import Service, generate_timestamp
+
+CONFIG = {'auth': {'host': 'auth'}}
 
 
 class TestGenerateTimestamp(TestCase):
@@ -15,3 +21,99 @@ class TestGenerateTimestamp(TestCase):
 
         assert timestamp_datetime.tzinfo is timezone.utc
         assert pre_time <= timestamp_datetime <= post_time
+
+
+@patch('wazo_webhookd.services.mobile.plugin.PushNotification')
+@patch('wazo_webhookd.services.mobile.plugin.external_data_cache')
+@patch.object(Service, 'get_auth')
+class TestRunMulticast(TestCase):
+    def setUp(self):
+        self.subscriptions = [
+            {
+                'uuid': 'sub-1',
+                'events_user_uuid': 'user-1',
+                'owner_tenant_uuid': 'tenant',
+            },
+            {
+                'uuid': 'sub-2',
+                'events_user_uuid': 'user-2',
+                'owner_tenant_uuid': 'tenant',
+            },
+        ]
+        self.event = {
+            'name': 'global_voicemail_message_created',
+            'data': {'message': {}},
+        }
+
+    def _setup(self, get_auth, external_data_cache):
+        self.auth = Mock()
+        get_auth.return_value = self.auth, 'jwt'
+        for method in ('tenant_config', 'external_tokens'):
+            getattr(external_data_cache, method).side_effect = lambda key, load: load()
+
+    def test_auth_data_shared_by_tenant(
+        self, get_auth, external_data_cache, PushNotification
+    ):
+        self._setup(get_auth, external_data_cache)
+        sent = {'success': True, 'protocol_used': 'apns'}
+        PushNotification.return_value.voicemailReceived.return_value = sent
+
+        results = Service.run_multicast(
+            Mock(), CONFIG, self.subscriptions, self.event  # type: ignore
+        )
+
+        assert_that(results, contains_exactly(sent, sent))
+        get_auth.assert_called_once()
+        self.auth.external.get_config.assert_called_once_with('mobile', 'tenant')
+        self.auth.users.get.assert_not_called()
+
+    def test_failures_returned_per_subscription(
+        self, get_auth, external_data_cache, PushNotification
+    ):
+        self._setup(get_auth, external_data_cache)
+        error = Exception('no mobile token')
+        self.auth.external.get.side_effect = [{'token': 'token'}, error]
+        sent = {'success': True, 'protocol_used': 'fcm'}
+        PushNotification.return_value.voicemailReceived.return_value = sent
+
+        results = Service.run_multicast(
+            Mock(), CONFIG, self.subscriptions, self.event  # type: ignore
+        )
+
+        assert_that(results, contains_inanyorder(sent, error))
+
+    @patch('wazo_webhookd.services.mobile.plugin.token_cache')
+    def test_rejected_token_renewed_once(
+        self, token_cache, get_auth, external_data_cache, PushNotification
+    ):
+        self._setup(get_auth, external_data_cache)
+        rejected = HTTPError(response=Mock(status_code=401))
+        self.auth.external.get.side_effect = rejected
+        renewed = Mock()
+        get_auth.side_effect = [(self.auth, 'jwt'), (renewed, 'new-jwt')]
+        sent = {'success': True, 'protocol_used': 'apns'}
+        PushNotification.return_value.voicemailReceived.return_value = sent
+
+        results = Service.run_multicast(
+            Mock(), CONFIG, self.subscriptions, self.event  # type: ignore
+        )
+
+        assert_that(results, contains_exactly(sent, sent))
+        token_cache.invalidate.assert_called_once_with(CONFIG['auth'])
+        assert_that(get_auth.call_count, equal_to(2))
+        assert_that(renewed.external.get.call_count, equal_to(2))
+        assert_that(PushNotification.call_args.args[4], equal_to('new-jwt'))
+
+    def test_other_auth_errors_not_retried(
+        self, get_auth, external_data_cache, PushNotification
+    ):
+        self._setup(get_auth, external_data_cache)
+        error = HTTPError(response=Mock(status_code=404))
+        self.auth.external.get.side_effect = error
+
+        results = Service.run_multicast(
+            Mock(), CONFIG, self.subscriptions, self.event  # type: ignore
+        )
+
+        assert_that(results, contains_exactly(error, error))
+        get_auth.assert_called_once()
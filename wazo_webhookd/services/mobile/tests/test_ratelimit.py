@@ -0,0 +1,57 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import assert_that, close_to, equal_to
+
+from ..ratelimit import RateGovernor, RateLimited
+
+
+@patch('wazo_webhookd.services.mobile.ratelimit.time.sleep')
+@patch('wazo_webhookd.services.mobile.ratelimit.time.monotonic')
+class TestRateGovernor(TestCase):
+    def setUp(self):
+        self.governor = RateGovernor(slots=16, max_wait=1)
+
+    def test_burst_then_paced(self, monotonic, sleep):
+        monotonic.return_value = 1000
+
+        for _ in range(10):
+            self.governor.acquire('project', rate=10)
+        sleep.assert_not_called()
+
+        self.governor.acquire('project', rate=10)
+        sleep.assert_called_once()
+        assert_that(sleep.call_args.args[0], close_to(0.1, 0.001))
+
+    def test_deferred_instead_of_long_wait(self, monotonic, sleep):
+        monotonic.return_value = 1000
+        for _ in range(20):
+            self.governor.acquire('project', rate=10)
+
+        with self.assertRaises(RateLimited) as raised:
+            self.governor.acquire('project', rate=10)
+
+        assert_that(raised.exception.delay, close_to(1.1, 0.001))
+
+    def test_blocked(self, monotonic, sleep):
+        monotonic.return_value = 1000
+        self.governor.block('project', 30)
+
+        monotonic.return_value = 1010
+        with self.assertRaises(RateLimited) as raised:
+            self.governor.acquire('project', rate=0)
+        assert_that(raised.exception.delay, equal_to(20))
+
+        monotonic.return_value = 1030
+        self.governor.acquire('project', rate=0)
+
+    def test_projects_limited_separately(self, monotonic, sleep):
+        monotonic.return_value = 1000
+        self.governor.block('project', 30)
+
+        self.governor.acquire('other', rate=10)
+
+        sleep.assert_not_called()
@@ -0,0 +1,113 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import io
+from unittest import TestCase
+from unittest.mock import Mock
+
+import httpx
+import requests
+from hamcrest import assert_that, contains_string, equal_to, has_entries
+
+from ..helpers import (
+    HookRetry,
+    requests_automatic_detail,
+    requests_automatic_hook_retry,
+)
+
+
+def _requests_response(body, status_code=200, content_type='application/json'):
+    request = requests.Request(
+        'POST',
+        'http://example.com/hook',
+        data='{"a": 1}',
+        headers={'Content-Type': 'application/json'},
+    ).prepare()
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers['Content-Type'] = content_type
+    response.raw = io.BytesIO(body)
+    response.request = request
+    return response
+
+
+class TestRequestsAutomaticDetail(TestCase):
+    def test_json_decoded(self):
+        response = _requests_response(b'{"result": "ok"}')
+
+        detail = requests_automatic_detail(response)
+
+        assert_that(
+            detail,
+            has_entries(
+                request_body={'a': 1},
+                request_body_truncated=False,
+                response_status_code=200,
+                response_body={'result': 'ok'},
+                response_body_truncated=False,
+            ),
+        )
+
+    def test_json_decoded_only_with_a_json_content_type(self):
+        response = _requests_response(b'{"result": "ok"}', content_type='text/plain')
+
+        detail = requests_automatic_detail(response)
+
+        assert_that(detail, has_entries(response_body='{"result": "ok"}'))
+
+    def test_large_response_not_read_past_the_limit(self):
+        response = _requests_response(b'x' * 100000, content_type='text/html')
+
+        detail = requests_automatic_detail(response, max_body_size=10)
+
+        assert_that(
+            detail, has_entries(response_body='x' * 10, response_body_truncated=True)
+        )
+        assert_that(response.raw.tell() < 100000, equal_to(True))
+
+    def test_truncated_json_kept_as_text(self):
+        response = _requests_response(b'{"result": "ok"}')
+
+        detail = requests_automatic_detail(response, max_body_size=5)
+
+        assert_that(detail, has_entries(response_body='{"res'))
+
+    def test_httpx_response(self):
+        request = httpx.Request('POST', 'https://example.com', json={'a': 1})
+        response = httpx.Response(
+            400,
+            content='é'.encode('latin-1') * 10,
+            headers={'Content-Type': 'text/plain; charset=latin-1'},
+            request=request,
+        )
+
+        detail = requests_automatic_detail(response, max_body_size=4)
+
+        assert_that(
+            detail,
+            has_entries(
+                request_body='{"a"',
+                request_body_truncated=True,
+                response_body='éééé',
+                response_body_truncated=True,
+            ),
+        )
+
+
+class TestRequestsAutomaticHookRetry(TestCase):
+    def test_error_body_already_read(self):
+        response = _requests_response(b'<html>error</html>', 500, 'text/html')
+        requests_automatic_detail(response)
+
+        with self.assertRaises(HookRetry) as context:
+            with requests_automatic_hook_retry(Mock()):
+                response.raise_for_status()
+
+        assert_that(
+            context.exception.detail,
+            has_entries(
+                error=contains_string('500 Server Error'),
+                response_status_code=500,
+                response_body='<html>error</html>',
+            ),
+        )
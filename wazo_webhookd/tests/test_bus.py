@@ -0,0 +1,90 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+import kombu
+from hamcrest import assert_that, contains_exactly, equal_to, is_not
+
+from ..bus import (
+    MessageKeys,
+    _track_messages,
+    current_message_id,
+    current_message_redelivered,
+)
+
+
+def _message(message_id=None, redelivered=False, body='{"name": "user_created"}'):
+    properties = {'message_id': message_id} if message_id else {}
+    return kombu.Message(
+        body=body,
+        channel=Mock(),
+        properties=properties,
+        delivery_info={'redelivered': redelivered},
+        headers={'name': 'user_created'},
+    )
+
+
+class TestTrackMessages(TestCase):
+    def setUp(self):
+        self.received = []
+
+    def _handler(self, *args):
+        self.received.append((current_message_id(), current_message_redelivered()))
+
+    def test_identical_publishes_are_distinct_deliveries(self):
+        consumer = _track_messages(
+            kombu.Consumer(Mock(), callbacks=[self._handler], auto_declare=False)
+        )
+
+        consumer.receive({}, _message())
+        consumer.receive({}, _message())
+
+        (first, _), (second, _) = self.received
+        assert_that(first, is_not(equal_to(second)))
+
+    def test_message_id_and_redelivery(self):
+        consumer = _track_messages(
+            kombu.Consumer(Mock(), on_message=self._handler, auto_declare=False)
+        )
+
+        consumer.on_message(_message('message-id'))
+        consumer.on_message(_message('message-id', redelivered=True))
+
+        assert_that(
+            self.received,
+            contains_exactly(('message-id', False), ('message-id', True)),
+        )
+        assert_that(current_message_id(), equal_to(None))
+
+
+class TestMessageKeys(TestCase):
+    def setUp(self):
+        self.keys = MessageKeys(size=2)
+
+    def test_message_id(self):
+        assert_that(self.keys.key(_message('message-id')), equal_to('message-id'))
+
+    def test_redelivery_has_the_key_of_the_delivery(self):
+        key = self.keys.key(_message())
+        self.keys.key(_message(body='{"name": "user_deleted"}'))
+
+        assert_that(self.keys.key(_message(redelivered=True)), equal_to(key))
+
+    def test_identical_messages_have_distinct_keys(self):
+        first = self.keys.key(_message())
+        second = self.keys.key(_message())
+
+        assert_that(first, is_not(equal_to(second)))
+        assert_that(self.keys.key(_message(redelivered=True)), equal_to(second))
+
+    def test_unknown_redelivery_has_a_new_key(self):
+        key = self.keys.key(_message())
+        self.keys.key(_message(body='{"name": "user_deleted"}'))
+        self.keys.key(_message(body='{"name": "user_updated"}'))
+
+        assert_that(self.keys.key(_message(redelivered=True)), is_not(equal_to(key)))
+        assert_that(
+            MessageKeys().key(_message(redelivered=True)), is_not(equal_to(key))
+        )
@@ -7,7 +7,9 @@ from wazo_webhookd.celery import app, load_celery_tasks
 
 EXPECTED_TASKS = [
     'wazo_webhookd.plugins.subscription.celery_tasks.hook_runner_task',
+    'wazo_webhookd.plugins.subscription.celery_tasks.hook_multicast_task',
     'wazo_webhookd.plugins.mobile.celery_tasks.send_notification',
+    'wazo_webhookd.plugins.mobile.celery_tasks.send_notifications',
 ]
 
 
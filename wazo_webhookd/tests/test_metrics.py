@@ -0,0 +1,93 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import multiprocessing
+from unittest import TestCase
+
+from hamcrest import assert_that, contains_string, equal_to, is_not
+
+from ..metrics import SharedMetrics, series_key
+
+
+class TestSeriesKey(TestCase):
+    def test_labels_escaped(self):
+        key = series_key('name', {'event': 'a"b', 'service': 'http'})
+
+        assert_that(key, equal_to('name{event="a\\"b",service="http"}'))
+
+
+class TestSharedMetrics(TestCase):
+    def setUp(self):
+        self.metrics = SharedMetrics(max_series=8)
+
+    def test_counter(self):
+        self.metrics.inc('webhookd_hooks_total', {'status': 'success'})
+        self.metrics.inc('webhookd_hooks_total', {'status': 'success'})
+
+        output = self.metrics.render()
+
+        assert_that(output, contains_string('# TYPE webhookd_hooks_total counter'))
+        assert_that(
+            output, contains_string('webhookd_hooks_total{status="success"} 2.0')
+        )
+
+    def test_histogram(self):
+        self.metrics.observe('webhookd_hook_duration_seconds', 0.2, {'service': 'http'})
+        self.metrics.observe('webhookd_hook_duration_seconds', 3, {'service': 'http'})
+
+        output = self.metrics.render()
+
+        name = 'webhookd_hook_duration_seconds'
+        assert_that(output, contains_string(f'# TYPE {name} histogram'))
+        assert_that(
+            output, contains_string(f'{name}_bucket{{service="http",le="0.1"}} 0.0')
+        )
+        assert_that(
+            output, contains_string(f'{name}_bucket{{service="http",le="0.25"}} 1.0')
+        )
+        assert_that(
+            output, contains_string(f'{name}_bucket{{service="http",le="+Inf"}} 2.0')
+        )
+        assert_that(output, contains_string(f'{name}_sum{{service="http"}} 3.2'))
+        assert_that(output, contains_string(f'{name}_count{{service="http"}} 2.0'))
+
+    def test_samples_of_forked_process_aggregated(self):
+        self.metrics.inc('webhookd_hooks_total')
+        process = multiprocessing.get_context('fork').Process(
+            target=self.metrics.inc, args=('webhookd_hooks_total',)
+        )
+        process.start()
+        process.join()
+
+        assert_that(self.metrics.render(), contains_string('webhookd_hooks_total 2.0'))
+
+    def test_samples_of_concurrent_processes_aggregated(self):
+        def record():
+            for _ in range(200):
+                self.metrics.inc('webhookd_hooks_total')
+                self.metrics.observe('webhookd_hook_duration_seconds', 1)
+
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=record) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        output = self.metrics.render()
+
+        assert_that(output, contains_string('webhookd_hooks_total 800.0'))
+        assert_that(
+            output, contains_string('webhookd_hook_duration_seconds_count 800.0')
+        )
+
+    def test_storage_full(self):
+        for i in range(10):
+            self.metrics.inc('webhookd_hooks_total', {'status': str(i)})
+
+        output = self.metrics.render()
+
+        assert_that(
+            output, contains_string('webhookd_metrics_samples_dropped_total 3.0')
+        )
+        assert_that(output, is_not(contains_string('status="9"')))
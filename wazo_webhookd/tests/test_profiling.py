@@ -0,0 +1,92 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    ends_with,
+    equal_to,
+    has_length,
+    starts_with,
+)
+
+from ..profiling import SamplingProfiler, collapse
+
+
+class TestCollapse(TestCase):
+    def test_root_first(self):
+        def inner():
+            return sys._getframe()
+
+        stack = collapse('bus', inner())
+
+        frames = stack.split(';')
+        assert_that(frames[0], equal_to('bus'))
+        assert_that(frames[-2], starts_with('test_root_first ('))
+        assert_that(
+            frames[-1],
+            equal_to(f'inner ({__file__}:{inner.__code__.co_firstlineno})'),
+        )
+
+
+class TestSamplingProfiler(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.profiler = SamplingProfiler()
+        self.profiler.configure(
+            {
+                'enabled': False,
+                'directory': self.directory.name,
+                'interval': 0.001,
+                'max_duration': 0.2,
+            }
+        )
+
+    def tearDown(self):
+        self.profiler.stop()
+        self.directory.cleanup()
+
+    def test_not_running_by_default(self):
+        self.profiler.follow()
+
+        assert_that(self.profiler.running(), equal_to(False))
+        assert_that(os.listdir(self.directory.name), has_length(0))
+
+    def test_duration_is_bounded(self):
+        self.profiler.start(3600)
+
+        assert_that(self.profiler.running(), equal_to(True))
+        time.sleep(0.3)
+        assert_that(self.profiler.running(), equal_to(False))
+
+    def test_stop_writes_collapsed_stacks(self):
+        stop = threading.Event()
+        busy = threading.Thread(target=stop.wait, name='busy')
+        busy.start()
+        self.profiler.start()
+        time.sleep(0.05)
+
+        self.profiler.stop()
+        self.profiler._thread.join()
+        stop.set()
+        busy.join()
+
+        files = os.listdir(self.directory.name)
+        assert_that(files, contains_exactly(starts_with(f'main-{os.getpid()}-')))
+        with open(os.path.join(self.directory.name, files[0])) as f:
+            lines = f.read().splitlines()
+        busy_lines = [line for line in lines if line.startswith('busy;')]
+        assert_that(busy_lines, has_length(1))
+        stack, count = busy_lines[0].rsplit(' ', 1)
+        wait = threading.Condition.wait.__code__
+        assert_that(
+            stack, ends_with(f'wait ({wait.co_filename}:{wait.co_firstlineno})')
+        )
+        assert_that(int(count) > 0, equal_to(True))
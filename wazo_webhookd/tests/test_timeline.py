@@ -0,0 +1,81 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import assert_that, equal_to
+
+from .. import timeline
+
+
+@patch('wazo_webhookd.timeline.time.time')
+class TestTimeline(TestCase):
+    def setUp(self):
+        timeline.stop()
+
+    def test_stage_durations(self, now):
+        timeline.start(received=100.0, enqueued=100.5, dequeued=102.0)
+        now.return_value = 102.25
+        timeline.mark('auth_done')
+        now.return_value = 102.5
+        timeline.mark('request_sent')
+        now.return_value = 103.5
+        timeline.mark('response_received')
+        now.return_value = 104.0
+
+        assert_that(
+            timeline.stop(),
+            equal_to(
+                {
+                    'dispatch': 0.5,
+                    'queue': 1.5,
+                    'auth': 0.25,
+                    'prepare': 0.25,
+                    'provider': 1.0,
+                    'finish': 0.5,
+                }
+            ),
+        )
+
+    def test_missing_marks_skipped(self, now):
+        timeline.start(received=None, enqueued=None, dequeued=100.0)
+        now.return_value = 101.0
+        timeline.mark('request_sent')
+        now.return_value = 103.0
+
+        assert_that(timeline.stop(), equal_to({'prepare': 1.0, 'finish': 2.0}))
+
+    def test_no_timeline(self, now):
+        timeline.stop()
+
+        timeline.mark('request_sent')
+
+        assert_that(timeline.stop(), equal_to({}))
+
+    def test_branches_in_thread_pool(self, now):
+        timeline.start(received=None, enqueued=None, dequeued=100.0)
+        fork = timeline.fork()
+
+        def push(key, sent_at):
+            with fork.branch(key):
+                now.return_value = sent_at
+                timeline.mark('request_sent')
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            list(executor.map(push, ['a', 'b'], [101.0, 102.0]))
+        now.return_value = 104.0
+
+        assert_that(timeline.stop('a'), equal_to({'prepare': 1.0, 'finish': 3.0}))
+        assert_that(timeline.stop('b'), equal_to({'prepare': 2.0, 'finish': 2.0}))
+        assert_that(timeline.stop('unknown'), equal_to({'finish': 4.0}))
+        assert_that(timeline.stop(), equal_to({'finish': 4.0}))
+
+    def test_branch_outside_of_timeline(self, now):
+        fork = timeline.fork()
+
+        with fork.branch('a'):
+            timeline.mark('request_sent')
+
+        assert_that(timeline.stop('a'), equal_to({}))
@@ -0,0 +1,89 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# NOTE: marks of the delivery of a hook, in order, with the name of the stage
+# ending at each mark
+STAGES = {
+    'received': None,
+    'enqueued': 'dispatch',
+    'dequeued': 'queue',
+    'auth_done': 'auth',
+    'request_sent': 'prepare',
+    'response_received': 'provider',
+    'ended': 'finish',
+}
+
+_local = threading.local()
+
+
+def start(**marks: float | None) -> None:
+    """Start the timeline of the current thread with the marks already known"""
+    _local.marks = {name: at for name, at in marks.items() if at}
+    _local.branches = {}
+
+
+def mark(name: str) -> None:
+    """Record a mark, does nothing outside of a timeline, e.g. in a thread pool
+    outside of a branch"""
+    if (marks := getattr(_local, 'marks', None)) is not None:
+        marks[name] = time.time()
+
+
+def get(name: str) -> float | None:
+    return getattr(_local, 'marks', {}).get(name)
+
+
+class Fork:
+    """Continue the timeline of a thread in the threads of a pool, with one
+    branch per key, e.g. per subscription of a multicast hook"""
+
+    def __init__(self) -> None:
+        marks = getattr(_local, 'marks', None)
+        self._marks = dict(marks) if marks is not None else None
+        self._branches: dict[str, dict[str, float]] = getattr(_local, 'branches', {})
+
+    @contextmanager
+    def branch(self, key: str) -> Iterator[None]:
+        if self._marks is None:
+            yield
+            return
+        _local.marks = dict(self._marks)
+        try:
+            yield
+        finally:
+            self._branches[key] = _local.marks
+            _local.marks = None
+
+
+def fork() -> Fork:
+    return Fork()
+
+
+def stop(branch: str | None = None) -> dict[str, float]:
+    """End the timeline, or only one of its branches, and return the duration
+    in seconds of each stage"""
+    if branch is not None and (marks := getattr(_local, 'marks', None)) is not None:
+        marks = getattr(_local, 'branches', {}).pop(branch, None) or dict(marks)
+        marks['ended'] = time.time()
+    else:
+        mark('ended')
+        marks = getattr(_local, 'marks', None) or {}
+        _local.marks = None
+        _local.branches = {}
+
+    durations = {}
+    previous = None
+    for name, stage in STAGES.items():
+        if (at := marks.get(name)) is None:
+            continue
+        if previous is not None and stage:
+            durations[stage] = round(max(at - previous, 0.0), 6)
+        previous = at
+    return durations
@@ -45,6 +45,25 @@ class CeleryConfigDict(TypedDict):
     worker_pid_file: str
     worker_min: int
     worker_max: int
+    priority_queue_name: str | None
+    priority_worker_pid_file: str
+    priority_worker_min: int
+    priority_worker_max: int
+    priority_events: list[str]
+    latency_budget: float
+    priority_latency_budget: float
+    monitor_interval: float
+
+
+class DbPoolSettingsDict(TypedDict):
+    size: int | None
+    max_overflow: int
+    timeout: int
+
+
+class DbPoolConfigDict(TypedDict):
+    rest_api: DbPoolSettingsDict
+    celery: DbPoolSettingsDict
 
 
 class RestApiCorsConfigDict(TypedDict):
@@ -64,6 +83,7 @@ class RestApiConfigDict(TypedDict):
 class EnabledPluginConfigDict(TypedDict):
     api: bool
     config: bool
+    metrics: bool
     mobile: bool
     services: bool
     status: bool
@@ -91,6 +111,19 @@ class ServiceDiscoveryConfigDict(TypedDict):
     extra_tags: list[str]
 
 
+class ProfilingConfigDict(TypedDict):
+    enabled: bool
+    directory: str
+    interval: float
+    max_duration: float
+
+
+class HookLogPolicyConfigDict(TypedDict):
+    mode: str
+    success_sample_rate: float
+    max_body_size: int | None
+
+
 class ConsulConfigDict(TypedDict):
     scheme: str
     port: int
@@ -108,8 +141,16 @@ class WebhookdConfigDict(TypedDict):
     celery: CeleryConfigDict
     consul: ConsulConfigDict
     db_uri: str
+    db_ro_uri: str | None
+    db_ro_max_lag: float
+    db_pool: DbPoolConfigDict
     hook_max_attempts: int
     hook_http_retry_countdown_factor: int
+    hook_max_body_size: int
+    hook_event_ttl: dict[str, float]
+    hook_call_coalescing_window: float
+    hook_log_policy: HookLogPolicyConfigDict
+    profiling: ProfilingConfigDict
     rest_api: RestApiConfigDict
     enabled_celery_tasks: EnabledCeleryTasksConfigDict
     enabled_plugins: EnabledPluginConfigDict
@@ -119,6 +160,7 @@ class WebhookdConfigDict(TypedDict):
     mobile_apns_host: str
     mobile_apns_port: int
     mobile_fcm_notification_end_point: str
+    mobile_fcm_max_rate: float
     service_discovery: ServiceDiscoveryConfigDict
     uuid: str
 